@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+import contextlib
+
+import numpy as np
+
+# ==========================
+# Comparación de formatos de artefacto: pickle comprimido vs .npz vs .forest.map
+# ==========================
+# Para cada modelo mide, en un proceso nuevo por repetición:
+#   - tamaño en disco
+#   - tiempo de carga (sin contar imports) y de la primera predicción
+#   - memoria anónima (heap privado) y RSS que agrega la carga + predicción
+# Formatos:
+#   pickle   joblib.dump(compress=3), como deja compress_models.py
+#   npz      CompactForest.save (se copia entero al heap)
+#   mapped   CompactForest.save_mapped (np.memmap; páginas del page cache)
+# El page cache queda caliente entre repeticiones: el tiempo de carga del
+# formato mapeado no incluye leer del disco lo que todavía no se tocó.
+#
+# Uso:
+#   python -m benchmarks.bench_artifacts                      # modelos sintéticos
+#   python -m benchmarks.bench_artifacts --models-dir models --json artifacts.json
+
+MODELS = ["riasec_model", "ocean_model"]
+FORMATS = ["pickle", "npz", "mapped"]
+
+# Se ejecuta en un proceso limpio: imprime una línea JSON con las mediciones
+_CHILD = r"""
+import sys, json, time
+fmt, path, width = sys.argv[1], sys.argv[2], int(sys.argv[3])
+import numpy as np
+if fmt == "pickle":
+    import joblib, sklearn.ensemble, sklearn.multioutput
+    load = joblib.load
+else:
+    from src.inference.compact_forest import CompactForest
+    load = CompactForest.load if fmt == "npz" else CompactForest.load_mapped
+
+def memory():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields.get("Anonymous", 0), fields.get("Rss", 0)
+
+X = np.random.default_rng(0).integers(1, 6, size=(64, width)).astype(np.float32)
+anon0, rss0 = memory()
+t0 = time.perf_counter()
+model = load(path)
+t1 = time.perf_counter()
+model.predict(X)
+t2 = time.perf_counter()
+anon1, rss1 = memory()
+print(json.dumps({"load_s": t1 - t0, "first_predict_s": t2 - t1,
+                  "anon_bytes": anon1 - anon0, "rss_bytes": rss1 - rss0}))
+"""
+
+
+def prepare(models_dir, out_dir):
+    """Escribe los tres formatos de cada modelo en out_dir. Devuelve {modelo: {formato: ruta}}."""
+    import joblib
+    from src.inference.compact_forest import MAPPED_SUFFIX, export_forest, forest_path
+
+    paths = {}
+    for name in MODELS:
+        model = joblib.load(os.path.join(models_dir, name + ".pkl"))
+        pkl = os.path.join(out_dir, name + ".pkl")
+        joblib.dump(model, pkl, compress=3)
+        forest = export_forest(model)
+        forest.save(forest_path(pkl))
+        forest.save_mapped(forest_path(pkl, MAPPED_SUFFIX))
+        paths[name] = {
+            "pickle": pkl,
+            "npz": forest_path(pkl),
+            "mapped": forest_path(pkl, MAPPED_SUFFIX),
+            "width": int(model.n_features_in_) if hasattr(model, "n_features_in_")
+            else int(model.estimators_[0].n_features_in_),
+        }
+    return paths
+
+
+def measure(fmt, path, width, repeat):
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", _CHILD, fmt, path, str(width)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Falló la carga de {path} ({fmt}):\n{proc.stderr[-2000:]}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    median = lambda key: float(np.median([r[key] for r in runs]))  # noqa: E731
+    return {
+        "size_bytes": os.path.getsize(path),
+        "load_ms": round(median("load_s") * 1000, 2),
+        "first_predict_ms": round(median("first_predict_s") * 1000, 2),
+        "anon_mb": round(median("anon_bytes") / 1024 / 1024, 2),
+        "rss_mb": round(median("rss_bytes") / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño, carga y memoria de cada formato de artefacto.")
+    parser.add_argument("--models-dir", help="carpeta con riasec_model.pkl y ocean_model.pkl "
+                                             "(por defecto, los modelos sintéticos de benchmarks/fixtures.py)")
+    parser.add_argument("--repeat", type=int, default=5, help="procesos por formato (se reporta la mediana)")
+    parser.add_argument("--json", metavar="RUTA", help="guarda el reporte en RUTA")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench-artifacts-")
+    try:
+        models_dir = args.models_dir
+        if models_dir is None:
+            from benchmarks.fixtures import build_fixtures
+            models_dir = os.path.join(work_dir, "source")
+            with contextlib.redirect_stdout(sys.stderr):
+                build_fixtures(models_dir)
+        paths = prepare(models_dir, work_dir)
+
+        report = {}
+        print(f"{'modelo':<14} {'formato':<8} {'disco MB':>9} {'carga ms':>9} {'1ª pred ms':>11} "
+              f"{'heap MB':>8} {'RSS MB':>8}")
+        for name, entry in paths.items():
+            report[name] = {}
+            for fmt in FORMATS:
+                r = measure(fmt, entry[fmt], entry["width"], args.repeat)
+                report[name][fmt] = r
+                print(f"{name:<14} {fmt:<8} {r['size_bytes'] / 1024 / 1024:>9.2f} {r['load_ms']:>9.2f} "
+                      f"{r['first_predict_ms']:>11.2f} {r['anon_mb']:>8.2f} {r['rss_mb']:>8.2f}")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReporte en {args.json}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+
+import numpy as np
+
+from benchmarks.fixtures import build_fixtures, synthetic_users
+
+# ==========================
+# Microbenchmarks por etapa del pipeline
+# ==========================
+# Mide cada etapa de recommend_career por separado y el flujo completo sobre
+# artefactos sintéticos (benchmarks/fixtures.py), sin red ni modelos reales:
+#   - latencia p50/p99 de cada llamada (perf_counter_ns, tras calentar)
+#   - pico de memoria asignada por llamada (tracemalloc, incluye arrays NumPy)
+# y compara contra una línea base JSON. Falla (exit 1) si alguna etapa empeora
+# más que la tolerancia. Las latencias solo se comparan si la línea base es
+# de la misma máquina (ver machine_info); las asignaciones siempre.
+#
+# Uso:
+#   python -m benchmarks.bench_pipeline                     # compara con la línea base
+#   python -m benchmarks.bench_pipeline --save-baseline     # la regenera
+#   python -m benchmarks.bench_pipeline --stages scoring,end_to_end --json out.json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "baselines", "pipeline.json")
+N_USERS = 64
+BATCH_SIZE = 32
+
+
+def machine_info():
+    """Identifica el entorno: latencias de otra máquina o versión no son comparables."""
+    import sklearn
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+# ==========================
+# Etapas
+# ==========================
+
+def build_stages(pipeline, core):
+    """{nombre: función sin argumentos que procesa el siguiente usuario sintético}."""
+    users = synthetic_users(N_USERS)
+    engine = pipeline.scoring_engine()
+    lut = pipeline.riasec_lut()
+    riasec_model = pipeline.get_model("riasec_model")
+    ocean_model = pipeline.get_model("ocean_model")
+    if lut is None:
+        raise RuntimeError("La tabla RIASEC de los fixtures no coincide con el modelo")
+
+    # Entradas intermedias precalculadas: cada etapa mide solo su propio trabajo
+    grouped = [pipeline.group_riasec(items48) for items48, _, _ in users]
+    grouped18 = [pipeline.group_riasec(items18) for _, items18, _ in users]
+    labels = [str(p) for p in core.predict(riasec_model, core.model_input(riasec_model, grouped, pipeline.RIASEC_COLS))]
+    subs = [pipeline.get_subprofile(g) for g in grouped]
+    rows = [engine.candidates(label, sub) for label, sub in zip(labels, subs)]
+    ocean_rows = [pipeline.validate_ocean(ocean) for _, _, ocean in users]
+    ocean_vectors = list(core.predict(ocean_model, core.model_input(ocean_model, ocean_rows, core.OCEAN_ITEMS)))
+
+    def cycle(fn):
+        state = {"i": 0}
+
+        def call():
+            i = state["i"]
+            state["i"] = (i + 1) % N_USERS
+            return fn(i)
+        return call
+
+    batches = [
+        ([u[0] for u in chunk], [u[2] for u in chunk])
+        for chunk in (users[:BATCH_SIZE], users[BATCH_SIZE:2 * BATCH_SIZE])
+    ]
+
+    return {
+        "grouping": cycle(lambda i: (pipeline.group_riasec(users[i][0]), pipeline.validate_ocean(users[i][2]))),
+        "subprofile": cycle(lambda i: pipeline.get_subprofile(grouped[i])),
+        "affinity_lookup": cycle(lambda i: engine.candidates(labels[i], subs[i])),
+        "riasec_predict": cycle(lambda i: core.predict(
+            riasec_model, core.model_input(riasec_model, [grouped[i]], pipeline.RIASEC_COLS))[0]),
+        "riasec_lut": cycle(lambda i: lut.lookup(grouped18[i])),
+        "ocean_predict": cycle(lambda i: core.predict(
+            ocean_model, core.model_input(ocean_model, [ocean_rows[i]], core.OCEAN_ITEMS))[0]),
+        "scoring": cycle(lambda i: engine.recommend([grouped[i]], [ocean_vectors[i]], rows[i], 3)),
+        "end_to_end": cycle(lambda i: pipeline.recommend_career(users[i][0], users[i][2], top_n=3)),
+        "end_to_end_lut": cycle(lambda i: pipeline.recommend_career(users[i][1], users[i][2], top_n=3)),
+        f"end_to_end_batch{BATCH_SIZE}": cycle(lambda i: pipeline.recommend_career_batch(*batches[i % 2], top_n=3)),
+    }
+
+
+# ==========================
+# Medición
+# ==========================
+
+def measure(fn, rounds=5, min_samples=50, max_samples=2000, budget_s=0.3, warmup=20, alloc_samples=20):
+    """
+    Latencias por llamada (µs) y pico de asignaciones por llamada (bytes).
+    p50/p99 son la mediana de varias rondas: una pausa aislada de la máquina
+    afecta a una ronda, no al resultado.
+    """
+    for _ in range(warmup):
+        fn()
+
+    p50, p99, total = [], [], []
+    for _ in range(rounds):
+        gc.collect()
+        samples = []
+        deadline = time.perf_counter() + budget_s
+        while len(samples) < max_samples and (len(samples) < min_samples or time.perf_counter() < deadline):
+            started = time.perf_counter_ns()
+            fn()
+            samples.append(time.perf_counter_ns() - started)
+        us = np.array(samples, dtype=np.float64) / 1000
+        p50.append(np.percentile(us, 50))
+        p99.append(np.percentile(us, 99))
+        total.append(us)
+    total = np.concatenate(total)
+
+    tracemalloc.start()
+    peak = 0
+    for _ in range(alloc_samples):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "samples": int(total.size),
+        "p50_us": round(float(np.median(p50)), 2),
+        "p99_us": round(float(np.median(p99)), 2),
+        "mean_us": round(float(total.mean()), 2),
+        "peak_alloc_bytes": int(peak),
+    }
+
+
+def run_benchmarks(selected=None, budget_s=0.3):
+    """Construye los fixtures, mide las etapas y devuelve el reporte."""
+    models_dir = tempfile.mkdtemp(prefix="bench-models-")
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            build_fixtures(models_dir)
+            # El pipeline lee MODELS_DIR al importarse
+            os.environ["MODELS_DIR"] = models_dir
+            os.environ.pop("MODEL_CACHE_MB", None)
+            from src.inference import inference_core as core
+            from src.inference import recommendation_pipeline as pipeline
+            pipeline.preload()
+        stages = build_stages(pipeline, core)
+        unknown = set(selected or ()) - set(stages)
+        if unknown:
+            raise SystemExit(f"Etapas desconocidas: {', '.join(sorted(unknown))} (disponibles: {', '.join(stages)})")
+
+        results = {}
+        # Los logs por request del pipeline no deben contar ni ensuciar la salida
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for name, fn in stages.items():
+                if selected and name not in selected:
+                    continue
+                results[name] = measure(fn, budget_s=budget_s)
+                print(f"[BENCH] {name}: p50 {results[name]['p50_us']:.1f} µs", file=sys.stderr)
+        return {"machine": machine_info(), "stages": results}
+    finally:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+
+# ==========================
+# Comparación con la línea base
+# ==========================
+
+def compare(report, baseline, tolerance, p99_tolerance, alloc_tolerance, min_delta_us=20.0, min_delta_bytes=4096):
+    """Lista de regresiones (vacía si todo está dentro de la tolerancia)."""
+    same_machine = report["machine"] == baseline.get("machine")
+    regressions = []
+    for name, current in report["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            continue
+        checks = [("peak_alloc_bytes", alloc_tolerance, min_delta_bytes)]
+        if same_machine:
+            checks = [("p50_us", tolerance, min_delta_us), ("p99_us", p99_tolerance, min_delta_us)] + checks
+        for metric, tol, min_delta in checks:
+            limit = max(base[metric] * (1 + tol), base[metric] + min_delta)
+            if current[metric] > limit:
+                regressions.append(
+                    f"{name}.{metric}: {current[metric]:,} > {limit:,.0f} (línea base {base[metric]:,}, +{tol:.0%})"
+                )
+    return same_machine, regressions
+
+
+def print_report(report, baseline=None):
+    base_stages = baseline["stages"] if baseline else {}
+    print(f"{'etapa':<22} {'p50 µs':>10} {'p99 µs':>10} {'alloc KB':>10} {'Δp50':>8} {'Δalloc':>8}")
+    for name, r in report["stages"].items():
+        base = base_stages.get(name)
+        d_p50 = f"{r['p50_us'] / base['p50_us'] - 1:+.0%}" if base and base["p50_us"] else ""
+        d_alloc = f"{r['peak_alloc_bytes'] / base['peak_alloc_bytes'] - 1:+.0%}" \
+            if base and base["peak_alloc_bytes"] else ""
+        print(f"{name:<22} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f} {r['peak_alloc_bytes'] / 1024:>10.1f} "
+              f"{d_p50:>8} {d_alloc:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks del pipeline con umbrales de regresión.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="escribe el resultado como nueva línea base")
+    parser.add_argument("--stages", help="etapas a medir, separadas por coma (por defecto todas)")
+    parser.add_argument("--budget-s", type=float, default=0.3, help="tiempo de medición por ronda y etapa")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="aumento máximo de p50")
+    parser.add_argument("--p99-tolerance", type=float, default=1.0, help="aumento máximo de p99")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10, help="aumento máximo del pico de memoria")
+    parser.add_argument("--json", metavar="RUTA", help="guarda el reporte completo en RUTA")
+    args = parser.parse_args()
+
+    selected = [s for s in args.stages.split(",") if s] if args.stages else None
+    report = run_benchmarks(selected, args.budget_s)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        if selected and os.path.exists(args.baseline):
+            # Actualización parcial: conservar las etapas no medidas
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            report = {"machine": report["machine"], "stages": {**previous["stages"], **report["stages"]}}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print_report(report)
+        print(f"\nLínea base guardada en {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print_report(report)
+        print(f"\nNo hay línea base en {args.baseline}; genera una con --save-baseline")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print_report(report, baseline)
+    same_machine, regressions = compare(
+        report, baseline, args.tolerance, args.p99_tolerance, args.alloc_tolerance
+    )
+    if not same_machine:
+        print("\n[WARN] La línea base es de otra máquina o versión: solo se comparan las asignaciones")
+    for regression in regressions:
+        print(f"[FALLA] {regression}")
+    if regressions:
+        sys.exit(1)
+    print("\nOK: sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import json
+
+import numpy as np
+
+from src.inference.affinity_index import ALIAS_MAP, OCEAN_TRAITS, RIASEC_LETTERS
+from src.inference.inference_core import OCEAN_ITEMS
+
+# ==========================
+# Artefactos sintéticos para los benchmarks
+# ==========================
+# Bosques pequeños entrenados con datos generados (semilla fija) y un
+# catálogo de afinidad con los mismos subperfiles que riasec_affinity.json:
+# los benchmarks corren sin red y sin los modelos reales, con la misma forma
+# de entrada y de salida que producción.
+#   riasec_model.pkl     RandomForestClassifier sobre promedios RIASEC (escala 1-5)
+#   ocean_model.pkl      MultiOutputRegressor(RandomForestRegressor) sobre 20 ítems
+#   riasec_affinity.json CAREERS_PER_SUBPROFILE carreras por subperfil
+#   riasec_lut.npz       tabla RIASEC de producción (1-5, den=3: formulario de 18 ítems)
+
+SEED = 0
+N_SAMPLES = 3000
+CAREERS_PER_SUBPROFILE = 12
+OCEAN_TARGETS = [
+    ("Openness", "OPN"), ("Conscientiousness", "CSN"), ("Extraversion", "EXT"),
+    ("Agreeableness", "AGR"), ("Neuroticism", "EST"),
+]
+
+
+def _affinity_catalog(rng):
+    """
+    {letra: {subperfil: [carreras]}}. Los subperfiles impares traen perfil en
+    todas sus carreras (puntuación matricial); los pares, ninguno (puntaje original).
+    """
+    catalog = {letter: {} for letter in RIASEC_LETTERS}
+    for k, sub_label in enumerate(sorted(set(ALIAS_MAP.values()))):
+        careers = []
+        for i in range(CAREERS_PER_SUBPROFILE):
+            entry = {"carrera": f"{sub_label} {i:02d}", "universidades": [f"U{i % 7}", "UNI", "PUCP"][: 1 + i % 3]}
+            if k % 2:
+                entry["riasec"] = dict(zip(RIASEC_LETTERS, np.round(rng.uniform(0, 1, 6), 3).tolist()))
+                entry["ocean"] = dict(zip(OCEAN_TRAITS, np.round(rng.uniform(-1, 1, 5), 3).tolist()))
+            careers.append(entry)
+        catalog[sub_label.split("-", 1)[0]][sub_label] = careers
+    return catalog
+
+
+def build_fixtures(models_dir):
+    """Genera los artefactos sintéticos en models_dir y devuelve la ruta."""
+    import joblib
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    from sklearn.multioutput import MultiOutputRegressor
+    from src.inference.riasec_lut import LUT_FILE, build_riasec_lut
+
+    os.makedirs(models_dir, exist_ok=True)
+    rng = np.random.default_rng(SEED)
+
+    X = pd.DataFrame(rng.uniform(1, 5, size=(N_SAMPLES, 6)), columns=RIASEC_LETTERS)
+    y = X.idxmax(axis=1)
+    riasec_model = RandomForestClassifier(n_estimators=40, max_depth=10, random_state=SEED).fit(X, y)
+    joblib.dump(riasec_model, os.path.join(models_dir, "riasec_model.pkl"), compress=3)
+
+    Xo = pd.DataFrame(rng.integers(1, 6, size=(N_SAMPLES, len(OCEAN_ITEMS))), columns=OCEAN_ITEMS)
+    yo = pd.DataFrame({
+        trait: Xo[[c for c in OCEAN_ITEMS if c.startswith(prefix)]].mean(axis=1) + rng.normal(0, 0.2, N_SAMPLES)
+        for trait, prefix in OCEAN_TARGETS
+    })
+    ocean_model = MultiOutputRegressor(RandomForestRegressor(n_estimators=10, max_depth=8, random_state=SEED))
+    joblib.dump(ocean_model.fit(Xo, yo), os.path.join(models_dir, "ocean_model.pkl"), compress=3)
+
+    with open(os.path.join(models_dir, "riasec_affinity.json"), "w", encoding="utf-8") as f:
+        json.dump(_affinity_catalog(rng), f, ensure_ascii=False, indent=2)
+
+    build_riasec_lut(
+        os.path.join(models_dir, "riasec_model.pkl"), os.path.join(models_dir, LUT_FILE), lo=1, hi=5, den=3
+    )
+    return models_dir
+
+
+def synthetic_users(n, seed=SEED + 1):
+    """
+    n estudiantes sintéticos: (ítems RIASEC 48, ítems RIASEC 18, ítems OCEAN 20),
+    todos Likert 1-5. Los promedios de 48 ítems casi nunca caen en la grilla de
+    la tabla (usan el bosque); los de 18 ítems caen siempre (lectura de tabla).
+    """
+    rng = np.random.default_rng(seed)
+    items48 = rng.integers(1, 6, size=(n, 48)).astype(float)
+    items18 = rng.integers(1, 6, size=(n, 18)).astype(float)
+    ocean = rng.integers(1, 6, size=(n, len(OCEAN_ITEMS))).astype(float)
+    return [(items48[i].tolist(), items18[i].tolist(), ocean[i].tolist()) for i in range(n)]
@@ -0,0 +1,476 @@
+import os
+import sys
+import json
+import time
+import queue
+import random
+import signal
+import socket
+import shutil
+import argparse
+import platform
+import tempfile
+import itertools
+import threading
+import subprocess
+import http.client
+
+import numpy as np
+
+from src.inference.memory_report import child_pids
+from src.inference.metrics import memory_breakdown
+
+# ==========================
+# Prueba de carga y soak contra la API bajo gunicorn
+# ==========================
+# Levanta `gunicorn -c gunicorn.conf.py src.inference.api:app` en un puerto
+# local para cada combinación de --workers (WEB_CONCURRENCY) y --executors
+# (INFERENCE_EXECUTOR:INFERENCE_WORKERS[:INFERENCE_MAX_PENDING]), le envía
+# requests /predict y registra:
+#   - throughput (respuestas 200/s), latencia p50/p95/p99, tasa de error y
+#     códigos de estado (503 = rechazo por sobrecarga)
+#   - RSS/PSS del master + workers + procesos del ejecutor cada --sample-s
+#   - respuestas por segundo, para ver degradación en corridas largas (soak)
+#
+# Modos de carga:
+#   closed  --concurrency clientes que envían el siguiente request apenas
+#           reciben la respuesta (mide la capacidad máxima)
+#   open    llegadas a --rate req/s (fijas o --poisson) sin esperar
+#           respuestas; la latencia se mide desde el instante programado, así
+#           que la cola del lado del cliente también cuenta
+#
+# Payloads sintéticos (mezcla de formularios de 6/18/48 valores RIASEC) o
+# grabados con --payloads (JSONL o lista JSON de cuerpos /predict). Los
+# payloads repetidos pasan por la caché de resultados; para medir sin ella:
+# --env RESULT_CACHE_SIZE=0.
+#
+# Uso:
+#   python -m benchmarks.load_test --fixtures --workers 1,2,4 --executors thread:2,process:2 \
+#       --mode closed --concurrency 16 --duration-s 30 --out load.json
+#   python -m benchmarks.load_test --url http://127.0.0.1:8000 --pid 1234 --mode open --rate 50
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+# ==========================
+# Payloads
+# ==========================
+
+def synthetic_payloads(n, seed=0):
+    """n cuerpos /predict distintos con formularios RIASEC de 6, 18 y 48 valores."""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(n):
+        form = (6, 18, 48)[i % 3]
+        if form == 6:
+            riasec = [rng.randint(0, 40) for _ in range(6)]
+        else:
+            riasec = [rng.randint(1, 5) for _ in range(form)]
+        payloads.append({"riasec": riasec, "ocean": [rng.randint(1, 5) for _ in range(20)]})
+    return payloads
+
+
+def load_payloads(path):
+    """Cuerpos /predict grabados: un JSON por línea o una lista JSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+# ==========================
+# Servidor local
+# ==========================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(host, port, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/")  # redirige a /docs: cualquier respuesta < 500 indica que está listo
+            if conn.getresponse().status < 500:
+                conn.close()
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+class LocalServer:
+    """gunicorn con la configuración del repo en 127.0.0.1:<puerto libre>."""
+
+    def __init__(self, workers, executor, extra_env, log_dir, startup_timeout_s=180):
+        self.port = free_port()
+        self.env = os.environ.copy()
+        self.env.update(extra_env)
+        self.env.update({
+            "BIND": f"127.0.0.1:{self.port}",
+            "WEB_CONCURRENCY": str(workers),
+            "INFERENCE_EXECUTOR": executor["kind"],
+            "INFERENCE_WORKERS": str(executor["workers"]),
+        })
+        if executor.get("max_pending") is not None:
+            self.env["INFERENCE_MAX_PENDING"] = str(executor["max_pending"])
+        self.log_path = os.path.join(log_dir, f"gunicorn-w{workers}-{executor['label']}.log")
+        self.startup_timeout_s = startup_timeout_s
+        self.proc = None
+
+    def __enter__(self):
+        log = open(self.log_path, "wb")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "src.inference.api:app"],
+            cwd=ROOT_DIR, env=self.env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        log.close()
+        if not wait_ready("127.0.0.1", self.port, self.startup_timeout_s):
+            self.__exit__(None, None, None)
+            with open(self.log_path, "r", encoding="utf-8", errors="replace") as f:
+                tail = f.read()[-2000:]
+            raise RuntimeError(f"gunicorn no respondió en {self.startup_timeout_s} s:\n{tail}")
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc and self.proc.poll() is None:
+            self.proc.send_signal(signal.SIGTERM)
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+
+# ==========================
+# Muestreo de memoria
+# ==========================
+
+def process_tree(pid):
+    """pid y todos sus descendientes (workers de gunicorn y procesos del ejecutor)."""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending.extend(child_pids(current))
+    return pids
+
+
+class MemorySampler(threading.Thread):
+    """RSS y PSS totales del árbol de procesos del servidor cada `interval_s`."""
+
+    def __init__(self, pid, interval_s, started):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval_s = interval_s
+        self.started = started
+        self.samples = []
+        self._halt = threading.Event()
+
+    def sample(self):
+        rss = pss = 0
+        pids = process_tree(self.pid)
+        for pid in pids:
+            try:
+                m = memory_breakdown(pid)
+            except Exception:
+                continue  # el proceso terminó entre el listado y la lectura
+            rss += m["rss"]
+            pss += m["pss"]
+        self.samples.append({
+            "t_s": round(time.monotonic() - self.started, 2),
+            "rss_mb": round(rss / MB, 1),
+            "pss_mb": round(pss / MB, 1),
+            "processes": len(pids),
+        })
+
+    def run(self):
+        while not self._halt.is_set():
+            self.sample()
+            self._halt.wait(self.interval_s)
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+        self.sample()
+
+
+# ==========================
+# Generadores de carga
+# ==========================
+
+class Client:
+    """Conexión keep-alive propia de cada hilo; se reabre tras un error."""
+
+    def __init__(self, host, port, timeout_s):
+        self.host, self.port, self.timeout_s = host, port, timeout_s
+        self.conn = None
+
+    def post(self, path, body):
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout_s)
+            self.conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = self.conn.getresponse()
+            response.read()
+            if response.getheader("Connection", "").lower() == "close":
+                self.close()
+            return response.status
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            return type(e).__name__
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def run_closed(host, port, bodies, concurrency, duration_s, warmup_s, timeout_s):
+    """`concurrency` clientes en bucle cerrado. Devuelve [(t_inicio, latencia, estado)]."""
+    counter = itertools.count()
+    started = time.monotonic()
+    measure_from, deadline = started + warmup_s, started + warmup_s + duration_s
+    records = [[] for _ in range(concurrency)]
+
+    def client_loop(out):
+        client = Client(host, port, timeout_s)
+        while True:
+            t0 = time.monotonic()
+            if t0 >= deadline:
+                break
+            status = client.post("/predict", bodies[next(counter) % len(bodies)])
+            if t0 >= measure_from:
+                out.append((t0 - measure_from, time.monotonic() - t0, status))
+        client.close()
+
+    threads = [threading.Thread(target=client_loop, args=(out,)) for out in records]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [r for out in records for r in out]
+
+
+def run_open(host, port, bodies, rate, poisson, concurrency, duration_s, warmup_s, timeout_s, drain_s=10.0):
+    """
+    Llegadas a `rate` req/s atendidas por `concurrency` hilos. La latencia se
+    mide desde el instante programado; lo que no se alcanzó a enviar antes de
+    deadline + drain_s se cuenta como "unsent".
+    """
+    rng = random.Random(1)
+    started = time.monotonic()
+    measure_from, deadline = started + warmup_s, started + warmup_s + duration_s
+    arrivals = queue.Queue()
+    records = [[] for _ in range(concurrency)]
+
+    t, i = started, 0
+    while t < deadline:
+        arrivals.put((t, bodies[i % len(bodies)]))
+        t += rng.expovariate(rate) if poisson else 1.0 / rate
+        i += 1
+
+    def worker(out):
+        client = Client(host, port, timeout_s)
+        while True:
+            try:
+                scheduled, body = arrivals.get_nowait()
+            except queue.Empty:
+                break
+            wait = scheduled - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            if time.monotonic() > deadline + drain_s:
+                status = "unsent"
+            else:
+                status = client.post("/predict", body)
+            if scheduled >= measure_from:
+                out.append((scheduled - measure_from, time.monotonic() - scheduled, status))
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(out,)) for out in records]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return [r for out in records for r in out]
+
+
+# ==========================
+# Resumen
+# ==========================
+
+def summarize(records, duration_s, memory):
+    """Throughput, percentiles, errores y tendencia de memoria de una corrida."""
+    statuses = {}
+    for _, _, status in records:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = [latency for _, latency, status in records if status == 200]
+    ms = np.array(ok, dtype=np.float64) * 1000
+
+    per_second = np.zeros(int(np.ceil(duration_s)), dtype=np.int64)
+    for t, _, status in records:
+        if status == 200 and int(t) < len(per_second):
+            per_second[int(t)] += 1
+
+    summary = {
+        "requests": len(records),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else None,
+        "status_counts": statuses,
+        "throughput_rps": round(len(ok) / duration_s, 2),
+        "offered_rps": round(len(records) / duration_s, 2),
+        "latency_ms": {
+            name: round(float(np.percentile(ms, q)), 2) if ms.size else None
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "ok_per_second": per_second.tolist(),
+    }
+    if memory:
+        t = np.array([s["t_s"] for s in memory])
+        rss = np.array([s["rss_mb"] for s in memory])
+        slope = float(np.polyfit(t, rss, 1)[0]) * 60 if len(memory) >= 3 and np.ptp(t) > 0 else None
+        summary["rss_mb"] = {
+            "start": float(rss[0]), "peak": float(rss.max()), "end": float(rss[-1]),
+            "peak_pss": max(s["pss_mb"] for s in memory),
+            "slope_mb_per_min": round(slope, 2) if slope is not None else None,
+        }
+    return summary
+
+
+def parse_executors(spec):
+    """"thread:2,process:4:64" -> [{kind, workers, max_pending, label}]."""
+    executors = []
+    for item in spec.split(","):
+        parts = item.strip().split(":")
+        kind = parts[0]
+        if kind not in ("thread", "process"):
+            raise SystemExit(f"Ejecutor desconocido: {kind} (thread o process)")
+        workers = int(parts[1]) if len(parts) > 1 else 2
+        max_pending = int(parts[2]) if len(parts) > 2 else None
+        executors.append({"kind": kind, "workers": workers, "max_pending": max_pending, "label": item.strip()})
+    return executors
+
+
+def print_run(run):
+    s = run["summary"]
+    lat = s["latency_ms"]
+    fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"  # noqa: E731
+    rss = s.get("rss_mb", {})
+    print(
+        f"{run['config']['label']:<28} {s['throughput_rps']:>8.1f} {fmt(lat['p50'])} {fmt(lat['p95'])} "
+        f"{fmt(lat['p99'])} {s['error_rate'] * 100 if s['error_rate'] is not None else 0:>6.1f}% "
+        f"{rss.get('peak', 0):>8.0f} {rss.get('slope_mb_per_min') if rss.get('slope_mb_per_min') is not None else '-':>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga/soak de /predict con barrido de workers.")
+    target = parser.add_argument_group("servidor")
+    target.add_argument("--url", help="servidor ya levantado (no se barren workers ni ejecutores)")
+    target.add_argument("--pid", type=int, help="PID del master de --url para muestrear memoria")
+    target.add_argument("--workers", default="1", help="valores de WEB_CONCURRENCY a barrer, p. ej. 1,2,4")
+    target.add_argument("--executors", default="thread:2",
+                        help="ejecutores a barrer: tipo:workers[:max_pending], p. ej. thread:2,process:2")
+    target.add_argument("--env", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="variable de entorno extra para el servidor (repetible)")
+    target.add_argument("--fixtures", action="store_true",
+                        help="sirve los modelos sintéticos de benchmarks/fixtures.py (sin red)")
+    target.add_argument("--startup-timeout-s", type=float, default=180)
+
+    load = parser.add_argument_group("carga")
+    load.add_argument("--mode", choices=["closed", "open"], default="closed")
+    load.add_argument("--concurrency", type=int, default=8, help="clientes (closed) o hilos emisores (open)")
+    load.add_argument("--rate", type=float, default=20.0, help="req/s en modo open")
+    load.add_argument("--poisson", action="store_true", help="llegadas Poisson en lugar de intervalo fijo")
+    load.add_argument("--duration-s", type=float, default=20.0)
+    load.add_argument("--warmup-s", type=float, default=3.0)
+    load.add_argument("--timeout-s", type=float, default=30.0, help="timeout por request")
+    load.add_argument("--payloads", help="cuerpos /predict grabados (JSONL o lista JSON)")
+    load.add_argument("--pool", type=int, default=5000, help="cantidad de payloads sintéticos distintos")
+    load.add_argument("--sample-s", type=float, default=1.0, help="intervalo de muestreo de memoria")
+    parser.add_argument("--out", help="guarda los resultados en JSON")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_payloads(args.pool)
+    bodies = [json.dumps(p).encode("utf-8") for p in payloads]
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    work_dir = tempfile.mkdtemp(prefix="load-test-")
+
+    def one_run(host, port, pid, config):
+        started = time.monotonic()
+        sampler = MemorySampler(pid, args.sample_s, started + args.warmup_s) if pid else None
+        if sampler:
+            sampler.start()
+        if args.mode == "closed":
+            records = run_closed(host, port, bodies, args.concurrency, args.duration_s, args.warmup_s, args.timeout_s)
+        else:
+            records = run_open(host, port, bodies, args.rate, args.poisson, args.concurrency,
+                               args.duration_s, args.warmup_s, args.timeout_s)
+        memory = []
+        if sampler:
+            sampler.stop()
+            memory = [s for s in sampler.samples if s["t_s"] >= 0]
+        run = {"config": config, "summary": summarize(records, args.duration_s, memory), "memory": memory}
+        print_run(run)
+        return run
+
+    load_config = {
+        "mode": args.mode, "concurrency": args.concurrency,
+        "rate": args.rate if args.mode == "open" else None, "poisson": args.poisson,
+        "duration_s": args.duration_s, "warmup_s": args.warmup_s, "payloads": len(bodies),
+    }
+    if args.fixtures and not args.url:
+        from benchmarks.fixtures import build_fixtures
+        models_dir = os.path.join(work_dir, "models")
+        print(f"[LOAD] Generando modelos sintéticos en {models_dir} ...", file=sys.stderr)
+        build_fixtures(models_dir)
+        extra_env.setdefault("MODELS_DIR", models_dir)
+
+    print(f"{'configuración':<28} {'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'error':>7} "
+          f"{'RSS MB':>8} {'MB/min':>8}")
+    runs = []
+    try:
+        if args.url:
+            parsed = http.client.urlsplit(args.url)
+            config = {"label": args.url, "url": args.url, **load_config}
+            runs.append(one_run(parsed.hostname, parsed.port or 80, args.pid, config))
+        else:
+            for workers in [int(w) for w in args.workers.split(",")]:
+                for executor in parse_executors(args.executors):
+                    config = {
+                        "label": f"w={workers} {executor['label']}",
+                        "workers": workers,
+                        "executor": executor["kind"],
+                        "executor_workers": executor["workers"],
+                        "max_pending": executor["max_pending"],
+                        **load_config,
+                    }
+                    with LocalServer(workers, executor, extra_env, work_dir, args.startup_timeout_s) as server:
+                        runs.append(one_run("127.0.0.1", server.port, server.proc.pid, config))
+    finally:
+        if args.out:
+            report = {
+                "meta": {
+                    "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "machine": platform.machine(),
+                    "cpus": os.cpu_count(),
+                    "python": platform.python_version(),
+                    "argv": sys.argv[1:],
+                },
+                "runs": runs,
+            }
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResultados en {args.out}")
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
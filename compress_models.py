@@ -1,47 +1,189 @@
 import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
 import joblib
 
-def compress_model(file_path, compress_level=3):
-    """Carga un modelo .pkl y lo guarda comprimido."""
-    try:
-        print(f"\nProcesando: {file_path}")
-        model = joblib.load(file_path)
+# ==========================
+# Compresión de modelos con elección automática de codec
+# ==========================
+# Para cada .pkl de models/ escribe el modelo con varios codecs de joblib en
+# paralelo y después mide las cargas de a un codec por vez (sin otras cargas
+# ni escrituras compitiendo por CPU): cada carga corre en un proceso nuevo que
+# reporta su tiempo y su propio pico de RSS (ru_maxrss del hijo, que incluye
+# el intérprete y los imports de joblib/sklearn, iguales para todos los
+# codecs). Se queda con el que carga más rápido sin superar --max-mb (si
+# ninguno entra, el más chico), reemplaza el archivo y registra la elección
+# en models/compression_manifest.json.
+#
+# Codecs: none, zlib (niveles 1/3/6), lzma, y lz4 si el paquete está
+# instalado (pip install lz4; no es dependencia del servicio).
+#
+# Uso:
+#   python compress_models.py                       # carga más rápida, sin tope
+#   python compress_models.py --max-mb 60 --jobs 4
+#   python compress_models.py --dry-run             # solo reporta, no reemplaza
+#
+# Si cambia un artefacto, regenerar el manifiesto de aprovisionamiento:
+#   python -m src.inference.provisioning --write-manifest models/manifest.json
+
+MANIFEST_NAME = "compression_manifest.json"
+
+# Se ejecuta en un proceso limpio: imprime una línea JSON con las mediciones
+_LOAD_PROBE = r"""
+import sys, json, time, resource
+import joblib, sklearn.ensemble, sklearn.multioutput
+t0 = time.perf_counter()
+joblib.load(sys.argv[1])
+load_s = time.perf_counter() - t0
+# Pico de este proceso desde que arrancó (KB en Linux, bytes en macOS)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"load_s": load_s, "peak_rss_bytes": peak if sys.platform == "darwin" else peak * 1024}))
+"""
+
+
+def available_codecs():
+    """(nombre, nivel, argumento compress de joblib) de los codecs disponibles aquí."""
+    codecs = [("none", 0, 0), ("zlib", 1, ("zlib", 1)), ("zlib", 3, ("zlib", 3)), ("zlib", 6, ("zlib", 6)),
+              ("lzma", 3, ("lzma", 3))]
+    if importlib.util.find_spec("lz4") is not None:
+        codecs.insert(1, ("lz4", 3, ("lz4", 3)))
+    return codecs
+
+
+def encode(model, out_dir, base_name, codec):
+    """Escribe el modelo con un codec. Devuelve (codec, ruta, tamaño, segundos)."""
+    name, level, compress = codec
+    path = os.path.join(out_dir, f"{base_name}.{name}{level}")
+    started = time.perf_counter()
+    joblib.dump(model, path, compress=compress)
+    return codec, path, os.path.getsize(path), time.perf_counter() - started
+
 
-        # Reemplazar directamente el archivo original
-        temp_path = file_path + ".tmp"
-        joblib.dump(model, temp_path, compress=compress_level)
+def measure_load(path, repeat=3):
+    """Mediana del tiempo de carga y del pico de RSS del proceso hijo, un proceso nuevo por carga."""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", _LOAD_PROBE, path], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr[-1000:])
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    runs.sort(key=lambda r: r["load_s"])
+    middle = runs[len(runs) // 2]
+    return middle["load_s"], sorted(r["peak_rss_bytes"] for r in runs)[len(runs) // 2]
 
-        old_size = os.path.getsize(file_path) / (1024 * 1024)
-        new_size = os.path.getsize(temp_path) / (1024 * 1024)
-        reduction = 100 * (1 - new_size / old_size)
 
-        os.replace(temp_path, file_path)
-        print(f"Comprimido: {os.path.basename(file_path)}")
-        print(f"Tamaño antes: {old_size:.1f} MB → después: {new_size:.1f} MB ({reduction:.1f}% menos)")
+def choose(candidates, max_bytes):
+    """El de carga más rápida dentro del tope de tamaño; si ninguno entra, el más chico."""
+    fitting = [c for c in candidates if max_bytes is None or c["size_bytes"] <= max_bytes]
+    if fitting:
+        return min(fitting, key=lambda c: c["load_ms"]), True
+    return min(candidates, key=lambda c: c["size_bytes"]), False
 
-    except Exception as e:
-        print(f"Error al procesar {file_path}: {e}")
+
+def compress_model(file_path, max_bytes=None, jobs=4, repeat=3, dry_run=False):
+    """Prueba todos los codecs sobre un .pkl y deja el elegido en su lugar. Devuelve la entrada del manifiesto."""
+    print(f"\nProcesando: {file_path}")
+    model = joblib.load(file_path)
+    old_size = os.path.getsize(file_path)
+    base_name = os.path.basename(file_path)
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(file_path), prefix=".codecs-") as tmp:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            encoded = list(pool.map(lambda c: encode(model, tmp, base_name, c), available_codecs()))
+        # Las cargas se miden de a una, con las escrituras ya terminadas
+        loads = [measure_load(path, repeat) for _, path, _, _ in encoded]
+
+        candidates = []
+        for (codec, path, size, dump_s), (load_s, peak_rss) in zip(encoded, loads):
+            candidates.append({
+                "codec": codec[0],
+                "level": codec[1],
+                "size_bytes": size,
+                "dump_ms": round(dump_s * 1000, 1),
+                "load_ms": round(load_s * 1000, 1),
+                "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+                "_path": path,
+            })
+
+        print(f"{'codec':<10} {'MB':>8} {'carga ms':>9} {'pico RSS MB':>12} {'escritura ms':>13}")
+        for c in sorted(candidates, key=lambda c: c["load_ms"]):
+            print(f"{c['codec'] + str(c['level']):<10} {c['size_bytes'] / 1024 / 1024:>8.1f} "
+                  f"{c['load_ms']:>9.1f} {c['peak_rss_mb']:>12.1f} {c['dump_ms']:>13.1f}")
+
+        chosen, within_cap = choose(candidates, max_bytes)
+        if not within_cap:
+            print(f"[WARN] Ningún codec entra en {max_bytes / 1024 / 1024:.1f} MB; se usa el más chico")
+        if not dry_run:
+            os.replace(chosen["_path"], file_path)
+
+    for c in candidates:
+        c.pop("_path")
+    new_size = chosen["size_bytes"]
+    print(f"Elegido: {chosen['codec']}{chosen['level']} — tamaño antes: {old_size / 1024 / 1024:.1f} MB → "
+          f"después: {new_size / 1024 / 1024:.1f} MB, carga {chosen['load_ms']:.1f} ms"
+          + (" (--dry-run: archivo sin cambios)" if dry_run else ""))
+    return {
+        "codec": chosen["codec"],
+        "level": chosen["level"],
+        "size_bytes": new_size,
+        "load_ms": chosen["load_ms"],
+        "peak_rss_mb": chosen["peak_rss_mb"],
+        "within_cap": within_cap,
+        "candidates": candidates,
+    }
 
 
 def main():
-    project_root = os.getcwd()
-    models_dir = os.path.join(project_root, "models")
+    parser = argparse.ArgumentParser(description="Elige el codec de joblib que carga más rápido bajo un tope de tamaño.")
+    parser.add_argument("--models-dir", default=os.path.join(os.getcwd(), "models"))
+    parser.add_argument("--max-mb", type=float, default=None, help="tamaño máximo por archivo")
+    parser.add_argument("--jobs", type=int, default=min(4, os.cpu_count() or 1), help="codecs escritos en paralelo (las cargas se miden de a una)")
+    parser.add_argument("--repeat", type=int, default=3, help="cargas por codec (se usa la mediana)")
+    parser.add_argument("--dry-run", action="store_true", help="solo medir; no reemplaza los archivos")
+    args = parser.parse_args()
 
+    models_dir = args.models_dir
     if not os.path.exists(models_dir):
         print("No se encontró la carpeta 'models' en el proyecto.")
         return
 
-    pkl_files = [f for f in os.listdir(models_dir) if f.endswith(".pkl")]
+    pkl_files = sorted(f for f in os.listdir(models_dir) if f.endswith(".pkl"))
     if not pkl_files:
         print("No hay archivos .pkl para comprimir.")
         return
 
-    print(f"Se encontraron {len(pkl_files)} modelos en /models:")
+    print(f"Se encontraron {len(pkl_files)} modelos en {models_dir}:")
     for f in pkl_files:
         print(f" - {f}")
+    print("Codecs: " + ", ".join(f"{name}{level}" for name, level, _ in available_codecs()))
 
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb else None
+    entries = {}
     for f in pkl_files:
-        compress_model(os.path.join(models_dir, f))
+        try:
+            entries[f] = compress_model(os.path.join(models_dir, f), max_bytes, args.jobs, args.repeat, args.dry_run)
+        except Exception as e:
+            print(f"Error al procesar {f}: {e}")
+
+    if args.dry_run:
+        return
+    manifest_path = os.path.join(models_dir, MANIFEST_NAME)
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "max_mb": args.max_mb,
+            "joblib": joblib.__version__,
+            "models": entries,
+        }, fh, indent=2)
+    print(f"\nManifiesto de compresión escrito en {manifest_path}")
+    print("Si cambió algún artefacto: python -m src.inference.provisioning --write-manifest models/manifest.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+def feature_names_of(model):
+    """Nombres de features con los que se entrenó el modelo (o del primer regresor)."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is None and hasattr(model, "estimators_"):
+        names = getattr(model.estimators_[0], "feature_names_in_", None)
+    return [str(n) for n in names] if names is not None else None
+
+
+def sample_inputs(model, n_features, n_rows=2000, seed=42):
+    """Filas enteras al azar dentro del rango de umbrales que usan los árboles."""
+    trees = []
+    for est in model.estimators_:
+        trees.extend(est.estimators_ if hasattr(est, "estimators_") else [est])
+    lo = np.full(n_features, np.inf)
+    hi = np.full(n_features, -np.inf)
+    for est in trees:
+        tree = est.tree_
+        internal = tree.children_left != -1
+        for f, t in zip(tree.feature[internal], tree.threshold[internal]):
+            lo[f] = min(lo[f], t)
+            hi[f] = max(hi[f], t)
+    lo = np.where(np.isfinite(lo), np.floor(lo) - 1, 0)
+    hi = np.where(np.isfinite(hi), np.ceil(hi) + 1, 1)
+    rng = np.random.default_rng(seed)
+    return rng.integers(lo, hi + 1, size=(n_rows, n_features)).astype(np.float32)
+
+
+def export_model(pkl_path, tol=1e-4):
+    """Convierte un modelo .pkl a .onnx y valida contra las salidas de sklearn."""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    import onnxruntime as ort
+
+    print(f"\nProcesando: {pkl_path}")
+    model = joblib.load(pkl_path)
+    names = feature_names_of(model)
+    n_features = len(names) if names else model.n_features_in_
+    is_classifier = hasattr(model, "classes_")
+
+    options = {id(model): {"zipmap": False}} if is_classifier else None
+    final_types = None
+    if not is_classifier:
+        # Un RandomForestRegressor multisalida se declara (N, 1) si no se indica el ancho
+        n_outputs = len(model.estimators_) if hasattr(model.estimators_[0], "estimators_") else model.n_outputs_
+        final_types = [("variable", FloatTensorType([None, n_outputs]))]
+    onx = convert_sklearn(
+        model,
+        initial_types=[("input", FloatTensorType([None, n_features]))],
+        options=options,
+        final_types=final_types,
+    )
+    meta = {
+        "kind": "classifier" if is_classifier else "regressor",
+        "feature_names": json.dumps(names),
+        "classes": json.dumps([str(c) for c in model.classes_]) if is_classifier else "null",
+    }
+    for key, value in meta.items():
+        prop = onx.metadata_props.add()
+        prop.key, prop.value = key, value
+
+    onnx_path = os.path.splitext(pkl_path)[0] + ".onnx"
+    with open(onnx_path, "wb") as f:
+        f.write(onx.SerializeToString())
+
+    # Validación: mismas filas por sklearn y por onnxruntime
+    X = sample_inputs(model, n_features)
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    outputs = session.run(None, {"input": X})
+    X_df = X if names is None else pd.DataFrame(X, columns=names)
+    if is_classifier:
+        agreement = float((outputs[0].astype(str) == model.predict(X_df).astype(str)).mean())
+        max_diff = float(np.abs(outputs[1] - model.predict_proba(X_df)).max())
+        ok = max_diff <= tol
+        report = f"acuerdo de etiquetas {agreement:.4%}, máx. dif. probabilidades {max_diff:.2e}"
+    else:
+        expected = np.asarray(model.predict(X_df)).reshape(len(X), -1)
+        max_diff = float(np.abs(outputs[0].reshape(len(X), -1) - expected).max())
+        ok = max_diff <= tol
+        report = f"máx. dif. absoluta {max_diff:.2e}"
+
+    old_size = os.path.getsize(pkl_path) / (1024 * 1024)
+    new_size = os.path.getsize(onnx_path) / (1024 * 1024)
+    print(f"Exportado: {os.path.basename(onnx_path)} ({old_size:.1f} MB .pkl → {new_size:.1f} MB .onnx)")
+    print(f"Validación ({len(X)} filas): {'OK' if ok else 'FALLA'} — {report}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta riasec_model.pkl y ocean_model.pkl a ONNX.")
+    parser.add_argument("models", nargs="*", default=["riasec_model.pkl", "ocean_model.pkl"])
+    parser.add_argument("--models-dir", default=os.path.join(os.getcwd(), "models"))
+    parser.add_argument("--tol", type=float, default=1e-4,
+                        help="diferencia máxima tolerada frente a sklearn (float32 en ONNX)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.models_dir):
+        print("No se encontró la carpeta 'models' en el proyecto.")
+        return
+
+    ok = True
+    for f in args.models:
+        ok = export_model(os.path.join(args.models_dir, f), args.tol) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
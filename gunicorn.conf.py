@@ -0,0 +1,63 @@
+import gc
+import os
+
+# ==========================
+# Configuración de gunicorn
+# ==========================
+# Uso: gunicorn -c gunicorn.conf.py src.inference.api:app
+#
+# Con PRELOAD_MODELS=1 (por defecto) la app y los modelos se cargan una sola
+# vez en el proceso master. Luego se congela el heap (gc.freeze) y se crean
+# los workers con fork: comparten las páginas de los modelos (copy-on-write)
+# en lugar de tener cada uno su propia copia. El GC de los workers ya no
+# recorre los objetos congelados, así que no ensucia esas páginas.
+#
+# Para dimensionar WEB_CONCURRENCY con el mismo presupuesto de RAM:
+#   python -m src.inference.memory_report --budget-mb 512
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+preload_app = os.getenv("PRELOAD_MODELS", "1") == "1"
+
+
+def when_ready(server):
+    """Master listo, antes de crear workers: aprovisiona, carga, calienta y congela los modelos."""
+    if not preload_app:
+        return
+    from src.inference.api import ensure_models, log_memory_usage
+    from src.inference.provisioning import warm_up
+
+    # Sin GC mientras se cargan los modelos: evita huecos en el heap que luego
+    # se llenarían en los workers y copiarían páginas. Al terminar se congela
+    # lo cargado y el GC vuelve a quedar activo (en el master y, por fork, en
+    # los workers).
+    gc.disable()
+    try:
+        ensure_models()
+        try:
+            warm_up()
+        except Exception as e:
+            server.log.warning(f"[WARN] No se pudo precargar ni calentar el pipeline en el master: {e}")
+        log_memory_usage()
+        # Lo cargado aquí es compartido por todos los workers: nunca se desaloja en ellos
+        from src.inference.recommendation_pipeline import registry
+        registry.mark_shared()
+    finally:
+        gc.freeze()
+        gc.enable()
+    server.log.info(f"[PRELOAD] {gc.get_freeze_count():,} objetos congelados antes del fork")
+
+
+def post_fork(server, worker):
+    """En cada worker: descartar lo que no sobrevive a fork."""
+    if not preload_app:
+        return
+
+    # Las sesiones de onnxruntime tienen pools de hilos que no se copian con
+    # fork; cada worker abre las suyas en su evento de startup (warm_up()).
+    from src.inference.recommendation_pipeline import registry
+    for key in registry.keys():
+        if key.endswith(".onnx"):
+            registry.evict(key, include_shared=True)
@@ -0,0 +1,162 @@
+import os
+import json
+import pickle
+from collections import namedtuple
+
+from src.inference.model_registry import file_sha256
+
+# ==========================
+# Índice de afinidad precompilado
+# ==========================
+# Se construye una sola vez a partir de riasec_affinity.json (o al cambiar el
+# archivo) y resuelve cada letra RIASEC y cada subperfil (tras ALIAS_MAP)
+# directamente a una tupla inmutable de carreras: búsqueda O(1) sin I/O.
+# Junto al JSON se guarda una caché binaria (pickle) validada por sha256,
+# que un worker reiniciado carga más rápido que volver a parsear el JSON.
+
+INDEX_FORMAT_VERSION = 2
+
+# riasec / ocean: perfil opcional de la carrera si el JSON lo trae
+# ({"R": .., ..} o lista de 6; {"O": .., ..} o lista de 5), si no None.
+CareerEntry = namedtuple("CareerEntry", ["carrera", "universidades", "riasec", "ocean"])
+
+RIASEC_LETTERS = ["R", "I", "A", "S", "E", "C"]
+OCEAN_TRAITS = ["O", "C", "E", "A", "N"]
+
+# Subperfiles RIASEC-Perú según las dos letras dominantes
+SUBPROFILES = {
+    "R": {"C": "R-Tech", "E": "R-Ind", "A": "R-Build", "S": "R-Agro", "I": "R-Geo"},
+    "I": {"R": "I-Tech", "A": "I-Science", "S": "I-Health", "C": "I-Analytic", "E": "I-Economic"},
+    "A": {"S": "A-ComunicaciónVisual", "E": "A-Diseño", "I": "A-ArtesEscénicas",
+          "R": "A-ArtesPlásticas", "C": "A-PatrimonioCultural"},
+    "S": {"E": "S-Comunitario", "I": "S-Psicológico", "A": "S-Educativo",
+          "C": "S-Salud", "R": "S-DeporteYRecreación"},
+    "E": {"C": "E-Negocios", "A": "E-MarketingYComercio", "S": "E-DerechoYGestiónPública",
+          "I": "E-EmpresarialTecnológico", "R": "E-EmpresarialIndustrial"},
+    "C": {"R": "C-Informático", "E": "C-ContableFinanciero", "S": "C-Administrativo",
+          "I": "C-EstadísticoAnalítico", "A": "C-Ofimático"},
+}
+
+ALIAS_MAP = {
+    "R-Tech": "R-Tech", "R-Ind": "R-Ind", "R-Build": "R-Build", "R-Geo": "R-Geo", "R-Agro": "R-Agro",
+    "I-Science": "I-Científico", "I-Health": "I-Médico", "I-Analytic": "I-Analítico", "I-Tech": "I-Tecnológico",
+    "A-Diseño": "A-Diseño", "A-ComunicaciónVisual": "A-ComunicaciónVisual", "A-ArtesEscénicas": "A-ArtesEscénicas",
+    "S-Comunitario": "S-Comunitario", "S-Educativo": "S-Educativo", "S-Salud": "S-Salud",
+    "E-Negocios": "E-Negocios", "E-MarketingYComercio": "E-MarketingYComercio",
+    "C-Informático": "C-Informático", "C-ContableFinanciero": "C-ContableFinanciero",
+}
+
+_EMPTY = ()
+
+
+def _profile(value, keys):
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return tuple(float(value.get(k, 0.0)) for k in keys)
+    return tuple(float(v) for v in value)
+
+
+def _to_entry(item):
+    """Acepta entradas {"carrera", "universidades", ...} o nombres sueltos (formato O*NET)."""
+    if isinstance(item, dict):
+        return CareerEntry(
+            item.get("carrera"),
+            tuple(item.get("universidades", [])),
+            _profile(item.get("riasec"), RIASEC_LETTERS),
+            _profile(item.get("ocean"), OCEAN_TRAITS),
+        )
+    return CareerEntry(str(item), _EMPTY, None, None)
+
+
+def resolve_label(by_sub, by_letter, riasec_label, sub_label, empty=_EMPTY):
+    """Subperfil si tiene sub-bloque propio; si la etiqueta es solo una letra, toda la letra."""
+    found = by_sub.get(sub_label)
+    if found is not None:
+        return found
+    if "-" in sub_label:
+        return empty
+    return by_letter.get(riasec_label, empty)
+
+
+class AffinityIndex:
+    """Carreras por letra RIASEC y por subperfil, listas para consultar."""
+
+    def __init__(self, by_letter, by_sub):
+        self.by_letter = by_letter  # "R" -> tuple[CareerEntry]
+        self.by_sub = by_sub        # "I-Health" / "I-Médico" -> tuple[CareerEntry]
+
+    @classmethod
+    def from_dict(cls, riasec_affinity):
+        by_letter, by_sub = {}, {}
+        for letter, block in riasec_affinity.items():
+            if isinstance(block, dict):
+                collected = []
+                for sub_label, items in block.items():
+                    entries = tuple(_to_entry(i) for i in items)
+                    collected.extend(entries)
+                    # Igual que antes: el subperfil solo cuenta bajo su letra base
+                    if "-" in sub_label and sub_label.split("-", 1)[0] == letter:
+                        by_sub[sub_label] = entries
+                by_letter[letter] = tuple(collected)
+            else:
+                by_letter[letter] = tuple(_to_entry(i) for i in block)
+
+        # Resolver los alias una sola vez
+        for alias, target in ALIAS_MAP.items():
+            by_sub[alias] = by_sub.get(target, _EMPTY)
+        return cls(by_letter, by_sub)
+
+    def careers(self, riasec_label, sub_label):
+        """Carreras afines al subperfil o, si no tiene sub-bloque, a toda la letra."""
+        return resolve_label(self.by_sub, self.by_letter, riasec_label, sub_label)
+
+    def targets(self, label):
+        """Nombres de carrera asociados a una letra o subperfil."""
+        entries = self.by_letter.get(label)
+        if entries is None:
+            entries = self.by_sub.get(label, _EMPTY)
+        return tuple(e.carrera for e in entries)
+
+    @property
+    def nbytes(self):
+        # Estimación para el presupuesto del registro de modelos
+        n = sum(len(v) for v in self.by_letter.values())
+        return n * 200 + 4096
+
+
+def cache_path(json_path):
+    return os.path.splitext(json_path)[0] + ".idx"
+
+
+def load_affinity_index(json_path):
+    """
+    Carga el índice desde la caché binaria si corresponde al JSON actual;
+    si no, lo construye desde el JSON y regenera la caché.
+    """
+    sha = file_sha256(json_path)
+    idx_path = cache_path(json_path)
+
+    if os.path.exists(idx_path):
+        try:
+            with open(idx_path, "rb") as f:
+                version, cached_sha, by_letter, by_sub = pickle.load(f)
+            if version == INDEX_FORMAT_VERSION and cached_sha == sha:
+                return AffinityIndex(by_letter, by_sub)
+        except Exception as e:
+            print(f"[WARN] Caché de afinidad inválida, se reconstruye: {e}")
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        index = AffinityIndex.from_dict(json.load(f))
+
+    try:
+        tmp_path = idx_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                (INDEX_FORMAT_VERSION, sha, index.by_letter, index.by_sub),
+                f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(tmp_path, idx_path)
+    except OSError as e:
+        print(f"[WARN] No se pudo escribir la caché de afinidad: {e}")
+    return index
@@ -1,11 +1,16 @@
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse, JSONResponse
-from pydantic import BaseModel
-from src.inference.recommendation_pipeline import recommend_career
-import gc
-import psutil
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import RedirectResponse, JSONResponse, PlainTextResponse
+from pydantic import ValidationError
+from src.inference.schemas import UserInput, BatchInput
+from src.inference.recommendation_pipeline import cached_recommend_career, cached_recommend_career_batch, registry, MODELS_DIR
+from src.inference.micro_batcher import MicroBatcher
+from src.inference.executor import Overloaded, executor_from_env
+from src.inference.memory_governor import governor_from_env
+from src.inference.provisioning import provision, warm_up
+from src.inference import metrics
 import os
-import gdown
+import time
 
 # ==========================
 # API FastAPI
@@ -21,46 +26,106 @@ app = FastAPI(
 )
 
 # ==========================
-# Modelo de entrada
+# Modelo de entrada (ver src/inference/schemas.py)
 # ==========================
 
-class UserInput(BaseModel):
-    riasec: list  # 6, 18 o más ítems del test RIASEC
-    ocean: list   # 20 ítems del test OCEAN (Big Five)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Micro-batching opcional de /predict (MICROBATCH=1): agrupa las peticiones
+# que llegan dentro de MICROBATCH_WINDOW_MS o hasta MICROBATCH_MAX filas.
+batcher = None
+if os.getenv("MICROBATCH", "0") == "1":
+    batcher = MicroBatcher(
+        cached_recommend_career_batch,
+        window_ms=float(os.getenv("MICROBATCH_WINDOW_MS", "5")),
+        max_batch=int(os.getenv("MICROBATCH_MAX", "32")),
+    )
+
+# Inferencia fuera del event loop: pool acotado de hilos o procesos
+# (INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_MAX_PENDING). Con la cola
+# llena se responde 503 + Retry-After.
+executor = executor_from_env()
+
+# Gobernador de memoria: GC, desalojo de modelos y 503 solo al cruzar las
+# marcas MEMORY_SOFT_MB / MEMORY_HARD_MB (en lugar de gc.collect() por request).
+governor = governor_from_env(registry)
 
 # ==========================
 # Funciones auxiliares
 # ==========================
 
 def log_memory_usage():
-    """Muestra cuánta memoria usa el proceso (para debugging en Render)."""
-    process = psutil.Process()
-    mem_mb = process.memory_info().rss / 1024 / 1024
+    """Muestra cuánta memoria usa el proceso (solo al iniciar; en runtime ver /metrics)."""
+    mem_mb = metrics.rss_bytes() / 1024 / 1024
     print(f"[DEBUG] Memoria usada: {mem_mb:.2f} MB")
 
 
-def ensure_models():
-    """Descarga los modelos una sola vez al iniciar el contenedor, si no existen."""
-    MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
-    os.makedirs(MODELS_DIR, exist_ok=True)
-
-    FILES = {
-        "riasec_model.pkl": os.getenv("RIASEC_URL"),
-        "ocean_model.pkl": os.getenv("OCEAN_URL"),
-        "riasec_affinity.json": os.getenv("AFFINITY_URL"),
+def _service_gauges():
+    """Gauges del registro de modelos y del micro-batcher para /metrics."""
+    yield "career_models_resident_bytes", {}, registry.resident_bytes(), "Memoria estimada de artefactos residentes"
+    for event, n in registry.stats.items():
+        yield "career_model_registry_events", {"event": event}, n, "Eventos del registro de modelos"
+    yield "career_executor_in_flight", {}, executor.in_flight(), "Trabajos admitidos en el ejecutor (cola + ejecución)"
+    if batcher is not None:
+        yield "career_microbatch_queue_depth", {}, batcher.stats()["queue_depth"], "Peticiones esperando lote"
+
+
+metrics.GaugeCollector(_service_gauges)
+
+
+def public_result(result):
+    """Campos del resultado del pipeline que se exponen en la respuesta."""
+    return {
+        "riasec": result["riasec"],
+        "subperfil": result["subperfil"],
+        "ocean_vector": result["ocean_vector"],
+        "recomendaciones": result["recomendaciones"]
     }
 
-    for fname, url in FILES.items():
-        dest = os.path.join(MODELS_DIR, fname)
-        if not os.path.exists(dest) and url:
-            try:
-                print(f"Descargando {fname} desde {url} ...")
-                gdown.download(url, dest, quiet=False)
-                print(f"{fname} listo en {dest}")
-            except Exception as e:
-                print(f"No se pudo descargar {fname}: {e}")
-        else:
-            print(f"✔️ {fname} ya existe, no se descarga nuevamente.")
+
+def validation_message(errors):
+    """Errores de pydantic en una línea legible: 'riasec: ...; ocean: ...'."""
+    parts = []
+    for err in errors:
+        loc = ".".join(str(x) for x in err["loc"] if x != "body")
+        parts.append(f"{loc}: {err['msg'].removeprefix('Value error, ')}")
+    return "; ".join(parts)
+
+
+def overloaded_response(e, endpoint):
+    """503 con Retry-After cuando el ejecutor o el gobernador de memoria no admiten más trabajo."""
+    print(f"[WARN] {endpoint} rechazado: {e}")
+    metrics.REQUESTS.inc(endpoint, "rejected")
+    return JSONResponse(
+        content={"status": "error", "message": str(e)},
+        media_type="application/json; charset=utf-8",
+        status_code=503,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def predict_sync(riasec_features, ocean_items):
+    """Trabajo de CPU de /predict; corre dentro del ejecutor."""
+    return cached_recommend_career(riasec_features=riasec_features, ocean_items=ocean_items, top_n=3)
+
+
+def predict_batch_sync(riasec_batch, ocean_batch):
+    """Trabajo de CPU de /predict/batch; corre dentro del ejecutor."""
+    return cached_recommend_career_batch(riasec_batch=riasec_batch, ocean_batch=ocean_batch, top_n=3)
+
+
+_provisioned = None
+
+
+def ensure_models():
+    """
+    Descarga y verifica los artefactos del manifiesto (ver src.inference.provisioning).
+    Una vez por proceso: los workers de gunicorn heredan el resultado del master.
+    """
+    global _provisioned
+    if _provisioned is None:
+        _provisioned = provision(MODELS_DIR)
+    return _provisioned
 
 
 # ==========================
@@ -72,14 +137,38 @@ def startup_event():
     """Se ejecuta al iniciar el contenedor en Render."""
     print("Iniciando servidor FastAPI y verificando modelos...")
     ensure_models()
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"[WARN] No se pudo precargar ni calentar el pipeline: {e}")
     log_memory_usage()
+    if governor is not None:
+        governor.start()
     print("Modelos verificados. Servidor listo para recibir peticiones.")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    if governor is not None:
+        governor.stop()
+    executor.shutdown()
+
+
 # ==========================
 # Endpoints principales
 # ==========================
 
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Entrada inválida: 422 con el mismo formato de error que el resto de la API."""
+    metrics.REQUESTS.inc(request.url.path, "invalid")
+    return JSONResponse(
+        content={"status": "error", "message": validation_message(exc.errors())},
+        media_type="application/json; charset=utf-8",
+        status_code=422
+    )
+
+
 @app.get("/")
 def root():
     """Redirige automáticamente a la documentación interactiva (Swagger)."""
@@ -87,45 +176,138 @@ def root():
 
 
 @app.post("/predict")
-def predict(input: UserInput):
+async def predict(input: UserInput):
     """
     Recibe los puntajes RIASEC y OCEAN y devuelve recomendaciones de carrera.
     Optimizado para Render Free Tier (512 MB).
     """
+    started = time.perf_counter()
     try:
-        # Ejecutar pipeline híbrido secuencial
-        result = recommend_career(
-            riasec_features=input.riasec,
-            ocean_items=input.ocean,
-            top_n=3
+        if governor is not None:
+            governor.check()
+
+        # Ejecutar pipeline híbrido fuera del event loop (agrupado con otras
+        # peticiones si hay batcher; el límite de la cola aplica igual)
+        riasec, ocean = input.arrays()
+        if batcher is not None:
+            result = await executor.admit(
+                "/predict",
+                lambda: batcher.submit_future(riasec_features=riasec, ocean_items=ocean, top_n=3)
+            )
+        else:
+            result = await executor.run("/predict", predict_sync, riasec, ocean)
+
+        # Respuesta JSON
+        with metrics.stage("serialization"):
+            response = JSONResponse(
+                content={
+                    "status": "ok",
+                    "result": public_result(result)
+                },
+                media_type="application/json; charset=utf-8"
+            )
+        metrics.REQUESTS.inc("/predict", "ok")
+        return response
+
+    except Overloaded as e:
+        return overloaded_response(e, "/predict")
+
+    except Exception as e:
+        print(f"[ERROR] Falló /predict: {e}")
+        metrics.REQUESTS.inc("/predict", "error")
+
+        return JSONResponse(
+            content={"status": "error", "message": str(e)},
+            media_type="application/json; charset=utf-8",
+            status_code=500
         )
 
-        # Log de uso de memoria
-        log_memory_usage()
+    finally:
+        metrics.REQUEST_SECONDS.labels("/predict").observe(time.perf_counter() - started)
 
-        # Limpieza de memoria tras cada request
-        gc.collect()
 
-        # Respuesta JSON
+@app.post("/predict/batch")
+async def predict_batch(input: BatchInput):
+    """
+    Recibe N conjuntos de respuestas (p. ej. una promoción completa) y los
+    evalúa con una sola predicción por modelo. Los resultados respetan el
+    orden de entrada; un ítem inválido se reporta sin fallar todo el lote.
+    """
+    if len(input.items) > MAX_BATCH_SIZE:
         return JSONResponse(
-            content={
-                "status": "ok",
-                "result": {
-                    "riasec": result["riasec"],
-                    "subperfil": result["subperfil"],
-                    "ocean_vector": result["ocean_vector"],
-                    "recomendaciones": result["recomendaciones"]
-                }
-            },
-            media_type="application/json; charset=utf-8"
+            content={"status": "error", "message": f"El lote supera el máximo de {MAX_BATCH_SIZE} ítems"},
+            media_type="application/json; charset=utf-8",
+            status_code=413
         )
 
+    started = time.perf_counter()
+    try:
+        if governor is not None:
+            governor.check()
+
+        # Validación por ítem antes de cualquier trabajo de modelo
+        results = [None] * len(input.items)
+        valid, riasec_batch, ocean_batch = [], [], []
+        for i, raw in enumerate(input.items):
+            try:
+                riasec, ocean = UserInput.model_validate(raw).arrays()
+            except ValidationError as e:
+                results[i] = {"error": validation_message(e.errors())}
+                continue
+            valid.append(i)
+            riasec_batch.append(riasec)
+            ocean_batch.append(ocean)
+
+        if valid:
+            computed = await executor.run("/predict/batch", predict_batch_sync, riasec_batch, ocean_batch)
+            for i, result in zip(valid, computed):
+                results[i] = result
+
+        with metrics.stage("batch_serialization"):
+            items = [
+                {"status": "error", "message": r["error"]} if "error" in r
+                else {"status": "ok", "result": public_result(r)}
+                for r in results
+            ]
+            n_errors = sum(1 for item in items if item["status"] == "error")
+            response = JSONResponse(
+                content={
+                    "status": "ok",
+                    "n_ok": len(items) - n_errors,
+                    "n_error": n_errors,
+                    "results": items
+                },
+                media_type="application/json; charset=utf-8"
+            )
+        metrics.REQUESTS.inc("/predict/batch", "ok")
+        return response
+
+    except Overloaded as e:
+        return overloaded_response(e, "/predict/batch")
+
     except Exception as e:
-        gc.collect()  # limpieza en caso de excepción
-        print(f"[ERROR] Falló /predict: {e}")
+        print(f"[ERROR] Falló /predict/batch: {e}")
+        metrics.REQUESTS.inc("/predict/batch", "error")
 
         return JSONResponse(
             content={"status": "error", "message": str(e)},
             media_type="application/json; charset=utf-8",
             status_code=500
         )
+
+    finally:
+        metrics.REQUEST_SECONDS.labels("/predict/batch").observe(time.perf_counter() - started)
+
+
+@app.get("/predict/batching")
+def batching_stats():
+    """Métricas del micro-batching: profundidad de cola, tamaño de lote y espera."""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Latencia por etapa, memoria y GC en formato de texto Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
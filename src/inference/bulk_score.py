@@ -0,0 +1,392 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from src.inference.inference_core import OCEAN_ITEMS
+from src.inference.affinity_index import RIASEC_LETTERS
+
+# ==========================
+# Puntuación masiva de archivos de cohortes (CSV / Excel)
+# ==========================
+# Lee el archivo por bloques (--chunk-size filas), puntúa cada bloque con una
+# sola llamada vectorizada (recommend_career_batch) en un pool de procesos y
+# escribe los resultados en orden a medida que terminan, con memoria acotada:
+# como mucho 2 bloques por proceso en vuelo.
+#
+# Columnas de entrada:
+#   RIASEC: R,I,A,S,E,C (puntajes) o R1..R8,...,C8 (48 ítems) o R1..R3,...,C3 (18 ítems)
+#   OCEAN:  EXT1..EXT4, AGR1..AGR4, CSN1..CSN4, EST1..EST4, OPN1..OPN4
+#   Identificador opcional: --id-column (por defecto "id" si existe; si no, n.º de fila)
+#
+# Salida según la extensión: .csv, .jsonl o .parquet (carpeta con una parte
+# por bloque; requiere pyarrow). Se puede reanudar: <salida>.progress.json
+# guarda los bloques terminados; al relanzar el mismo comando se continúa
+# desde ahí (--overwrite empieza de cero).
+#
+# Uso:
+#   python -m src.inference.bulk_score cohorte.xlsx resultados.csv --workers 4
+#   python -m src.inference.bulk_score cohorte.csv resultados.parquet --chunk-size 5000
+
+RIASEC_FORMS = {
+    "scores": list(RIASEC_LETTERS),
+    "items48": [f"{c}{i}" for c in RIASEC_LETTERS for i in range(1, 9)],
+    "items18": [f"{c}{i}" for c in RIASEC_LETTERS for i in range(1, 4)],
+}
+OCEAN_TRAITS = ["O", "C", "E", "A", "N"]
+OUTPUT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+
+# ==========================
+# Lectura por bloques
+# ==========================
+
+def read_chunks(path, chunk_size):
+    """Genera (columnas, filas) por bloque; filas = listas de valores crudos."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else "" for c in next(rows)]
+            chunk = []
+            for row in rows:
+                chunk.append(list(row))
+                if len(chunk) == chunk_size:
+                    yield header, chunk
+                    chunk = []
+            if chunk:
+                yield header, chunk
+        finally:
+            wb.close()
+    else:
+        import pandas as pd
+        with open(path, "r", encoding="utf-8") as f:
+            sep = "\t" if "\t" in f.readline() else ","
+        for df in pd.read_csv(path, sep=sep, chunksize=chunk_size):
+            df.columns = [str(c).strip() for c in df.columns]
+            yield list(df.columns), df.values.tolist()
+
+
+def resolve_columns(header, id_column=None):
+    """Índices de id, RIASEC y OCEAN en el encabezado."""
+    position = {name: i for i, name in enumerate(header)}
+    for form, cols in RIASEC_FORMS.items():
+        if all(c in position for c in cols):
+            riasec_idx = [position[c] for c in cols]
+            break
+    else:
+        raise ValueError("No se encontraron columnas RIASEC (R..C, R1..C8 o R1..C3)")
+    missing = [c for c in OCEAN_ITEMS if c not in position]
+    if missing:
+        raise ValueError(f"Faltan columnas OCEAN: {', '.join(missing)}")
+    id_column = id_column or ("id" if "id" in position else None)
+    if id_column is not None and id_column not in position:
+        raise ValueError(f"No existe la columna de id '{id_column}'")
+    return {
+        "form": form,
+        "id": position.get(id_column) if id_column else None,
+        "riasec": riasec_idx,
+        "ocean": [position[c] for c in OCEAN_ITEMS],
+    }
+
+
+# ==========================
+# Trabajo de cada proceso
+# ==========================
+
+def _init_worker():
+    from src.inference.recommendation_pipeline import preload
+    preload()
+
+
+def _flat_record(row_id, result, top_n):
+    record = {"id": row_id, "status": "ok", "riasec": result["riasec"], "subperfil": result["subperfil"]}
+    for trait in result["ocean_vector"]:
+        record[trait["trait"]] = trait["value"]
+    for k in range(top_n):
+        rec = result["recomendaciones"][k] if k < len(result["recomendaciones"]) else None
+        record[f"carrera_{k + 1}"] = rec["carrera"] if rec else None
+        record[f"score_{k + 1}"] = rec["score"] if rec else None
+        record[f"universidades_{k + 1}"] = "; ".join(rec["universidades"]) if rec else None
+    record["error"] = None
+    return record
+
+
+def score_chunk(chunk_index, first_row, rows, columns, top_n, weight_riasec, weight_ocean):
+    """Valida y puntúa un bloque; devuelve (chunk_index, registros)."""
+    from pydantic import ValidationError
+    from src.inference.schemas import UserInput
+    from src.inference.recommendation_pipeline import recommend_career_batch
+
+    records = [None] * len(rows)
+    valid, riasec_batch, ocean_batch = [], [], []
+    for pos, row in enumerate(rows):
+        row_id = row[columns["id"]] if columns["id"] is not None else first_row + pos
+        try:
+            item = UserInput(
+                riasec=[row[i] for i in columns["riasec"]],
+                ocean=[row[i] for i in columns["ocean"]],
+            )
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            records[pos] = {"id": row_id, "status": "error", "error": message}
+            continue
+        riasec, ocean = item.arrays()
+        valid.append((pos, row_id))
+        riasec_batch.append(riasec)
+        ocean_batch.append(ocean)
+
+    if valid:
+        results = recommend_career_batch(riasec_batch, ocean_batch, top_n, weight_riasec, weight_ocean)
+        for (pos, row_id), result in zip(valid, results):
+            if "error" in result:
+                records[pos] = {"id": row_id, "status": "error", "error": result["error"]}
+            else:
+                records[pos] = _flat_record(row_id, result, top_n)
+    return chunk_index, records
+
+
+# ==========================
+# Escritura incremental y reanudación
+# ==========================
+
+def output_columns(top_n):
+    cols = ["id", "status", "riasec", "subperfil"] + OCEAN_TRAITS
+    for k in range(1, top_n + 1):
+        cols += [f"carrera_{k}", f"score_{k}", f"universidades_{k}"]
+    return cols + ["error"]
+
+
+class ResultWriter:
+    """Escribe bloques en orden; CSV/JSONL por append, Parquet una parte por bloque."""
+
+    def __init__(self, path, top_n, resume_offset=None):
+        self.path = path
+        self.columns = output_columns(top_n)
+        self.format = OUTPUT_FORMATS[os.path.splitext(path)[1].lower()]
+        if self.format == "parquet":
+            import pyarrow as pa
+            # Esquema fijo: un bloque con solo errores no debe cambiar los tipos
+            self._schema = pa.schema(
+                [(c, pa.float64() if c in OCEAN_TRAITS or c.startswith("score_") else pa.string())
+                 for c in self.columns]
+            )
+            os.makedirs(path, exist_ok=True)
+            self._file = None
+        else:
+            self._file = open(path, "a+b")
+            if resume_offset is not None:
+                self._file.truncate(resume_offset)  # descarta un bloque escrito a medias
+            self._file.seek(0, os.SEEK_END)
+            if self.format == "csv" and self._file.tell() == 0:
+                self._write_csv_rows([dict(zip(self.columns, self.columns))])
+
+    def _write_csv_rows(self, records):
+        import csv
+        import io
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=self.columns, extrasaction="ignore", lineterminator="\n")
+        writer.writerows(records)
+        self._file.write(buf.getvalue().encode("utf-8"))
+
+    def write(self, chunk_index, records):
+        """Escribe un bloque completo y devuelve el offset en bytes (o None en Parquet)."""
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            rows = [{c: r.get(c) for c in self.columns} for r in records]
+            for row in rows:
+                row["id"] = str(row["id"])
+            table = pa.Table.from_pylist(rows, schema=self._schema)
+            part = os.path.join(self.path, f"part-{chunk_index:06d}.parquet")
+            pq.write_table(table, part + ".tmp")
+            os.replace(part + ".tmp", part)
+            return None
+        if self.format == "csv":
+            self._write_csv_rows(records)
+        else:
+            lines = "".join(json.dumps({c: r.get(c) for c in self.columns}, ensure_ascii=False) + "\n" for r in records)
+            self._file.write(lines.encode("utf-8"))
+        return self.offset()
+
+    def offset(self):
+        """Bytes ya escritos y sincronizados a disco (None en Parquet)."""
+        if self._file is None:
+            return None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def input_signature(path):
+    st = os.stat(path)
+    return {"input": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_progress(progress_path, signature, chunk_size, top_n):
+    """Progreso previo compatible con esta corrida, o None."""
+    if not os.path.exists(progress_path):
+        return None
+    with open(progress_path, "r", encoding="utf-8") as f:
+        progress = json.load(f)
+    if progress.get("signature") != signature or progress.get("chunk_size") != chunk_size \
+            or progress.get("top_n") != top_n:
+        raise SystemExit(
+            f"{progress_path} corresponde a otra entrada o configuración; usa --overwrite para empezar de cero"
+        )
+    return progress
+
+
+def save_progress(progress_path, progress):
+    tmp = progress_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+    os.replace(tmp, progress_path)
+
+
+def peak_rss_mb():
+    """Pico de RSS del proceso principal y del mayor proceso hijo ya terminado (MB)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+# ==========================
+# CLI
+# ==========================
+
+def run(args):
+    out_path = args.output.rstrip("/")
+    progress_path = out_path + ".progress.json"
+    if args.overwrite:
+        import shutil
+        if os.path.isdir(out_path):
+            shutil.rmtree(out_path)
+        elif os.path.exists(out_path):
+            os.remove(out_path)
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
+    signature = input_signature(args.input)
+    progress = load_progress(progress_path, signature, args.chunk_size, args.top_n)
+    chunks_done = progress["chunks_done"] if progress else 0
+    rows_done = progress["rows_done"] if progress else 0
+    if progress:
+        print(f"[RESUME] Continuando desde el bloque {chunks_done} ({rows_done:,} filas ya puntuadas)")
+    elif os.path.exists(out_path):
+        raise SystemExit(f"{out_path} ya existe y no hay progreso que reanudar; usa --overwrite")
+
+    writer = ResultWriter(out_path, args.top_n, progress["bytes"] if progress else None)
+    stats = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+    rows_this_run = 0
+
+    def checkpoint(offset):
+        save_progress(progress_path, {
+            "signature": signature, "chunk_size": args.chunk_size, "top_n": args.top_n,
+            "chunks_done": chunks_done, "rows_done": rows_done, "bytes": offset,
+        })
+
+    def commit(chunk_index, records):
+        nonlocal chunks_done, rows_done, rows_this_run
+        offset = writer.write(chunk_index, records)
+        chunks_done += 1
+        rows_done += len(records)
+        rows_this_run += len(records)
+        for r in records:
+            stats[r["status"]] += 1
+        checkpoint(offset)
+        elapsed = time.perf_counter() - started
+        print(f"[CHUNK] {chunks_done} bloques, {rows_done:,} filas ({rows_this_run / max(elapsed, 1e-9):,.0f} filas/s)")
+
+    checkpoint(writer.offset())  # la salida ya existe: desde aquí siempre se puede reanudar
+    columns = None
+    weights = (args.weight_riasec, args.weight_ocean)
+    chunks = read_chunks(args.input, args.chunk_size)
+
+    # Modelos cargados antes del fork: los workers los heredan (copy-on-write)
+    _init_worker()
+    if args.workers <= 1:
+        for index, (header, rows) in enumerate(chunks):
+            if index < chunks_done:
+                continue
+            columns = columns or resolve_columns(header, args.id_column)
+            commit(*score_chunk(index, index * args.chunk_size, rows, columns, args.top_n, *weights))
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+        # Los bloques se escriben en orden: siempre se espera el más antiguo en vuelo
+        pending = {}
+        next_to_write = chunks_done
+        max_in_flight = 2 * args.workers
+        try:
+            for index, (header, rows) in enumerate(chunks):
+                if index < chunks_done:
+                    continue
+                columns = columns or resolve_columns(header, args.id_column)
+                pending[index] = pool.submit(
+                    score_chunk, index, index * args.chunk_size, rows, columns, args.top_n, *weights
+                )
+                # Memoria acotada: escribir el bloque más antiguo si hay demasiados en vuelo
+                if len(pending) >= max_in_flight:
+                    commit(*pending.pop(next_to_write).result())
+                    next_to_write += 1
+            while pending:
+                commit(*pending.pop(next_to_write).result())
+                next_to_write += 1
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    writer.close()
+
+    elapsed = time.perf_counter() - started
+    own, children = peak_rss_mb()
+    print(f"\nFilas puntuadas en esta corrida: {rows_this_run:,} ({stats['ok']:,} ok, {stats['error']:,} con error)")
+    print(f"Tiempo: {elapsed:.1f} s | Throughput: {rows_this_run / max(elapsed, 1e-9):,.0f} filas/s")
+    print(f"Pico de RSS: {own:.0f} MB proceso principal, {children:.0f} MB mayor worker")
+    print(f"Resultados en {out_path}")
+    os.remove(progress_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puntúa un archivo de cohorte (CSV/Excel) sin pasar por la API.")
+    parser.add_argument("input", help="archivo .csv/.tsv o .xlsx")
+    parser.add_argument("output", help="salida .csv, .jsonl o .parquet")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos (1 = sin pool)")
+    parser.add_argument("--id-column", default=None)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--weight-riasec", type=float, default=1.2)
+    parser.add_argument("--weight-ocean", type=float, default=0.2)
+    parser.add_argument("--overwrite", action="store_true", help="ignora el progreso previo y reescribe la salida")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"No existe el archivo de entrada: {args.input}")
+        sys.exit(1)
+    fmt = OUTPUT_FORMATS.get(os.path.splitext(args.output.rstrip("/"))[1].lower())
+    if fmt is None:
+        print("La salida debe terminar en .csv, .jsonl o .parquet")
+        sys.exit(1)
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("La salida .parquet requiere pyarrow (pip install pyarrow); usa .csv o .jsonl")
+            sys.exit(1)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+
+from src.inference.affinity_index import load_affinity_index
+
+# ==========================
+# Matching fuzzy vectorizado de carreras
+# ==========================
+# Los objetivos de cada etiqueta RIASEC se normalizan una sola vez al construir
+# el matcher. Las consultas nuevas se puntúan todas juntas con
+# rapidfuzz.process.cdist (WRatio, varios núcleos) y el mejor puntaje por
+# (carrera, etiqueta) queda en una caché LRU acotada.
+
+
+def normalize(name: str) -> str:
+    """Normaliza nombres de carreras para comparación fuzzy."""
+    return name.lower().split("(")[0].strip()
+
+
+class CareerMatcher:
+    """Decide si una o varias carreras tienen afinidad con una etiqueta RIASEC."""
+
+    def __init__(self, index, cache_size=4096, workers=-1):
+        self.workers = workers
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        labels = set(index.by_letter) | set(index.by_sub)
+        self._targets = {
+            label: [utils.default_process(normalize(t)) for t in index.targets(label) if t]
+            for label in labels
+        }
+
+    def best_scores(self, careers, riasec_label):
+        """Mejor puntaje (0-100) de cada carrera contra los objetivos de la etiqueta."""
+        scores = [None] * len(careers)
+        pending = {}
+        with self._lock:
+            for i, career in enumerate(careers):
+                cached = self._cache.get((career, riasec_label))
+                if cached is None:
+                    pending.setdefault(career, []).append(i)
+                else:
+                    self._cache.move_to_end((career, riasec_label))
+                    scores[i] = cached
+
+        if pending:
+            targets = self._targets.get(riasec_label, [])
+            queries = list(pending)
+            if targets:
+                matrix = process.cdist(
+                    [utils.default_process(normalize(q)) for q in queries],
+                    targets,
+                    scorer=fuzz.WRatio,
+                    dtype=np.uint8,
+                    workers=self.workers,
+                )
+                best = matrix.max(axis=1).tolist()
+            else:
+                best = [0] * len(queries)
+
+            with self._lock:
+                for career, score in zip(queries, best):
+                    for i in pending[career]:
+                        scores[i] = score
+                    self._cache[(career, riasec_label)] = score
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def matches(self, careers, riasec_label, score_cutoff=75):
+        """Lista de booleanos: afinidad de cada carrera con la etiqueta."""
+        return [score >= score_cutoff for score in self.best_scores(careers, riasec_label)]
+
+    def match(self, career, riasec_label, score_cutoff=75):
+        return self.matches([career], riasec_label, score_cutoff)[0]
+
+
+def load_career_matcher(json_path):
+    return CareerMatcher(load_affinity_index(json_path))
@@ -0,0 +1,368 @@
+import os
+import sys
+import json
+import heapq
+import argparse
+
+import numpy as np
+
+from src.inference.mapped_artifact import read_mapped, write_mapped
+
+# ==========================
+# Bosques compactos en NumPy puro
+# ==========================
+# Aplana un RandomForest de sklearn (clasificador, regresor o un
+# MultiOutputRegressor de regresores) en arrays empaquetados:
+#   feature (int16), threshold (float32), left/right (int32), value (float32)
+# y los evalúa para un lote de filas recorriendo todos los árboles a la vez.
+# Para servir no hace falta sklearn: solo numpy y el archivo .forest.npz, o
+# el .forest.map (mapped_artifact: arrays sin comprimir abiertos con
+# np.memmap, carga casi instantánea y páginas compartidas entre procesos).
+#
+# Detalles para mantener paridad con sklearn:
+# - sklearn compara X en float32 contra umbrales float64. El umbral se guarda
+#   como el mayor float32 <= umbral, así `x32 <= t32` equivale a `x32 <= t64`.
+# - Las hojas apuntan a sí mismas (left = right = nodo), de modo que basta con
+#   iterar max_depth pasos sin distinguir hojas de nodos internos.
+
+FOREST_SUFFIX = ".forest.npz"
+MAPPED_SUFFIX = ".forest.map"
+FORMAT_VERSION = 1
+
+
+def _float_floor(values, dtype=np.float32):
+    """Mayor valor de `dtype` (float32 o float16) que no supera cada valor float64."""
+    dtype = np.dtype(dtype).type
+    t = values.astype(dtype)
+    too_big = t.astype(np.float64) > values
+    t[too_big] = np.nextafter(t[too_big], dtype(-np.inf))
+    return t
+
+
+def _node_depths(tree):
+    left, right = tree.children_left, tree.children_right
+    depth = np.zeros(tree.node_count, dtype=np.int64)
+    for node in range(tree.node_count):
+        if left[node] != -1:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return depth
+
+
+def _pruned_nodes(tree, depths, max_depth=None, max_leaves=None):
+    """
+    (nodos que se conservan, cuáles quedan como hoja) al podar el árbol.
+    max_depth: los nodos a esa profundidad pasan a ser hojas (su valor es el
+    promedio de las muestras que llegaron ahí, como en sklearn).
+    max_leaves: expansión best-first por mejora de impureza ponderada, igual
+    que max_leaf_nodes al entrenar.
+    """
+    left, right = tree.children_left, tree.children_right
+    is_leaf = left == -1
+    if max_leaves is None:
+        if max_depth is None:
+            return np.ones(tree.node_count, dtype=bool), is_leaf
+        return depths <= max_depth, is_leaf | (depths == max_depth)
+
+    w, impurity = tree.weighted_n_node_samples, tree.impurity
+    keep = np.zeros(tree.node_count, dtype=bool)
+    leaf = np.zeros(tree.node_count, dtype=bool)
+    frontier = []
+
+    def add(node):
+        keep[node] = True
+        if is_leaf[node] or (max_depth is not None and depths[node] >= max_depth):
+            leaf[node] = True
+        else:
+            l, r = left[node], right[node]
+            gain = w[node] * impurity[node] - w[l] * impurity[l] - w[r] * impurity[r]
+            heapq.heappush(frontier, (-gain, node))
+
+    add(0)
+    n_leaves = 1
+    while frontier and n_leaves < max_leaves:
+        _, node = heapq.heappop(frontier)
+        add(left[node])
+        add(right[node])
+        n_leaves += 1
+    for _, node in frontier:
+        leaf[node] = True
+    return keep, leaf
+
+
+def _leaf_values(tree, kind):
+    """Salida de cada nodo: probabilidades (clasificación) o valores (regresión)."""
+    value = tree.value
+    if kind == "classifier":
+        value = value[:, 0, :]
+        totals = value.sum(axis=1, keepdims=True)
+        return np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+    return value[:, :, 0]
+
+
+def export_forest(model, value_dtype=np.float32, threshold_dtype=np.float32,
+                  n_trees=None, max_depth=None, max_leaves=None):
+    """
+    Convierte un modelo de sklearn entrenado en un CompactForest.
+    Opcionalmente lo compacta: solo los primeros n_trees árboles (por salida
+    en un MultiOutputRegressor), profundidad máxima, hojas máximas por árbol
+    y umbrales/valores en float16.
+    """
+    threshold_dtype = np.dtype(threshold_dtype).type
+    if hasattr(model, "classes_") and hasattr(model, "predict_proba"):
+        kind = "classifier"
+        trees = [(est.tree_, -1) for est in model.estimators_[:n_trees]]
+        classes = [str(c) for c in model.classes_]
+        n_outputs = len(classes)
+        feature_names = getattr(model, "feature_names_in_", None)
+    elif hasattr(model, "estimators_") and hasattr(model.estimators_[0], "estimators_"):
+        # MultiOutputRegressor: un bosque por salida
+        kind = "regressor"
+        trees = [(est.tree_, k) for k, forest in enumerate(model.estimators_)
+                 for est in forest.estimators_[:n_trees]]
+        classes = None
+        n_outputs = len(model.estimators_)
+        feature_names = getattr(model.estimators_[0], "feature_names_in_", None)
+    else:
+        kind = "regressor"
+        trees = [(est.tree_, -1) for est in model.estimators_[:n_trees]]
+        classes = None
+        n_outputs = model.n_outputs_
+        feature_names = getattr(model, "feature_names_in_", None)
+
+    per_tree_output = any(out >= 0 for _, out in trees)
+    width = 1 if per_tree_output else n_outputs
+
+    pruned = []
+    for tree, _ in trees:
+        depths = _node_depths(tree)
+        keep, leaf = _pruned_nodes(tree, depths, max_depth, max_leaves)
+        pruned.append((np.flatnonzero(keep), leaf, depths))
+
+    sizes = [len(nodes) for nodes, _, _ in pruned]
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    total = int(sum(sizes))
+    if total >= np.iinfo(np.int32).max:
+        raise ValueError("El bosque tiene demasiados nodos para índices int32")
+
+    feature = np.zeros(total, dtype=np.int16)
+    threshold = np.zeros(total, dtype=threshold_dtype)
+    left = np.zeros(total, dtype=np.int32)
+    right = np.zeros(total, dtype=np.int32)
+    value = np.zeros((total, width), dtype=value_dtype)
+    depth = 0
+
+    for (tree, out), (nodes, leaf, depths), offset in zip(trees, pruned, offsets):
+        n = len(nodes)
+        sl = slice(offset, offset + n)
+        # Índice nuevo de cada nodo conservado (los árboles sin podar quedan igual)
+        new_id = np.zeros(tree.node_count, dtype=np.int64)
+        new_id[nodes] = np.arange(n)
+        local = np.arange(n)
+        is_leaf = leaf[nodes]
+        feature[sl] = np.where(is_leaf, 0, tree.feature[nodes])
+        threshold[sl] = np.where(is_leaf, threshold_dtype(0), _float_floor(tree.threshold[nodes], threshold_dtype))
+        left[sl] = offset + np.where(is_leaf, local, new_id[tree.children_left[nodes]])
+        right[sl] = offset + np.where(is_leaf, local, new_id[tree.children_right[nodes]])
+        value[sl] = _leaf_values(tree, kind)[nodes].reshape(n, -1)[:, :width]
+        depth = max(depth, int(depths[nodes].max()))
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "n_outputs": n_outputs,
+        "max_depth": depth,
+        "classes": classes,
+        "feature_names": [str(f) for f in feature_names] if feature_names is not None else None,
+    }
+    arrays = {
+        "feature": feature,
+        "threshold": threshold,
+        "left": left,
+        "right": right,
+        "value": value,
+        "roots": offsets.astype(np.int32),
+        "tree_output": np.array([out for _, out in trees], dtype=np.int16),
+    }
+    return CompactForest(arrays, meta)
+
+
+class CompactForest:
+    """Evaluador vectorizado de un bosque empaquetado (API tipo sklearn)."""
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.kind = meta["kind"]
+        self.n_outputs = meta["n_outputs"]
+        self.max_depth = meta["max_depth"]
+        self.classes_ = np.array(meta["classes"]) if meta["classes"] is not None else None
+        names = meta["feature_names"]
+        self.feature_names_in_ = np.array(names, dtype=object) if names is not None else None
+
+        self._feature = arrays["feature"]
+        self._threshold = arrays["threshold"]
+        self._left = arrays["left"]
+        self._right = arrays["right"]
+        self._value = arrays["value"]
+        self._roots = arrays["roots"]
+
+        # Pesos para promediar: por salida si cada árbol aporta a una sola salida
+        tree_output = arrays["tree_output"]
+        if (tree_output >= 0).any():
+            weights = np.zeros((len(tree_output), self.n_outputs), dtype=np.float64)
+            weights[np.arange(len(tree_output)), tree_output] = 1.0
+            self._weights = weights / weights.sum(axis=0, keepdims=True)
+        else:
+            self._weights = None
+
+    @property
+    def n_trees(self):
+        return len(self._roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arrays.values())
+
+    def apply(self, X):
+        """Índice global de la hoja alcanzada por cada fila en cada árbol (n, T)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self._roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(go_left, self._left[nodes], self._right[nodes])
+        return nodes
+
+    def _raw_predict(self, X, chunk_size=2048):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty((X.shape[0], self.n_outputs), dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            values = self._value[leaves].astype(np.float64)  # (n, T, ancho)
+            if self._weights is None:
+                out[start:start + chunk_size] = values.mean(axis=1)
+            else:
+                # Suma elemento a elemento (no matmul): el resultado de cada
+                # fila no depende del tamaño del lote
+                out[start:start + chunk_size] = (values[:, :, :1] * self._weights).sum(axis=1)
+        return out
+
+    def predict_proba(self, X):
+        if self.kind != "classifier":
+            raise AttributeError("predict_proba solo existe para clasificadores")
+        return self._raw_predict(X)
+
+    def predict(self, X):
+        raw = self._raw_predict(X)
+        if self.kind == "classifier":
+            return self.classes_[raw.argmax(axis=1)]
+        return raw[:, 0] if self.n_outputs == 1 else raw
+
+    def save(self, path):
+        np.savez(path, meta=json.dumps(self.meta), **self.arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {k: data[k] for k in data.files if k != "meta"}
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Formato de bosque no soportado: {meta.get('format_version')}")
+        return cls(arrays, meta)
+
+    def save_mapped(self, path):
+        write_mapped(path, self.arrays, self.meta)
+
+    @classmethod
+    def load_mapped(cls, path):
+        """Bosque con los arrays mapeados en solo lectura (no se copian al heap)."""
+        arrays, meta = read_mapped(path)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Formato de bosque no soportado: {meta.get('format_version')}")
+        return cls(arrays, meta)
+
+
+def forest_path(pkl_path, suffix=FOREST_SUFFIX):
+    return os.path.splitext(pkl_path)[0] + suffix
+
+
+# ==========================
+# CLI: exportar y verificar paridad
+# ==========================
+
+def _read_features(csv_path, feature_names, limit):
+    """Lee un CSV de prueba y arma la matriz con el orden de features del modelo."""
+    import pandas as pd
+
+    with open(csv_path, "r", encoding="utf-8") as f:
+        sep = "\t" if "\t" in f.readline() else ","
+    df = pd.read_csv(csv_path, sep=sep, nrows=limit)
+    if all(c in df.columns for c in feature_names):
+        X = df[feature_names]
+    else:
+        # Test RIASEC de ítems (R1..C8): mismos puntajes que train_riasec.calcular_scores
+        X = pd.DataFrame({c: df[[k for k in df.columns if k.startswith(c)]].sum(axis=1) for c in feature_names})
+    return X.dropna()
+
+
+def check_parity(model, forest, X, tol=1e-5):
+    """Compara CompactForest contra el modelo de sklearn sobre X. Devuelve (ok, reporte)."""
+    if forest.kind == "classifier":
+        expected_proba = model.predict_proba(X)
+        got_proba = forest.predict_proba(X.to_numpy())
+        agreement = float((model.predict(X).astype(str) == forest.predict(X.to_numpy())).mean())
+        max_diff = float(np.abs(expected_proba - got_proba).max())
+        return agreement == 1.0, {"rows": len(X), "label_agreement": agreement, "max_proba_diff": max_diff}
+    expected = np.asarray(model.predict(X), dtype=np.float64).reshape(len(X), -1)
+    got = forest.predict(X.to_numpy()).reshape(len(X), -1)
+    max_diff = float(np.abs(expected - got).max())
+    return max_diff <= tol, {"rows": len(X), "max_abs_diff": max_diff}
+
+
+def main():
+    models_dir = os.getenv("MODELS_DIR", os.path.join(os.getcwd(), "models"))
+    parser = argparse.ArgumentParser(description="Exporta los RandomForest a bosques compactos NumPy.")
+    parser.add_argument("models", nargs="*", default=["riasec_model.pkl", "ocean_model.pkl"])
+    parser.add_argument("--models-dir", default=models_dir)
+    parser.add_argument("--value-dtype", choices=["float32", "float64"], default="float32")
+    parser.add_argument("--format", choices=["npz", "mapped", "both"], default="npz",
+                        help="npz (comprimible, se copia al heap) o mapped (.forest.map, np.memmap)")
+    parser.add_argument("--check-csv", action="append", default=[], metavar="MODELO=CSV",
+                        help="verifica paridad, p. ej. riasec_model.pkl=data/data_test_reduced.csv")
+    parser.add_argument("--limit", type=int, default=20000, help="filas máximas por CSV de verificación")
+    parser.add_argument("--tol", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    import joblib
+    checks = dict(c.split("=", 1) for c in args.check_csv)
+    failed = False
+    for name in args.models:
+        pkl = os.path.join(args.models_dir, name)
+        model = joblib.load(pkl)
+        forest = export_forest(model, value_dtype=np.dtype(args.value_dtype))
+        outputs = []
+        if args.format in ("npz", "both"):
+            outputs.append((forest_path(pkl), forest.save, CompactForest.load))
+        if args.format in ("mapped", "both"):
+            outputs.append((forest_path(pkl, MAPPED_SUFFIX), forest.save_mapped, CompactForest.load_mapped))
+
+        for out, save, load in outputs:
+            save(out)
+            print(f"[EXPORT] {name} → {os.path.basename(out)}: {forest.n_trees} árboles, "
+                  f"{len(forest._feature):,} nodos, {forest.nbytes / 1024 / 1024:.1f} MB en memoria, "
+                  f"{os.path.getsize(out) / 1024 / 1024:.1f} MB en disco")
+
+            if name in checks:
+                X = _read_features(checks[name], list(forest.feature_names_in_), args.limit)
+                ok, report = check_parity(model, load(out), X, args.tol)
+                print(f"[CHECK] {os.path.basename(out)}: {'OK' if ok else 'FALLA'} {report}")
+                failed = failed or not ok
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
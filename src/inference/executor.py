@@ -0,0 +1,185 @@
+import os
+import math
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from src.inference import metrics
+
+# ==========================
+# Ejecutor acotado para la inferencia
+# ==========================
+# Saca el trabajo de CPU (recorrido de bosques, scoring) del event loop y lo
+# manda a un pool propio de hilos o procesos con un límite de trabajos en
+# vuelo (en cola + ejecutándose). Si el límite está lleno, el request se
+# rechaza de inmediato (Overloaded -> 503 + Retry-After) en vez de dejar que
+# la latencia crezca sin tope. El tiempo en cola y el de ejecución se
+# reportan por separado en /metrics.
+#
+# Modo "process": el pool usa el método de arranque "forkserver" ("spawn" donde
+# no existe). Cuando se crea el pool, el worker de gunicorn ya tiene hilos
+# corriendo (sampler del governor, micro-batcher) y un fork directo copiaría
+# sus locks en el estado en que estén, posiblemente tomados. El forkserver es
+# un proceso de un solo hilo que importa el pipeline una vez; cada hijo se
+# bifurca desde ahí y carga los artefactos en _init_process, así que NO
+# comparte los modelos congelados del master (con INFERENCE_BACKEND=mapped los
+# arrays sí se comparten vía page cache).
+#
+# Cada hijo tiene su propio result cache en memoria (RESULT_CACHE_SIZE por
+# proceso): un resultado calculado en un hijo no es visible para los otros ni
+# para el worker. Para compartirlo, configurar RESULT_CACHE_DIR (tier en disco).
+
+QUEUE_SECONDS = metrics.Histogram(
+    "career_executor_queue_seconds", "Espera en cola del ejecutor antes de empezar", ["task"]
+)
+RUN_SECONDS = metrics.Histogram(
+    "career_executor_run_seconds", "Tiempo de ejecución dentro del ejecutor", ["task"]
+)
+REJECTED = metrics.Counter(
+    "career_executor_rejected_total", "Trabajos rechazados por cola llena", ["task"]
+)
+
+
+class Overloaded(Exception):
+    """El ejecutor no admite más trabajo; `retry_after` en segundos."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Servicio saturado, reintentar en {retry_after} s")
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, args, kwargs, enqueued):
+    """Corre en el pool. time.monotonic es común a todos los procesos del host."""
+    started = time.monotonic()
+    result = fn(*args, **kwargs)
+    return result, started - enqueued, time.monotonic() - started
+
+
+def _pool_context():
+    """forkserver (hijos bifurcados desde un proceso sin hilos) o spawn como respaldo."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        # El forkserver importa el pipeline una sola vez; los hijos lo heredan ya importado
+        ctx.set_forkserver_preload(["src.inference.recommendation_pipeline"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _init_process():
+    """Cada proceso del pool arranca sin artefactos: los carga una vez al iniciar."""
+    from src.inference.recommendation_pipeline import preload
+    try:
+        preload()
+    except Exception as e:
+        print(f"[WARN] No se pudieron precargar los artefactos en el proceso del pool: {e}")
+
+
+class InferenceExecutor:
+    """
+    kind: "thread" o "process". workers: tamaño del pool.
+    max_pending: trabajos admitidos a la vez (ejecutándose + en cola).
+    """
+
+    def __init__(self, kind="thread", workers=2, max_pending=32):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Tipo de ejecutor desconocido: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._avg_run = None  # media móvil del tiempo de ejecución (s)
+
+    def _get_pool(self):
+        # Se crea en el primer uso: con gunicorn eso ocurre ya dentro del worker
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "process":
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=_pool_context(),
+                            initializer=_init_process,
+                        )
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        return self._pool
+
+    def in_flight(self):
+        return self._in_flight
+
+    def retry_after(self):
+        """Segundos estimados hasta que se libere un lugar (mínimo 1)."""
+        avg = self._avg_run or 1.0
+        return max(1, math.ceil(avg * self._in_flight / self.workers))
+
+    def _acquire(self, task):
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                REJECTED.inc(task)
+                raise Overloaded(self.retry_after())
+            self._in_flight += 1
+
+    def _release(self, run_seconds=None):
+        with self._lock:
+            self._in_flight -= 1
+            if run_seconds is not None:
+                self._avg_run = run_seconds if self._avg_run is None else 0.9 * self._avg_run + 0.1 * run_seconds
+
+    async def run(self, task, fn, *args, **kwargs):
+        """
+        Ejecuta fn(*args, **kwargs) en el pool; lanza Overloaded si no hay lugar.
+        En modo "process" fn y sus argumentos deben poder serializarse con
+        pickle (funciones definidas a nivel de módulo).
+        """
+        self._acquire(task)
+        try:
+            future = self._get_pool().submit(_timed_call, fn, args, kwargs, time.monotonic())
+        except BaseException:
+            self._release()
+            raise
+
+        def done(f):
+            # Libera el lugar aunque el cliente se haya desconectado
+            if f.cancelled() or f.exception() is not None:
+                self._release()
+                return
+            _, queued, ran = f.result()
+            QUEUE_SECONDS.labels(task).observe(queued)
+            RUN_SECONDS.labels(task).observe(ran)
+            self._release(ran)
+
+        future.add_done_callback(done)
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    async def admit(self, task, make_future):
+        """
+        Aplica el mismo límite a trabajo que ya corre en otro hilo (p. ej. el
+        micro-batcher): make_future() debe devolver un concurrent.futures.Future.
+        """
+        self._acquire(task)
+        try:
+            future = make_future()
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda f: self._release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def executor_from_env():
+    """INFERENCE_EXECUTOR=thread|process, INFERENCE_WORKERS, INFERENCE_MAX_PENDING."""
+    return InferenceExecutor(
+        kind=os.getenv("INFERENCE_EXECUTOR", "thread"),
+        workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+        max_pending=int(os.getenv("INFERENCE_MAX_PENDING", "32")),
+    )
@@ -0,0 +1,174 @@
+import warnings
+import threading
+import weakref
+
+import numpy as np
+
+from src.inference.affinity_index import RIASEC_LETTERS
+
+# ==========================
+# Núcleo de inferencia en NumPy
+# ==========================
+# Lo que el pipeline hace por request antes de llamar a los modelos, sin pandas:
+# - Validar y agrupar las respuestas RIASEC (6, 18, 48... ítems -> 6 promedios).
+#   La suma por grupo es secuencial, igual que sum() de Python, para que los
+#   promedios (float64) sean idénticos bit a bit a los de la versión anterior.
+# - Copiar las filas en buffers float32 preasignados por hilo, que es el dtype
+#   con el que sklearn recorre los árboles (así no hace otra copia).
+# - Verificar el orden de columnas contra feature_names_in_ del modelo una
+#   sola vez por modelo; si solo cambia el orden, se reordena la entrada.
+# - Elegir las dos letras dominantes con argpartition (empates: stable sort).
+# - Llamar a los modelos de sklearn silenciando solo su aviso por recibir un
+#   array sin nombres de columnas (el orden ya se verificó arriba).
+
+OCEAN_ITEMS = [
+    "EXT1", "EXT2", "EXT3", "EXT4",
+    "AGR1", "AGR2", "AGR3", "AGR4",
+    "CSN1", "CSN2", "CSN3", "CSN4",
+    "EST1", "EST2", "EST3", "EST4",
+    "OPN1", "OPN2", "OPN3", "OPN4",
+]
+
+
+def as_vector(values, name):
+    """Lista de respuestas -> vector float64 finito (ValueError si no lo es)."""
+    try:
+        x = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"Las respuestas {name} deben ser numéricas")
+    if x.ndim != 1:
+        raise ValueError(f"Las respuestas {name} deben ser una lista plana de números")
+    if not np.isfinite(x).all():
+        raise ValueError(f"Las respuestas {name} contienen valores no finitos")
+    return x
+
+
+def group_riasec(riasec_features):
+    """
+    6, 18, 48 ítems RIASEC (cualquier múltiplo de 6) -> 6 promedios float64
+    (uno por letra), agrupando bloques consecutivos de n / 6 ítems.
+    """
+    x = as_vector(riasec_features, "RIASEC")
+    n = len(x)
+    if n < len(RIASEC_LETTERS):
+        raise ValueError(f"Se esperaban 6 puntajes RIASEC, se recibieron {n}")
+    if n % len(RIASEC_LETTERS):
+        raise ValueError(f"Se esperaba un múltiplo de 6 ítems RIASEC (6, 18 o 48), se recibieron {n}")
+    if n == len(RIASEC_LETTERS):
+        return x
+    group_size = n // 6
+    blocks = x.reshape(6, group_size)
+    total = blocks[:, 0].copy()
+    for j in range(1, group_size):
+        total += blocks[:, j]
+    return total / group_size
+
+
+def top_two(vector):
+    """Índices de las dos letras dominantes; en empate gana la primera letra."""
+    v = np.asarray(vector, dtype=np.float64)
+    pair = np.argpartition(-v, 1)[:2]
+    cutoff = v[pair].min()
+    if np.count_nonzero(v >= cutoff) > 2:
+        # Empate en el borde: argpartition no garantiza cuál elige
+        order = np.argsort(-v, kind="stable")
+        return int(order[0]), int(order[1])
+    first, second = (int(pair[0]), int(pair[1]))
+    if v[second] > v[first] or (v[second] == v[first] and second < first):
+        first, second = second, first
+    return first, second
+
+
+def model_feature_names(model):
+    """feature_names_in_ del modelo (o de su primer regresor si es MultiOutputRegressor)."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is None and hasattr(model, "estimators_"):
+        names = getattr(model.estimators_[0], "feature_names_in_", None)
+    return [str(n) for n in names] if names is not None else None
+
+
+_orders = weakref.WeakKeyDictionary()
+_orders_lock = threading.Lock()
+
+
+def feature_order(model, expected):
+    """
+    Permutación que lleva columnas en orden `expected` al orden del modelo,
+    o None si ya coinciden (o el modelo no guardó nombres). Se calcula una vez
+    por modelo; ValueError si el modelo espera otras columnas.
+    """
+    try:
+        return _orders[model]
+    except (KeyError, TypeError):
+        pass
+
+    names = model_feature_names(model)
+    if names is None or names == list(expected):
+        order = None
+    elif sorted(names) == sorted(expected):
+        position = {name: i for i, name in enumerate(expected)}
+        order = np.array([position[name] for name in names], dtype=np.intp)
+    else:
+        raise ValueError(f"El modelo espera las columnas {names}, no {list(expected)}")
+
+    try:
+        with _orders_lock:
+            _orders[model] = order
+    except TypeError:
+        pass  # modelo sin soporte de weakref: se recalcula cada vez
+    return order
+
+
+def predict(model, X):
+    """
+    model.predict(X) con X de model_input. Los estimadores de sklearn avisan
+    que X no trae nombres de columnas; el aviso se silencia solo durante esta
+    llamada. Los backends compact/mapped/onnx no avisan y van directo.
+    """
+    if not type(model).__module__.startswith("sklearn."):
+        return model.predict(X)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        return model.predict(X)
+
+
+class RowBuffer:
+    """Buffer float32 (n, ancho) por hilo que solo crece; evita asignar en cada request."""
+
+    def __init__(self, width, initial_rows=1):
+        self.width = width
+        self.initial_rows = initial_rows
+        self._local = threading.local()
+
+    def take(self, n):
+        buf = getattr(self._local, "buffer", None)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((max(n, self.initial_rows), self.width), dtype=np.float32)
+            self._local.buffer = buf
+        return buf[:n]
+
+
+_buffers = {}
+
+
+def model_input(model, rows, expected):
+    """
+    Filas (n, len(expected)) ya validadas -> matriz float32 en el orden de
+    columnas del modelo, escrita en el buffer del hilo. Válida hasta la
+    siguiente llamada con el mismo ancho en el mismo hilo.
+    """
+    width = len(expected)
+    X = np.asarray(rows, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != width:
+        got = X.shape[-1] if X.ndim else 0
+        raise ValueError(f"Se esperaban {width} valores por fila, se recibieron {got}")
+    order = feature_order(model, expected)
+    buffer = _buffers.get(width)
+    if buffer is None:
+        buffer = _buffers.setdefault(width, RowBuffer(width))
+    out = buffer.take(X.shape[0])
+    if order is None:
+        out[...] = X
+    else:
+        out[...] = X[:, order]
+    return out
@@ -0,0 +1,101 @@
+import os
+import json
+import zlib
+import struct
+
+import numpy as np
+
+# ==========================
+# Artefactos mapeables en memoria
+# ==========================
+# Formato de archivo para arrays grandes (árboles, tablas) que se abren con
+# np.memmap en lugar de descomprimirse al heap:
+#
+#   MAGIC (8 bytes) | largo del encabezado (uint64 little-endian)
+#   encabezado: JSON comprimido con zlib
+#       {"format_version", "meta": {...}, "arrays": {nombre: {dtype, shape, offset, nbytes}}}
+#   relleno hasta ALIGN | array 1 | relleno | array 2 | ...
+#
+# Los arrays van sin comprimir, en orden C y alineados a ALIGN bytes (los
+# offsets son relativos al inicio de los datos, que también está alineado).
+# Al cargar solo se lee y descomprime el encabezado; los datos quedan
+# mapeados en solo lectura y el sistema operativo los trae a memoria a medida
+# que se tocan. Esas páginas son del page cache: las comparten todos los
+# procesos (workers, contenedores) que abren el mismo archivo en el mismo
+# host, y no cuentan como memoria privada de ninguno.
+
+MAGIC = b"CFMAP\x00\x01\x00"
+FORMAT_VERSION = 1
+ALIGN = 64
+_LENGTH = struct.Struct("<Q")
+
+
+def _padding(position):
+    return (-position) % ALIGN
+
+
+def write_mapped(path, arrays, meta):
+    """Escribe `arrays` ({nombre: ndarray}) y `meta` (JSON) en `path` de forma atómica."""
+    layout, contiguous, position = {}, {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(f"El array {name} tiene dtype object y no se puede mapear")
+        position += _padding(position)
+        layout[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": position,  # relativo al inicio de los datos
+            "nbytes": int(array.nbytes),
+        }
+        contiguous[name] = array
+        position += array.nbytes
+
+    doc = {"format_version": FORMAT_VERSION, "meta": meta, "arrays": layout}
+    header = zlib.compress(json.dumps(doc, ensure_ascii=False).encode("utf-8"), 9)
+    data_start = _data_start(len(header))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        for name, array in contiguous.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(memoryview(array).cast("B"))
+    os.replace(tmp, path)
+
+
+def _data_start(header_length):
+    position = len(MAGIC) + _LENGTH.size + header_length
+    return position + _padding(position)
+
+
+def read_header(path):
+    """Encabezado de un artefacto mapeable (sin tocar los datos)."""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path} no es un artefacto mapeable")
+        (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        doc = json.loads(zlib.decompress(f.read(length)).decode("utf-8"))
+    if doc.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Versión de artefacto mapeable no soportada: {doc.get('format_version')}")
+    doc["data_start"] = _data_start(length)
+    return doc
+
+
+def read_mapped(path):
+    """(arrays, meta): arrays de solo lectura respaldados por el archivo (np.memmap)."""
+    doc = read_header(path)
+    size = os.path.getsize(path)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in doc["arrays"].items():
+        start = doc["data_start"] + spec["offset"]
+        end = start + spec["nbytes"]
+        if end > size:
+            raise ValueError(f"{path} está truncado: {name} termina en {end} y el archivo mide {size}")
+        view = buffer[start:end].view(np.dtype(spec["dtype"]))
+        arrays[name] = view.reshape(spec["shape"])
+    return arrays, doc["meta"]
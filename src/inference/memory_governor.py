@@ -0,0 +1,167 @@
+import os
+import gc
+import math
+import time
+import ctypes
+import threading
+
+from src.inference import metrics
+from src.inference.executor import Overloaded
+
+# ==========================
+# Gobernador de memoria
+# ==========================
+# Un hilo en segundo plano mide la memoria propia del proceso cada
+# MEMORY_SAMPLE_MS y actúa solo cuando se cruzan las marcas de agua:
+#   - soft (MEMORY_SOFT_MB): gc.collect() + malloc_trim, como mucho una vez
+#     cada MEMORY_GC_COOLDOWN_S segundos.
+#   - hard (MEMORY_HARD_MB): además desaloja artefactos del registro (primero
+#     los secundarios, luego el resto) y, mientras siga por encima, rechaza
+#     requests nuevos con 503 (load shedding).
+# Así los requests ya no pagan un gc.collect() completo cada vez.
+#
+# La medida es USS (MEMORY_METRIC=uss, por defecto) o PSS (=pss) leída de
+# /proc/self/smaps_rollup, no el RSS: en un worker de gunicorn el RSS incluye
+# las páginas copy-on-write heredadas del master (los modelos congelados), que
+# desalojar no libera. Por lo mismo, los artefactos marcados como compartidos
+# por el master (ModelRegistry.mark_shared) nunca se desalojan aquí.
+# Las marcas son por proceso: con varios workers de gunicorn, repartir el
+# presupuesto del contenedor entre ellos (más lo que ocupa el master).
+
+STATE_OK, STATE_SOFT, STATE_HARD = 0, 1, 2
+
+ACTIONS = metrics.Counter(
+    "career_memory_governor_actions_total", "Acciones del gobernador de memoria", ["action"]
+)
+
+# Artefactos que se pueden soltar primero: se reconstruyen baratos o tienen
+# alternativa (sin LUT se usa el bosque)
+SECONDARY_KEYS = ("riasec_lut.npz", "career_matcher", "affinity_index")
+
+
+def _malloc_trim():
+    """Devuelve al SO la memoria libre del heap de glibc (no-op fuera de glibc)."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def memory_sampler(kind="uss"):
+    """Devuelve una función sin argumentos que mide la memoria del proceso (uss o pss) en bytes."""
+    if kind not in ("uss", "pss"):
+        raise ValueError(f"Métrica de memoria desconocida: {kind}")
+    return lambda: metrics.memory_breakdown()[kind]
+
+
+class MemoryGovernor:
+    """
+    sampler: función sin argumentos que devuelve los bytes a comparar con las
+    marcas (por defecto USS del proceso).
+    """
+
+    def __init__(self, registry, soft_mb, hard_mb, interval_ms=500, gc_cooldown_s=5.0, sampler=None):
+        self.registry = registry
+        self.sampler = sampler or memory_sampler("uss")
+        self.soft = int(soft_mb * 1024 * 1024)
+        self.hard = int(hard_mb * 1024 * 1024)
+        self.interval = interval_ms / 1000.0
+        self.gc_cooldown = gc_cooldown_s
+        self.state = STATE_OK
+        self.used = 0
+        self._last_gc = -math.inf
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="memory-governor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[WARN] memory governor: {e}")
+
+    def _collect(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_gc < self.gc_cooldown:
+            return
+        self._last_gc = now
+        gc.collect()
+        _malloc_trim()
+        ACTIONS.inc("gc")
+
+    def tick(self):
+        """Una muestra de memoria y las acciones que correspondan. Devuelve el estado."""
+        self.used = self.sampler()
+        if self.used < self.soft:
+            self.state = STATE_OK
+            return self.state
+
+        if self.used < self.hard:
+            self._collect()
+            self.state = STATE_SOFT
+            return self.state
+
+        # Por encima de hard: liberar en orden creciente de costo. Mientras siga
+        # en hard, las colecciones respetan el cooldown (sin GC en bucle).
+        entering = self.state != STATE_HARD
+        if entering:
+            print(f"[MEM] {self.used / 1024 / 1024:.0f} MB propios sobre la marca hard; liberando memoria")
+        self._collect(force=entering)
+        self.used = self.sampler()
+        # Solo lo cargado por este proceso: lo heredado del master no se libera
+        own = self.registry.keys(shared=False)
+        secondary = [k for k in SECONDARY_KEYS if k in own]
+        if self.used >= self.hard and secondary:
+            for key in secondary:
+                self.registry.evict(key)
+            ACTIONS.inc("evict_secondary")
+            self.used = self.sampler()
+        if self.used >= self.hard and self.registry.keys(shared=False):
+            self.registry.evict()
+            ACTIONS.inc("evict_all")
+            self._collect(force=True)
+            self.used = self.sampler()
+
+        self.state = STATE_HARD if self.used >= self.hard else STATE_SOFT
+        return self.state
+
+    def check(self):
+        """Lanza Overloaded si el proceso está sobre la marca hard (load shedding)."""
+        if self.state == STATE_HARD:
+            ACTIONS.inc("shed")
+            raise Overloaded(max(1, math.ceil(self.interval * 2)))
+
+    def gauges(self):
+        yield "career_memory_governor_state", {}, self.state, "0 ok, 1 sobre soft, 2 sobre hard (rechazando)"
+        yield "career_memory_governor_used_bytes", {}, self.used, "Memoria propia del proceso en la última muestra"
+        yield "career_memory_watermark_bytes", {"level": "soft"}, self.soft, "Marcas de agua de memoria"
+        yield "career_memory_watermark_bytes", {"level": "hard"}, self.hard, "Marcas de agua de memoria"
+
+
+def governor_from_env(registry):
+    """
+    MEMORY_SOFT_MB, MEMORY_HARD_MB, MEMORY_SAMPLE_MS, MEMORY_GC_COOLDOWN_S,
+    MEMORY_METRIC=uss|pss; MEMORY_GOVERNOR=0 lo apaga.
+    """
+    if os.getenv("MEMORY_GOVERNOR", "1") == "0":
+        return None
+    governor = MemoryGovernor(
+        registry,
+        soft_mb=float(os.getenv("MEMORY_SOFT_MB", "380")),
+        hard_mb=float(os.getenv("MEMORY_HARD_MB", "460")),
+        interval_ms=float(os.getenv("MEMORY_SAMPLE_MS", "500")),
+        gc_cooldown_s=float(os.getenv("MEMORY_GC_COOLDOWN_S", "5")),
+        sampler=memory_sampler(os.getenv("MEMORY_METRIC", "uss")),
+    )
+    metrics.GaugeCollector(governor.gauges)
+    return governor
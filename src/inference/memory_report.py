@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import argparse
+
+from src.inference.metrics import memory_breakdown
+
+# ==========================
+# Reporte de memoria por worker de gunicorn
+# ==========================
+# Muestra para el master y cada worker la memoria única (USS: lo que se libera
+# si el proceso muere), proporcional (PSS: compartida repartida entre quienes
+# la usan) y compartida (páginas heredadas del master con preload_app).
+# Con esos números estima cuántos workers caben en un presupuesto de RAM:
+#   total ≈ RSS del master + workers × USS promedio por worker
+#
+# Uso:
+#   python -m src.inference.memory_report                 # busca el master de gunicorn
+#   python -m src.inference.memory_report --pid 1 --budget-mb 512 --json
+
+
+def find_gunicorn_master():
+    """PID del master de gunicorn: el proceso gunicorn cuyo padre no es gunicorn."""
+    candidates = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                argv = f.read().decode(errors="replace").split("\0")
+            with open(f"/proc/{entry}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except OSError:
+            continue
+        # gunicorn ... o python .../gunicorn ...
+        if any(os.path.basename(arg).startswith("gunicorn") for arg in argv[:2]):
+            candidates[int(entry)] = ppid
+    masters = [pid for pid, ppid in candidates.items() if ppid not in candidates]
+    return min(masters) if masters else None
+
+
+def child_pids(pid):
+    """Hijos directos de `pid` (los workers de gunicorn)."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except OSError:
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def build_report(master_pid, budget_mb=None):
+    """Desglose de memoria del master y sus workers, con estimación de workers por presupuesto."""
+    mb = 1024 * 1024
+    processes = [{"pid": master_pid, "role": "master", **memory_breakdown(master_pid)}]
+    for pid in child_pids(master_pid):
+        try:
+            processes.append({"pid": pid, "role": "worker", **memory_breakdown(pid)})
+        except (OSError, ValueError):
+            continue
+
+    workers = [p for p in processes if p["role"] == "worker"]
+    master = processes[0]
+    report = {
+        "master_pid": master_pid,
+        "processes": [
+            {k: (round(v / mb, 1) if k in ("rss", "pss", "uss", "shared") else v) for k, v in p.items()}
+            for p in processes
+        ],
+        "n_workers": len(workers),
+        "total_pss_mb": round(sum(p["pss"] for p in processes) / mb, 1),
+        "total_rss_mb": round(sum(p["rss"] for p in processes) / mb, 1),
+    }
+    if workers:
+        avg_uss = sum(p["uss"] for p in workers) / len(workers)
+        avg_shared = sum(p["shared"] for p in workers) / len(workers)
+        report["avg_worker_uss_mb"] = round(avg_uss / mb, 1)
+        report["avg_worker_shared_mb"] = round(avg_shared / mb, 1)
+        if budget_mb is not None and avg_uss > 0:
+            free = budget_mb * mb - master["rss"]
+            report["budget_mb"] = budget_mb
+            report["max_workers_in_budget"] = max(0, int(free // avg_uss))
+    return report
+
+
+def print_report(report):
+    print(f"{'PID':>8} {'rol':<7} {'RSS MB':>9} {'PSS MB':>9} {'USS MB':>9} {'compart. MB':>12}")
+    for p in report["processes"]:
+        print(f"{p['pid']:>8} {p['role']:<7} {p['rss']:>9.1f} {p['pss']:>9.1f} {p['uss']:>9.1f} {p['shared']:>12.1f}")
+    print(f"\nWorkers: {report['n_workers']} | PSS total: {report['total_pss_mb']} MB "
+          f"(suma de RSS: {report['total_rss_mb']} MB)")
+    if "avg_worker_uss_mb" in report:
+        print(f"Por worker: {report['avg_worker_uss_mb']} MB únicos, "
+              f"{report['avg_worker_shared_mb']} MB compartidos con el master")
+    if "max_workers_in_budget" in report:
+        print(f"Con {report['budget_mb']} MB caben ~{report['max_workers_in_budget']} workers (WEB_CONCURRENCY)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria única vs compartida por worker de gunicorn.")
+    parser.add_argument("--pid", type=int, help="PID del master (por defecto se busca el de gunicorn)")
+    parser.add_argument("--budget-mb", type=float, help="presupuesto de RAM para estimar el número de workers")
+    parser.add_argument("--json", action="store_true", help="salida en JSON")
+    args = parser.parse_args()
+
+    master_pid = args.pid or find_gunicorn_master()
+    if master_pid is None:
+        print("No se encontró un proceso gunicorn en ejecución (usa --pid).")
+        sys.exit(1)
+
+    report = build_report(master_pid, args.budget_mb)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
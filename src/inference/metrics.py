@@ -0,0 +1,235 @@
+import os
+import gc
+import time
+import threading
+from bisect import bisect_left
+
+# ==========================
+# Métricas en proceso (formato de texto Prometheus)
+# ==========================
+# Histogramas y contadores livianos (un lock y un bisect por observación,
+# ~1 µs) para dejar encendidos en producción. Los gauges de memoria y GC se
+# calculan solo al consultar /metrics, no en cada request.
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "total", "count", "lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager que observa el tiempo transcurrido en segundos."""
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, _HistogramChild(self.buckets))
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for values, child in sorted(self._children.items()):
+            with child.lock:
+                counts, total, count = list(child.counts), child.total, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, values, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *values, amount=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, v in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(v)}")
+        return lines
+
+
+class GaugeCollector:
+    """Gauges calculados al momento de exportar: fn() -> [(nombre, labels, valor, ayuda)]."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        REGISTRY.append(self)
+
+    def render(self):
+        lines, seen = [], set()
+        for name, labels, value, documentation in self.fn():
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+            names, values = zip(*labels.items()) if labels else ((), ())
+            lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render():
+    """Todas las métricas registradas en formato de texto Prometheus 0.0.4."""
+    lines = []
+    for metric in REGISTRY:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            lines.append(f"# error al exportar: {e}")
+    return "\n".join(lines) + "\n"
+
+
+# ==========================
+# Métricas del pipeline
+# ==========================
+
+STAGE_SECONDS = Histogram(
+    "career_stage_seconds",
+    "Duración de cada etapa de recommend_career y /predict",
+    ["stage"],
+)
+REQUEST_SECONDS = Histogram(
+    "career_request_seconds",
+    "Duración total de cada endpoint",
+    ["endpoint"],
+)
+REQUESTS = Counter("career_requests_total", "Requests atendidos por endpoint y estado", ["endpoint", "status"])
+
+
+def stage(name):
+    """Uso: `with stage("riasec_predict"): ...`"""
+    return STAGE_SECONDS.labels(name).time()
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    """RSS del proceso leyendo /proc (sin psutil); cae a psutil fuera de Linux."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import psutil
+        return psutil.Process().memory_info().rss
+
+
+def memory_breakdown(pid="self"):
+    """
+    Memoria única (USS), proporcional (PSS) y compartida de un proceso en bytes,
+    desde /proc/<pid>/smaps_rollup; cae a psutil.memory_full_info() si no existe.
+    Con varios workers de gunicorn, `shared` son las páginas heredadas del master.
+    """
+    try:
+        fields = {}
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) * 1024
+        return {
+            "rss": fields.get("Rss", 0),
+            "pss": fields.get("Pss", 0),
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+            "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        }
+    except OSError:
+        import psutil
+        info = psutil.Process(None if pid == "self" else int(pid)).memory_full_info()
+        return {
+            "rss": info.rss,
+            "pss": getattr(info, "pss", 0),
+            "uss": info.uss,
+            "shared": getattr(info, "shared", 0),
+        }
+
+
+def _process_gauges():
+    yield "process_resident_memory_bytes", {}, rss_bytes(), "Memoria residente del proceso"
+    for kind, value in memory_breakdown().items():
+        if kind != "rss":
+            yield "process_memory_bytes", {"kind": kind}, value, "Memoria única (uss), proporcional (pss) y compartida"
+    for generation, count in enumerate(gc.get_count()):
+        yield "python_gc_objects_pending", {"generation": generation}, count, "Objetos pendientes por generación"
+    for generation, st in enumerate(gc.get_stats()):
+        yield "python_gc_collections", {"generation": generation}, st["collections"], "Colecciones de GC acumuladas"
+        yield "python_gc_objects_collected", {"generation": generation}, st["collected"], "Objetos liberados por el GC"
+
+
+GaugeCollector(_process_gauges)
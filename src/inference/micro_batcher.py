@@ -0,0 +1,153 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from src.inference import metrics
+
+# ==========================
+# Micro-batching de /predict
+# ==========================
+# Junta las peticiones individuales que llegan dentro de una ventana corta
+# (window_ms) o hasta max_batch filas, ejecuta una sola predicción vectorizada
+# con recommend_career_batch y entrega a cada llamador su propio resultado.
+# Ventanas más largas suben el throughput a costa de la latencia de cola.
+
+BATCH_SIZE = metrics.Histogram(
+    "career_microbatch_size", "Filas por lote del micro-batcher", buckets=metrics.SIZE_BUCKETS
+)
+BATCH_WAIT = metrics.Histogram(
+    "career_microbatch_wait_seconds", "Espera de cada petición en cola hasta que arranca su lote"
+)
+
+
+class _Request:
+    __slots__ = ("riasec", "ocean", "params", "future", "enqueued")
+
+    def __init__(self, riasec, ocean, params):
+        self.riasec = riasec
+        self.ocean = ocean
+        self.params = params
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Planificador de lotes para llamadas concurrentes.
+    `batch_fn(riasec_batch, ocean_batch, **params)` debe devolver una lista
+    de resultados en el mismo orden (o {"error": ...} por ítem).
+    """
+
+    def __init__(self, batch_fn, window_ms=5.0, max_batch=32):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "max_batch_size": 0,
+            "wait_ms_sum": 0.0,
+            "wait_ms_max": 0.0,
+            "run_ms_sum": 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._thread.start()
+
+    def submit_future(self, riasec_features, ocean_items, top_n=3, weight_riasec=1.2, weight_ocean=0.2):
+        """Encola una petición y devuelve un Future con su resultado (sin bloquear)."""
+        params = (top_n, weight_riasec, weight_ocean)
+        req = _Request(riasec_features, ocean_items, params)
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append(req)
+            self._cond.notify()
+        return req.future
+
+    def submit(self, riasec_features, ocean_items, top_n=3, weight_riasec=1.2, weight_ocean=0.2):
+        """Encola una petición y bloquea hasta tener su resultado."""
+        return self.submit_future(riasec_features, ocean_items, top_n, weight_riasec, weight_ocean).result()
+
+    def _collect(self):
+        """Espera la primera petición y agrupa las que llegan dentro de la ventana."""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0].enqueued + self.window
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+
+            # Peticiones con distintos top_n/pesos se ejecutan en sub-lotes
+            groups = {}
+            for req in batch:
+                groups.setdefault(req.params, []).append(req)
+
+            for (top_n, weight_riasec, weight_ocean), reqs in groups.items():
+                try:
+                    results = self.batch_fn(
+                        [r.riasec for r in reqs],
+                        [r.ocean for r in reqs],
+                        top_n=top_n,
+                        weight_riasec=weight_riasec,
+                        weight_ocean=weight_ocean,
+                    )
+                except Exception as e:
+                    for r in reqs:
+                        r.future.set_exception(e)
+                    continue
+                for r, result in zip(reqs, results):
+                    if "error" in result:
+                        r.future.set_exception(ValueError(result["error"]))
+                    else:
+                        r.future.set_result(result)
+
+            finished = time.perf_counter()
+            BATCH_SIZE.labels().observe(len(batch))
+            wait = BATCH_WAIT.labels()
+            for r in batch:
+                wait.observe(started - r.enqueued)
+            max_wait = max((started - r.enqueued) * 1000 for r in batch)
+            with self._cond:
+                s = self._stats
+                s["batches"] += 1
+                s["items"] += len(batch)
+                s["max_batch_size"] = max(s["max_batch_size"], len(batch))
+                s["wait_ms_sum"] += sum((started - r.enqueued) * 1000 for r in batch)
+                s["wait_ms_max"] = max(s["wait_ms_max"], max_wait)
+                s["run_ms_sum"] += (finished - started) * 1000
+
+    def stats(self):
+        """Profundidad de cola, tamaño de lote y tiempos de espera acumulados."""
+        with self._cond:
+            s = dict(self._stats)
+            queue_depth = len(self._pending)
+        batches = s["batches"] or 1
+        items = s["items"] or 1
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "queue_depth": queue_depth,
+            "batches": s["batches"],
+            "items": s["items"],
+            "avg_batch_size": round(s["items"] / batches, 2),
+            "max_batch_size": s["max_batch_size"],
+            "avg_wait_ms": round(s["wait_ms_sum"] / items, 3),
+            "max_wait_ms": round(s["wait_ms_max"], 3),
+            "avg_run_ms": round(s["run_ms_sum"] / batches, 3),
+        }
@@ -0,0 +1,203 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ==========================
+# Registro residente de modelos
+# ==========================
+# Cada artefacto se carga una sola vez por proceso y queda en memoria.
+# - Cargas concurrentes del mismo artefacto se deduplican (un lock por clave).
+# - Presupuesto de memoria configurable con desalojo LRU (varias versiones).
+# - Recarga automática si el archivo cambia en disco (mtime/tamaño, y hash
+#   opcional para ignorar cambios que no alteran el contenido).
+# - Las entradas cargadas en el master de gunicorn antes del fork se marcan
+#   como compartidas (mark_shared): desalojarlas en un worker no libera
+#   memoria (las páginas siguen siendo del master), así que ni el presupuesto
+#   ni evict() las sueltan salvo que se pida explícitamente.
+
+
+def _default_loader(path):
+    import joblib
+    return joblib.load(path)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Calcula el sha256 de un archivo por bloques."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def estimate_nbytes(obj, _seen=None):
+    """Estima la memoria que ocupa un modelo (arrays y árboles de sklearn)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v, _seen) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_nbytes(v, _seen) for v in obj)
+
+    total = 0
+    tree = getattr(obj, "tree_", None)
+    if tree is not None and hasattr(tree, "node_count"):
+        # Nodo de sklearn: ~64 bytes de estructura + vector de valores (float64)
+        total += tree.node_count * (64 + tree.value[0].size * 8)
+    estimators = getattr(obj, "estimators_", None)
+    if estimators is not None:
+        total += sum(estimate_nbytes(e, _seen) for e in estimators)
+    return total
+
+
+class _Entry:
+    __slots__ = ("obj", "nbytes", "signature", "sha256", "shared")
+
+    def __init__(self, obj, nbytes, signature, sha256):
+        self.obj = obj
+        self.nbytes = nbytes
+        self.signature = signature
+        self.sha256 = sha256
+        self.shared = False
+
+
+class ModelRegistry:
+    """
+    Mantiene los artefactos cargados en memoria entre requests.
+    `max_bytes=None` desactiva el límite de memoria.
+    """
+
+    def __init__(self, base_dir, max_bytes=None, check_hash=False):
+        self.base_dir = base_dir
+        self.max_bytes = max_bytes
+        self.check_hash = check_hash
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "loads": 0, "reloads": 0, "evictions": 0}
+
+    def _path(self, name):
+        return name if os.path.isabs(name) else os.path.join(self.base_dir, name)
+
+    @staticmethod
+    def _signature(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _lookup(self, key, signature):
+        """Devuelve la entrada vigente (y la marca como reciente) o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature != signature:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def get(self, name, loader=None, key=None):
+        """
+        Devuelve el artefacto `name` (relativo a base_dir) ya cargado.
+        `loader(path)` construye el objeto (por defecto joblib.load);
+        `key` permite registrar varias vistas del mismo archivo.
+        """
+        path = self._path(name)
+        key = key or name
+        signature = self._signature(path)
+
+        entry = self._lookup(key, signature)
+        if entry is not None:
+            return entry.obj
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Otro hilo pudo haberlo cargado mientras esperábamos
+            entry = self._lookup(key, signature)
+            if entry is not None:
+                return entry.obj
+
+            with self._lock:
+                previous = self._entries.get(key)
+
+            sha = None
+            if self.check_hash and previous is not None:
+                sha = file_sha256(path)
+                if sha == previous.sha256:
+                    # Solo cambió el mtime: el contenido es el mismo
+                    with self._lock:
+                        previous.signature = signature
+                        self._entries.move_to_end(key)
+                    return previous.obj
+
+            print(f"[LOAD] {key} desde {path}")
+            obj = (loader or _default_loader)(path)
+            if self.check_hash and sha is None:
+                sha = file_sha256(path)
+            nbytes = estimate_nbytes(obj) or os.path.getsize(path)
+            entry = _Entry(obj, nbytes, signature, sha)
+
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self.stats["reloads" if previous is not None else "loads"] += 1
+                self._enforce_budget(keep=key)
+            return obj
+
+    def _enforce_budget(self, keep):
+        """Desaloja entradas LRU hasta respetar max_bytes (requiere self._lock)."""
+        if self.max_bytes is None:
+            return
+        total = sum(e.nbytes for e in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep or self._entries[key].shared:
+                continue
+            total -= self._entries.pop(key).nbytes
+            self.stats["evictions"] += 1
+            print(f"[EVICT] {key} desalojado (presupuesto {self.max_bytes / 1024 / 1024:.0f} MB)")
+
+    def evict(self, key=None, include_shared=False):
+        """
+        Desaloja una entrada (o todas si key es None). Las compartidas con el
+        master solo se sueltan con include_shared=True.
+        """
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                entry = self._entries.get(k)
+                if entry is None or (entry.shared and not include_shared):
+                    continue
+                del self._entries[k]
+                self.stats["evictions"] += 1
+
+    def mark_shared(self):
+        """Marca lo cargado hasta ahora como compartido (llamar en el master antes del fork)."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.shared = True
+            return list(self._entries)
+
+    def loaded_signature(self, key):
+        """(mtime_ns, tamaño) del archivo con el que se cargó `key`, o None si no está residente."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry.signature
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(e.nbytes for e in self._entries.values())
+
+    def keys(self, shared=None):
+        """Claves residentes; shared=True/False filtra por origen (master o propio)."""
+        with self._lock:
+            return [k for k, e in self._entries.items() if shared is None or e.shared == shared]
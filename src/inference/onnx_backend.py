@@ -0,0 +1,69 @@
+import os
+import json
+import threading
+
+import numpy as np
+
+# ==========================
+# Backend ONNX Runtime
+# ==========================
+# Carga los .onnx generados por export_onnx.py en una InferenceSession
+# (segura para llamarse desde varios hilos). Cada hilo reutiliza su propio
+# buffer float32 de entrada, que solo crece cuando llega un lote más grande.
+# ONNX_THREADS fija los hilos intra-op de cada sesión (por defecto 1, para
+# no competir con los workers de gunicorn).
+
+
+class OnnxModel:
+    """Modelo ONNX con la misma interfaz que usamos de sklearn (predict, classes_)."""
+
+    def __init__(self, path, initial_rows=64):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv("ONNX_THREADS", "1"))
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.n_features = self.session.get_inputs()[0].shape[1]
+        self.initial_rows = initial_rows
+        self._local = threading.local()
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.kind = meta.get("kind", "regressor")
+        names = json.loads(meta.get("feature_names", "null"))
+        classes = json.loads(meta.get("classes", "null"))
+        self.feature_names_in_ = np.array(names, dtype=object) if names else None
+        self.classes_ = np.array(classes) if classes else None
+        self.nbytes = os.path.getsize(path)
+
+    def _input(self, X):
+        """Copia X en el buffer preasignado del hilo actual."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        buf = getattr(self._local, "buffer", None)
+        if buf is None or buf.shape[0] < X.shape[0]:
+            buf = np.empty((max(self.initial_rows, X.shape[0]), self.n_features), dtype=np.float32)
+            self._local.buffer = buf
+        view = buf[:X.shape[0]]
+        view[...] = X
+        return view
+
+    def _run(self, X):
+        return self.session.run(None, {self.input_name: self._input(X)})
+
+    def predict(self, X):
+        outputs = self._run(X)
+        if self.kind == "classifier":
+            return outputs[0].astype(str)
+        return outputs[0].astype(np.float64)
+
+    def predict_proba(self, X):
+        if self.kind != "classifier":
+            raise AttributeError("predict_proba solo existe para clasificadores")
+        return self._run(X)[1].astype(np.float64)
+
+
+def load_onnx_model(path):
+    return OnnxModel(path)
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from src.inference.model_registry import file_sha256
+
+# ==========================
+# Aprovisionamiento de artefactos
+# ==========================
+# Descarga los artefactos del modelo según un manifiesto:
+#   [{"name": "riasec_model.pkl", "url": "...", "sha256": "...", "size": 123}, ...]
+# - Descargas concurrentes a un archivo temporal en la misma carpeta; solo se
+#   renombra (os.replace, atómico) después de verificar tamaño y sha256.
+#   Una descarga a medias nunca queda con el nombre final.
+# - Un artefacto ya presente se reutiliza si coincide con el manifiesto; si
+#   no coincide se vuelve a descargar.
+# - Fuentes: http(s)://, Google Drive (gdown, importado solo si hace falta),
+#   file:// o una ruta local. MODELS_MIRROR=<carpeta o URL base> sirve todos
+#   los artefactos desde un espejo (tests sin red).
+#
+# Manifiesto: MODELS_MANIFEST o <MODELS_DIR>/manifest.json; si no existe se
+# arma con RIASEC_URL/OCEAN_URL/AFFINITY_URL y, opcionalmente,
+# RIASEC_SHA256/OCEAN_SHA256/AFFINITY_SHA256.
+#
+# Generar el manifiesto de los artefactos actuales:
+#   python -m src.inference.provisioning --write-manifest models/manifest.json
+
+ARTIFACTS = {
+    "riasec_model.pkl": "RIASEC",
+    "ocean_model.pkl": "OCEAN",
+    "riasec_affinity.json": "AFFINITY",
+}
+
+
+class ProvisioningError(Exception):
+    pass
+
+
+def load_manifest(models_dir, manifest_path=None):
+    """Entradas del manifiesto (archivo JSON o variables de entorno)."""
+    manifest_path = manifest_path or os.getenv("MODELS_MANIFEST") or os.path.join(models_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["artifacts"] if isinstance(data, dict) else data
+
+    return [
+        {
+            "name": name,
+            "url": os.getenv(f"{prefix}_URL"),
+            "sha256": os.getenv(f"{prefix}_SHA256"),
+            "size": None,
+        }
+        for name, prefix in ARTIFACTS.items()
+    ]
+
+
+def source_for(entry):
+    """URL o ruta de la que se descarga la entrada (MODELS_MIRROR tiene prioridad)."""
+    mirror = os.getenv("MODELS_MIRROR")
+    if mirror:
+        if "://" in mirror:
+            return mirror.rstrip("/") + "/" + entry["name"]
+        return os.path.join(mirror, entry["name"])
+    return entry.get("url")
+
+
+def verify(path, entry):
+    """None si el archivo coincide con el manifiesto; si no, el motivo."""
+    size = entry.get("size")
+    if size is not None and os.path.getsize(path) != size:
+        return f"tamaño {os.path.getsize(path)} != {size}"
+    expected = entry.get("sha256")
+    if expected and file_sha256(path) != expected.lower():
+        return "sha256 no coincide"
+    return None
+
+
+def _fetch(source, tmp_path):
+    """Copia `source` a tmp_path según el esquema."""
+    import urllib.request
+
+    parsed = urllib.parse.urlparse(source)
+    if parsed.scheme in ("", "file"):
+        local = urllib.request.url2pathname(parsed.path) if parsed.scheme == "file" else source
+        shutil.copyfile(local, tmp_path)
+    elif "drive.google.com" in parsed.netloc:
+        import gdown
+        if gdown.download(source, tmp_path, quiet=True) is None:
+            raise ProvisioningError(f"gdown no pudo descargar {source}")
+    else:
+        with urllib.request.urlopen(source, timeout=60) as response, open(tmp_path, "wb") as f:
+            shutil.copyfileobj(response, f, 1024 * 1024)
+
+
+def provision_one(entry, models_dir):
+    """Deja un artefacto verificado en models_dir. Devuelve (nombre, estado, segundos)."""
+    name = entry["name"]
+    dest = os.path.join(models_dir, name)
+    started = time.perf_counter()
+
+    if os.path.exists(dest):
+        problem = verify(dest, entry)
+        if problem is None:
+            return name, "ok", time.perf_counter() - started
+        print(f"[PROVISION] {name} local no coincide con el manifiesto ({problem}); se descarga de nuevo")
+
+    source = source_for(entry)
+    if not source:
+        if os.path.exists(dest):
+            return name, "unverified", time.perf_counter() - started
+        raise ProvisioningError(f"{name}: no existe y no tiene URL de origen")
+
+    fd, tmp = tempfile.mkstemp(dir=models_dir, prefix=f".{name}.", suffix=".part")
+    os.close(fd)
+    try:
+        print(f"[PROVISION] Descargando {name} desde {source} ...")
+        _fetch(source, tmp)
+        problem = verify(tmp, entry)
+        if problem is not None:
+            raise ProvisioningError(f"{name}: descarga inválida ({problem})")
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return name, "downloaded", time.perf_counter() - started
+
+
+def provision(models_dir, manifest=None, strict=False):
+    """
+    Aprovisiona todas las entradas en paralelo. Devuelve {nombre: estado}.
+    Con strict=True lanza ProvisioningError si alguna falla.
+    """
+    os.makedirs(models_dir, exist_ok=True)
+    manifest = manifest if manifest is not None else load_manifest(models_dir)
+    statuses, errors = {}, []
+    with ThreadPoolExecutor(max_workers=max(1, len(manifest))) as pool:
+        futures = {pool.submit(provision_one, entry, models_dir): entry["name"] for entry in manifest}
+        for future, name in futures.items():
+            try:
+                _, status, seconds = future.result()
+                statuses[name] = status
+                print(f"[PROVISION] {name}: {status} ({seconds:.2f} s)")
+            except Exception as e:
+                statuses[name] = "error"
+                errors.append(str(e))
+                print(f"[ERROR] No se pudo aprovisionar {name}: {e}")
+    if errors and strict:
+        raise ProvisioningError("; ".join(errors))
+    return statuses
+
+
+def warm_up():
+    """
+    Carga los artefactos y corre una inferencia de prueba (individual y por
+    lote) para que el primer request real no pague la carga ni el arranque en frío.
+    """
+    from src.inference.recommendation_pipeline import preload, recommend_career, recommend_career_batch
+
+    started = time.perf_counter()
+    preload()
+    riasec, ocean = [3.0] * 6, [3.0] * 20
+    recommend_career(riasec, ocean, top_n=3)
+    recommend_career_batch([riasec, riasec], [ocean, ocean], top_n=3)
+    print(f"[WARMUP] Inferencia de calentamiento lista en {time.perf_counter() - started:.2f} s")
+
+
+def write_manifest(models_dir, out_path, base_url=None):
+    """Manifiesto con sha256 y tamaño de los artefactos presentes en models_dir."""
+    entries = []
+    for name, prefix in ARTIFACTS.items():
+        path = os.path.join(models_dir, name)
+        url = (base_url.rstrip("/") + "/" + name) if base_url else os.getenv(f"{prefix}_URL")
+        entries.append({"name": name, "url": url, "sha256": file_sha256(path), "size": os.path.getsize(path)})
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"artifacts": entries}, f, indent=2)
+    print(f"Manifiesto escrito en {out_path}")
+
+
+def main():
+    models_dir = os.getenv("MODELS_DIR", os.path.join(os.getcwd(), "models"))
+    parser = argparse.ArgumentParser(description="Descarga y verifica los artefactos del modelo.")
+    parser.add_argument("--models-dir", default=models_dir)
+    parser.add_argument("--manifest", help="manifiesto JSON (por defecto MODELS_MANIFEST o <models-dir>/manifest.json)")
+    parser.add_argument("--write-manifest", metavar="RUTA", help="genera un manifiesto de los artefactos actuales")
+    parser.add_argument("--base-url", help="URL base para las entradas de --write-manifest")
+    parser.add_argument("--warm-up", action="store_true", help="corre una inferencia de prueba al terminar")
+    args = parser.parse_args()
+
+    if args.write_manifest:
+        write_manifest(args.models_dir, args.write_manifest, args.base_url)
+        return
+
+    try:
+        provision(args.models_dir, load_manifest(args.models_dir, args.manifest), strict=True)
+    except ProvisioningError:
+        sys.exit(1)
+    if args.warm_up:
+        warm_up()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import os
-import gc
-import joblib
-import pandas as pd
-import json
-import psutil
-from fuzzywuzzy import process
+from src.inference import inference_core as core
+from src.inference.metrics import stage
+from src.inference.model_registry import ModelRegistry
+from src.inference.affinity_index import load_affinity_index, SUBPROFILES
+from src.inference.scoring import load_scoring_engine
+from src.inference.riasec_lut import LUT_FILE, load_riasec_lut
+from src.inference.compact_forest import FOREST_SUFFIX, MAPPED_SUFFIX, CompactForest
+from src.inference.onnx_backend import load_onnx_model
+from src.inference.result_cache import cache_from_env, canonical_key
 
 # ==========================
 # 1. Configuración de rutas (sin descarga)
@@ -19,38 +22,48 @@ os.makedirs(MODELS_DIR, exist_ok=True)
 
 print(f"[INIT] Cargando pipeline con modelos desde: {MODELS_DIR}")
 
+# Modelos residentes: se cargan una vez por proceso y se recargan si cambian.
+# MODEL_CACHE_MB limita la memoria total (desalojo LRU); MODEL_CHECK_HASH=1
+# compara sha256 antes de recargar un archivo cuyo mtime cambió.
+_cache_mb = os.getenv("MODEL_CACHE_MB")
+registry = ModelRegistry(
+    MODELS_DIR,
+    max_bytes=int(float(_cache_mb) * 1024 * 1024) if _cache_mb else None,
+    check_hash=os.getenv("MODEL_CHECK_HASH", "0") == "1",
+)
+
+# Backend de inferencia: "sklearn" (pickles de joblib), "compact" (bosques en
+# NumPy puro exportados con python -m src.inference.compact_forest; no
+# necesita sklearn en el contenedor de inferencia), "mapped" (los mismos
+# bosques en .forest.map, abiertos con np.memmap: carga casi instantánea y
+# páginas compartidas por todos los procesos del host) u "onnx" (sesiones de
+# onnxruntime sobre los .onnx generados por export_onnx.py).
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn")
+
 
 # ==========================
 # 2. Funciones auxiliares
 # ==========================
 
-def normalize(name: str) -> str:
-    """Normaliza nombres de carreras para comparación fuzzy."""
-    return name.lower().split("(")[0].strip()
+def career_matcher():
+    """Matcher fuzzy residente con los objetivos ya normalizados por etiqueta."""
+    # rapidfuzz solo se importa si se usa el matcher (no está en el camino de /predict)
+    from src.inference.career_matcher import load_career_matcher
+    return registry.get("riasec_affinity.json", loader=load_career_matcher, key="career_matcher")
 
 
 def fuzzy_match(career_str, riasec_label, score_cutoff=75):
     """Verifica si una carrera tiene afinidad con el perfil RIASEC."""
     try:
-        with open(os.path.join(MODELS_DIR, "riasec_affinity.json"), "r", encoding="utf-8") as f:
-            riasec_affinity = json.load(f)
-        target_list = riasec_affinity.get(riasec_label, [])
-        if not target_list:
-            return False
-        target_list_norm = [normalize(t) for t in target_list]
-        career_norm = normalize(career_str)
-        best_match, best_score = process.extractOne(career_norm, target_list_norm)
-        return best_score >= score_cutoff
+        return career_matcher().match(career_str, riasec_label, score_cutoff)
     except Exception as e:
         print(f"[WARN] fuzzy_match error: {e}")
         return False
 
 
-def log_memory():
-    """Registra en consola el consumo de memoria actual (MB)."""
-    process = psutil.Process(os.getpid())
-    mem = process.memory_info().rss / 1024 / 1024
-    print(f"[DEBUG] Memoria usada: {mem:.2f} MB")
+def fuzzy_match_many(careers, riasec_label, score_cutoff=75):
+    """Afinidad de un catálogo completo de carreras en una sola llamada."""
+    return career_matcher().matches(careers, riasec_label, score_cutoff)
 
 
 # ==========================
@@ -59,31 +72,112 @@ def log_memory():
 
 def get_subprofile(riasec_vector):
     """Determina el subperfil RIASEC-Perú según las dos letras dominantes."""
-    subprofiles = {
-        "R": {"C": "R-Tech", "E": "R-Ind", "A": "R-Build", "S": "R-Agro", "I": "R-Geo"},
-        "I": {"R": "I-Tech", "A": "I-Science", "S": "I-Health", "C": "I-Analytic", "E": "I-Economic"},
-        "A": {"S": "A-ComunicaciónVisual", "E": "A-Diseño", "I": "A-ArtesEscénicas",
-              "R": "A-ArtesPlásticas", "C": "A-PatrimonioCultural"},
-        "S": {"E": "S-Comunitario", "I": "S-Psicológico", "A": "S-Educativo",
-              "C": "S-Salud", "R": "S-DeporteYRecreación"},
-        "E": {"C": "E-Negocios", "A": "E-MarketingYComercio", "S": "E-DerechoYGestiónPública",
-              "I": "E-EmpresarialTecnológico", "R": "E-EmpresarialIndustrial"},
-        "C": {"R": "C-Informático", "E": "C-ContableFinanciero", "S": "C-Administrativo",
-              "I": "C-EstadísticoAnalítico", "A": "C-Ofimático"},
-    }
-
     letters = ["R", "I", "A", "S", "E", "C"]
-    scores = pd.Series(riasec_vector, index=letters)
-    top_two = scores.nlargest(2).index.tolist()
-    first, second = top_two
-    subperfil = subprofiles.get(first, {}).get(second)
+    first_idx, second_idx = core.top_two(riasec_vector)
+    first, second = letters[first_idx], letters[second_idx]
+    subperfil = SUBPROFILES.get(first, {}).get(second)
     if not subperfil:
-        subperfil = subprofiles.get(second, {}).get(first)
+        subperfil = SUBPROFILES.get(second, {}).get(first)
     return subperfil if subperfil else first
 
 
 # ==========================
-# 4. Pipeline principal (RIASEC + OCEAN secuencial)
+# 4. Pasos compartidos del pipeline
+# ==========================
+
+RIASEC_COLS = ["R", "I", "A", "S", "E", "C"]
+
+
+def group_riasec(riasec_features):
+    """Agrupa 18 o 48 ítems RIASEC (múltiplos de 6) en 6 promedios float64 (uno por letra)."""
+    return core.group_riasec(riasec_features)
+
+
+def get_model(name):
+    """Modelo residente `name` ("riasec_model" u "ocean_model") según el backend."""
+    if INFERENCE_BACKEND == "compact":
+        return registry.get(name + FOREST_SUFFIX, loader=CompactForest.load)
+    if INFERENCE_BACKEND == "mapped":
+        return registry.get(name + MAPPED_SUFFIX, loader=CompactForest.load_mapped)
+    if INFERENCE_BACKEND == "onnx":
+        return registry.get(name + ".onnx", loader=load_onnx_model)
+    return registry.get(name + ".pkl")
+
+
+def affinity_index():
+    """Índice de afinidad residente (se reconstruye si cambia el JSON)."""
+    return registry.get("riasec_affinity.json", loader=load_affinity_index, key="affinity_index")
+
+
+def scoring_engine():
+    """Perfiles del catálogo en matrices NumPy (se reconstruye si cambia el JSON)."""
+    return registry.get("riasec_affinity.json", loader=load_scoring_engine, key="scoring_engine")
+
+
+def riasec_lut():
+    """
+    Tabla RIASEC precalculada (python -m src.inference.riasec_lut), solo si
+    existe y se construyó con el riasec_model.pkl actual. RIASEC_LUT=0 la desactiva.
+    """
+    if os.getenv("RIASEC_LUT", "1") == "0" or not os.path.exists(os.path.join(MODELS_DIR, LUT_FILE)):
+        return None
+    lut = registry.get(LUT_FILE, loader=load_riasec_lut)
+    if not lut.matches_model(os.path.join(MODELS_DIR, "riasec_model.pkl")):
+        return None
+    return lut
+
+
+def preload():
+    """Carga modelos y catálogo de afinidad al iniciar, antes del primer request."""
+    get_model("riasec_model")
+    get_model("ocean_model")
+    scoring_engine()
+    riasec_lut()
+
+
+def format_result(riasec_label, sub_label, ocean_vector, recomendaciones):
+    return {
+        "riasec": riasec_label,
+        "subperfil": sub_label,
+        "ocean_vector": [
+            {"trait": "O", "value": float(ocean_vector[0])},
+            {"trait": "C", "value": float(ocean_vector[1])},
+            {"trait": "E", "value": float(ocean_vector[2])},
+            {"trait": "A", "value": float(ocean_vector[3])},
+            {"trait": "N", "value": float(ocean_vector[4])}
+        ],
+        "recomendaciones": recomendaciones
+    }
+
+
+def validate_ocean(ocean_items):
+    """Ítems OCEAN -> vector float64 de 20 valores finitos."""
+    x = core.as_vector(ocean_items, "OCEAN")
+    if len(x) != len(core.OCEAN_ITEMS):
+        raise ValueError(f"Se esperaban {len(core.OCEAN_ITEMS)} ítems OCEAN, se recibieron {len(x)}")
+    return x
+
+
+def predict_rows(model, rows, columns):
+    """
+    Predice todas las filas en una sola llamada al modelo.
+    Si el lote completo falla, reintenta fila por fila para aislar el error:
+    las filas inválidas devuelven la excepción en lugar de la predicción.
+    """
+    try:
+        return list(core.predict(model, core.model_input(model, rows, columns)))
+    except Exception:
+        preds = []
+        for row in rows:
+            try:
+                preds.append(core.predict(model, core.model_input(model, [row], columns))[0])
+            except Exception as e:
+                preds.append(e)
+        return preds
+
+
+# ==========================
+# 5. Pipeline principal (RIASEC + OCEAN secuencial)
 # ==========================
 
 def recommend_career(
@@ -101,97 +195,228 @@ def recommend_career(
 
     try:
         # --- Paso 0: normalizar entrada RIASEC ---
+        with stage("grouping"):
+            grouped = group_riasec(riasec_features)
+            ocean_row = validate_ocean(ocean_items)
         if len(riasec_features) > 6:
-            n = len(riasec_features)
-            group_size = n // 6
-            grouped = [
-                sum(riasec_features[i:i + group_size]) / group_size
-                for i in range(0, n, group_size)
-            ][:6]
-            print(f"[INFO] RIASEC agrupado automáticamente ({n} → 6)")
-        else:
-            grouped = riasec_features
-
-        # --- Paso 1: cargar afinidad (liviano) ---
-        with open(os.path.join(MODELS_DIR, "riasec_affinity.json"), "r", encoding="utf-8") as f:
-            riasec_affinity = json.load(f)
-
-        # --- Paso 2: modelo RIASEC ---
-        print("[LOAD] Modelo RIASEC...")
-        riasec_model = joblib.load(os.path.join(MODELS_DIR, "riasec_model.pkl"))
-        riasec_input = pd.DataFrame([grouped], columns=["R", "I", "A", "S", "E", "C"])
-        riasec_pred = riasec_model.predict(riasec_input)[0]
-        riasec_label = str(riasec_pred)
-        sub_label = get_subprofile(grouped)
-        del riasec_model, riasec_input
-        gc.collect()
-
-        # --- Paso 3: mapear etiquetas ---
-        alias_map = {
-            "R-Tech": "R-Tech", "R-Ind": "R-Ind", "R-Build": "R-Build", "R-Geo": "R-Geo", "R-Agro": "R-Agro",
-            "I-Science": "I-Científico", "I-Health": "I-Médico", "I-Analytic": "I-Analítico", "I-Tech": "I-Tecnológico",
-            "A-Diseño": "A-Diseño", "A-ComunicaciónVisual": "A-ComunicaciónVisual", "A-ArtesEscénicas": "A-ArtesEscénicas",
-            "S-Comunitario": "S-Comunitario", "S-Educativo": "S-Educativo", "S-Salud": "S-Salud",
-            "E-Negocios": "E-Negocios", "E-MarketingYComercio": "E-MarketingYComercio",
-            "C-Informático": "C-Informático", "C-ContableFinanciero": "C-ContableFinanciero",
-        }
-        mapped_label = alias_map.get(sub_label, sub_label)
-
-        # --- Paso 4: extraer carreras ---
-        carreras_data = []
-        if "-" in mapped_label:
-            base, sub = mapped_label.split("-", 1)
-            carreras_data = riasec_affinity.get(base, {}).get(mapped_label, [])
-        else:
-            sub_aff = riasec_affinity.get(riasec_label, {})
-            for subblock in sub_aff.values():
-                carreras_data.extend(subblock)
-        del riasec_affinity
-        gc.collect()
+            print(f"[INFO] RIASEC agrupado automáticamente ({len(riasec_features)} → 6)")
+
+        # --- Paso 1: modelos y catálogo residentes ---
+        with stage("model_load"):
+            engine = scoring_engine()
+            lut = riasec_lut()
+            ocean_model = get_model("ocean_model")
+
+        # --- Paso 2: modelo RIASEC (lectura de tabla si la entrada está en la grilla) ---
+        with stage("riasec_predict"):
+            hit = lut.lookup(grouped) if lut is not None else None
+            if hit is not None:
+                riasec_label, sub_label = hit
+            else:
+                riasec_model = get_model("riasec_model")
+                riasec_input = core.model_input(riasec_model, [grouped], RIASEC_COLS)
+                riasec_pred = core.predict(riasec_model, riasec_input)[0]
+                riasec_label = str(riasec_pred)
+        if hit is None:
+            with stage("subprofile"):
+                sub_label = get_subprofile(grouped)
+
+        # --- Paso 3 y 4: mapear etiquetas y extraer carreras ---
+        with stage("affinity_lookup"):
+            rows = engine.candidates(riasec_label, sub_label)
 
         # --- Paso 5: modelo OCEAN ---
-        print("[LOAD] Modelo OCEAN...")
-        ocean_model = joblib.load(os.path.join(MODELS_DIR, "ocean_model.pkl"))
-        item_cols = list(ocean_model.estimators_[0].feature_names_in_)
-        ocean_input = pd.DataFrame([ocean_items], columns=item_cols)
-        ocean_vector = ocean_model.predict(ocean_input)[0]
-        del ocean_model, ocean_input
-        gc.collect()
-
-        # --- Paso 6: calcular recomendaciones híbridas ---
-        adjusted = []
-        ocean_boost = sum(ocean_vector) / len(ocean_vector)
-
-        for entry in carreras_data:
-            carrera = entry.get("carrera")
-            universidades = entry.get("universidades", [])
-            score = weight_riasec * (1 + weight_ocean * ocean_boost)
-            adjusted.append({
-                "carrera": carrera,
-                "universidades": universidades,
-                "score": round(score, 3)
-            })
-
-        adjusted_final = sorted(adjusted, key=lambda x: x["score"], reverse=True)[:top_n]
-
-        # --- Paso 7: log final ---
-        log_memory()
-        gc.collect()
-
-        return {
-            "riasec": riasec_label,
-            "subperfil": sub_label,
-            "ocean_vector": [
-                {"trait": "O", "value": float(ocean_vector[0])},
-                {"trait": "C", "value": float(ocean_vector[1])},
-                {"trait": "E", "value": float(ocean_vector[2])},
-                {"trait": "A", "value": float(ocean_vector[3])},
-                {"trait": "N", "value": float(ocean_vector[4])}
-            ],
-            "recomendaciones": adjusted_final
-        }
+        with stage("ocean_predict"):
+            ocean_input = core.model_input(ocean_model, [ocean_row], core.OCEAN_ITEMS)
+            ocean_vector = core.predict(ocean_model, ocean_input)[0]
+
+        # --- Paso 6: puntuación matricial y top-k ---
+        with stage("scoring"):
+            adjusted_final = engine.recommend(
+                [grouped], [ocean_vector], rows, top_n, weight_riasec, weight_ocean
+            )[0]
+
+        return format_result(riasec_label, sub_label, ocean_vector, adjusted_final)
 
     except Exception as e:
-        gc.collect()
         print(f"[ERROR] recommend_career(): {e}")
         raise e
+
+
+# ==========================
+# 6. Pipeline por lotes (N estudiantes, una predicción por modelo)
+# ==========================
+
+def recommend_career_batch(
+    riasec_batch,
+    ocean_batch,
+    top_n=3,
+    weight_riasec=1.2,
+    weight_ocean=0.2
+):
+    """
+    Versión por lotes de recommend_career: una sola predicción de N filas
+    por modelo. Devuelve una lista en el orden de entrada; los ítems que
+    fallan se reportan como {"error": mensaje} sin abortar el lote.
+    """
+    if len(riasec_batch) != len(ocean_batch):
+        raise ValueError("riasec_batch y ocean_batch deben tener la misma longitud")
+
+    results = [None] * len(riasec_batch)
+    with stage("batch_model_load"):
+        ocean_model = get_model("ocean_model")
+        engine = scoring_engine()
+        lut = riasec_lut()
+
+    # --- Paso 0: validar y agrupar cada ítem ---
+    valid, grouped_rows, ocean_rows = [], [], []
+    with stage("batch_grouping"):
+        for i, (riasec_features, ocean_items) in enumerate(zip(riasec_batch, ocean_batch)):
+            try:
+                grouped = group_riasec(riasec_features)
+                ocean_rows.append(validate_ocean(ocean_items))
+                grouped_rows.append(grouped)
+                valid.append(i)
+            except Exception as e:
+                results[i] = {"error": str(e)}
+
+    if not valid:
+        return results
+
+    # --- Paso 2 y 5: una predicción vectorizada por modelo ---
+    with stage("batch_riasec_predict"):
+        hits = lut.lookup_many(grouped_rows) if lut is not None else [None] * len(grouped_rows)
+        misses = [pos for pos, hit in enumerate(hits) if hit is None]
+        riasec_preds = list(hits)
+        if misses:
+            preds = predict_rows(
+                get_model("riasec_model"), [grouped_rows[pos] for pos in misses], RIASEC_COLS
+            )
+            for pos, pred in zip(misses, preds):
+                riasec_preds[pos] = pred
+    with stage("batch_ocean_predict"):
+        ocean_preds = predict_rows(ocean_model, ocean_rows, core.OCEAN_ITEMS)
+
+    # --- Pasos 3 y 4 por fila: etiquetas y carreras candidatas ---
+    groups = {}
+    with stage("batch_affinity_lookup"):
+        for pos, (grouped, riasec_pred, ocean_vector, i) in enumerate(
+            zip(grouped_rows, riasec_preds, ocean_preds, valid)
+        ):
+            try:
+                for pred in (riasec_pred, ocean_vector):
+                    if isinstance(pred, Exception):
+                        raise pred
+                if hits[pos] is not None:
+                    riasec_label, sub_label = hits[pos]
+                else:
+                    riasec_label = str(riasec_pred)
+                    sub_label = get_subprofile(grouped)
+                rows = engine.candidates(riasec_label, sub_label)
+                groups.setdefault(id(rows), (rows, []))[1].append((pos, i, riasec_label, sub_label))
+            except Exception as e:
+                results[i] = {"error": str(e)}
+
+    # --- Paso 6: una puntuación matricial por grupo de candidatas ---
+    with stage("batch_scoring"):
+        for rows, members in groups.values():
+            ranked = engine.recommend(
+                [grouped_rows[pos] for pos, _, _, _ in members],
+                [ocean_preds[pos] for pos, _, _, _ in members],
+                rows, top_n, weight_riasec, weight_ocean
+            )
+            for (pos, i, riasec_label, sub_label), recomendaciones in zip(members, ranked):
+                results[i] = format_result(riasec_label, sub_label, ocean_preds[pos], recomendaciones)
+
+    return results
+
+
+# ==========================
+# 7. Caché de resultados (delante de recommend_career)
+# ==========================
+
+result_cache = cache_from_env()
+
+
+def model_file(name):
+    """Archivo del que sale el modelo `name` con el backend actual."""
+    if INFERENCE_BACKEND == "compact":
+        return name + FOREST_SUFFIX
+    if INFERENCE_BACKEND == "mapped":
+        return name + MAPPED_SUFFIX
+    if INFERENCE_BACKEND == "onnx":
+        return name + ".onnx"
+    return name + ".pkl"
+
+
+def artifact_fingerprint():
+    """
+    Backend + (mtime, tamaño) con que se cargaron los modelos y el catálogo,
+    más la tabla RIASEC en uso ("-" si está apagada o no coincide con el
+    modelo) y si es aproximada. Pasa por el registro, así que recarga lo que
+    cambió en disco y la huella cambia justo cuando cambia lo que responde el
+    pipeline, también entre procesos con distinta configuración que comparten
+    el nivel en disco de la caché.
+    """
+    get_model("riasec_model")
+    get_model("ocean_model")
+    scoring_engine()
+    lut = riasec_lut()
+    parts = [INFERENCE_BACKEND]
+    for key in (model_file("riasec_model"), model_file("ocean_model"), "scoring_engine"):
+        signature = registry.loaded_signature(key)
+        parts.append(f"{key}:-" if signature is None else f"{key}:{signature[0]}:{signature[1]}")
+    signature = registry.loaded_signature(LUT_FILE) if lut is not None else None
+    if signature is None:
+        parts.append(f"{LUT_FILE}:-")
+    else:
+        parts.append(f"{LUT_FILE}:{signature[0]}:{signature[1]}:{'approx' if lut.approx else 'exact'}")
+    return "|".join(parts)
+
+
+def _cache_key(riasec_features, ocean_items, top_n, weight_riasec, weight_ocean, fingerprint):
+    try:
+        return canonical_key(
+            group_riasec(riasec_features), ocean_items, top_n, weight_riasec, weight_ocean, fingerprint
+        )
+    except (TypeError, ValueError):
+        return None  # entrada no numérica: que la rechace el pipeline
+
+
+def cached_recommend_career(riasec_features, ocean_items, top_n=3, weight_riasec=1.2, weight_ocean=0.2):
+    """recommend_career con caché; los errores no se cachean."""
+    if result_cache is None:
+        return recommend_career(riasec_features, ocean_items, top_n, weight_riasec, weight_ocean)
+    key = _cache_key(riasec_features, ocean_items, top_n, weight_riasec, weight_ocean, artifact_fingerprint())
+    result = result_cache.get(key) if key is not None else None
+    if result is None:
+        result = recommend_career(riasec_features, ocean_items, top_n, weight_riasec, weight_ocean)
+        if key is not None:
+            result_cache.put(key, result)
+    return result
+
+
+def cached_recommend_career_batch(riasec_batch, ocean_batch, top_n=3, weight_riasec=1.2, weight_ocean=0.2):
+    """recommend_career_batch que solo evalúa los ítems que no están en caché."""
+    if result_cache is None:
+        return recommend_career_batch(riasec_batch, ocean_batch, top_n, weight_riasec, weight_ocean)
+    if len(riasec_batch) != len(ocean_batch):
+        raise ValueError("riasec_batch y ocean_batch deben tener la misma longitud")
+
+    fingerprint = artifact_fingerprint()
+    keys = [
+        _cache_key(r, o, top_n, weight_riasec, weight_ocean, fingerprint)
+        for r, o in zip(riasec_batch, ocean_batch)
+    ]
+    results = [result_cache.get(k) if k is not None else None for k in keys]
+    misses = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        computed = recommend_career_batch(
+            [riasec_batch[i] for i in misses], [ocean_batch[i] for i in misses],
+            top_n, weight_riasec, weight_ocean
+        )
+        for i, result in zip(misses, computed):
+            results[i] = result
+            if keys[i] is not None and "error" not in result:
+                result_cache.put(keys[i], result)
+    return results
@@ -0,0 +1,230 @@
+import os
+import copy
+import math
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from src.inference import metrics
+
+# ==========================
+# Caché de resultados de recommend_career
+# ==========================
+# El pipeline es determinista: mismas respuestas (RIASEC agrupado + ítems
+# OCEAN), mismos top_n/pesos y mismos artefactos => mismo resultado. La clave
+# es un sha256 de esa tupla en forma canónica (floats, JSON ordenado) más la
+# huella de los artefactos, así que al cambiar un modelo o el JSON de afinidad
+# las entradas viejas dejan de coincidir y salen por LRU/TTL.
+#
+# Dos niveles:
+#   - memoria: LRU con TTL por proceso (RESULT_CACHE_SIZE, RESULT_CACHE_TTL_S)
+#   - disco (opcional, RESULT_CACHE_DIR): un JSON por clave, escrito de forma
+#     atómica, compartido entre los workers de gunicorn. Como mucho cada
+#     RESULT_CACHE_SWEEP_S segundos, una escritura lanza en segundo plano un
+#     barrido que borra los archivos vencidos (mtime + TTL) y, si siguen
+#     siendo más de RESULT_CACHE_DISK_MAX, los más viejos.
+
+EVENTS = metrics.Counter(
+    "career_result_cache_events_total", "Eventos de la caché de resultados", ["tier", "event"]
+)
+
+
+def canonical_key(grouped_riasec, ocean_items, top_n, weight_riasec, weight_ocean, fingerprint):
+    """sha256 de la entrada normalizada: 3 y 3.0 dan la misma clave."""
+    payload = json.dumps(
+        [
+            [float(x) for x in grouped_riasec],
+            [float(x) for x in ocean_items],
+            int(top_n),
+            float(weight_riasec),
+            float(weight_ocean),
+            fingerprint,
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """LRU + TTL en memoria con un nivel opcional en disco."""
+
+    def __init__(self, max_entries=4096, ttl_s=3600.0, disk_dir=None, disk_max_entries=65536,
+                 sweep_interval_s=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_s
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self.sweep_interval = sweep_interval_s  # 0 apaga el barrido automático
+        self._entries = OrderedDict()  # clave -> (vence, resultado)
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = -math.inf
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                EVENTS.inc("memory", "expired")
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _put_memory(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                EVENTS.inc("memory", "eviction")
+
+    def _get_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get("expires", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            EVENTS.inc("disk", "expired")
+            return None
+        return record["result"]
+
+    def _put_disk(self, key, value):
+        path = self._disk_path(key)
+        folder = os.path.dirname(path)
+        tmp = None
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires": time.time() + self.ttl, "result": value}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] No se pudo escribir la caché en disco: {e}")
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        self._maybe_sweep()
+
+    def _maybe_sweep(self):
+        if not self.sweep_interval:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        threading.Thread(target=self.sweep, name="result-cache-sweep", daemon=True).start()
+
+    def sweep(self):
+        """
+        Borra del disco los archivos vencidos (y .tmp huérfanos) y, sobre
+        disk_max_entries, los más viejos. Devuelve cuántos borró. Tolera que
+        otro worker barra la misma carpeta a la vez.
+        """
+        if not self.disk_dir or not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            cutoff = time.time() - self.ttl
+            alive, expired, evicted = [], 0, 0
+            for folder in os.scandir(self.disk_dir):
+                if not folder.is_dir():
+                    continue
+                for entry in os.scandir(folder.path):
+                    try:
+                        mtime = entry.stat().st_mtime
+                        if mtime < cutoff:
+                            os.remove(entry.path)
+                            expired += 1
+                        elif entry.name.endswith(".json"):
+                            alive.append((mtime, entry.path))
+                    except OSError:
+                        continue
+            if self.disk_max_entries is not None and len(alive) > self.disk_max_entries:
+                alive.sort()
+                for _, path in alive[:len(alive) - self.disk_max_entries]:
+                    try:
+                        os.remove(path)
+                        evicted += 1
+                    except OSError:
+                        pass
+            if expired:
+                EVENTS.inc("disk", "expired", amount=expired)
+            if evicted:
+                EVENTS.inc("disk", "eviction", amount=evicted)
+            return expired + evicted
+        except OSError as e:
+            print(f"[WARN] No se pudo barrer la caché en disco: {e}")
+            return 0
+        finally:
+            self._sweep_lock.release()
+
+    def get(self, key):
+        """Resultado cacheado (copia) o None."""
+        value = self._get_memory(key)
+        if value is not None:
+            EVENTS.inc("memory", "hit")
+            return copy.deepcopy(value)
+        EVENTS.inc("memory", "miss")
+
+        if self.disk_dir:
+            value = self._get_disk(key)
+            if value is None:
+                EVENTS.inc("disk", "miss")
+                return None
+            EVENTS.inc("disk", "hit")
+            self._put_memory(key, value)
+            return copy.deepcopy(value)
+        return None
+
+    def put(self, key, value):
+        self._put_memory(key, copy.deepcopy(value))
+        if self.disk_dir:
+            self._put_disk(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def gauges(self):
+        yield "career_result_cache_entries", {}, len(self._entries), "Entradas en la caché de resultados en memoria"
+
+
+def cache_from_env():
+    """
+    RESULT_CACHE_SIZE (0 la apaga), RESULT_CACHE_TTL_S, RESULT_CACHE_DIR,
+    RESULT_CACHE_DISK_MAX, RESULT_CACHE_SWEEP_S.
+    """
+    size = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+    if size <= 0:
+        return None
+    cache = ResultCache(
+        max_entries=size,
+        ttl_s=float(os.getenv("RESULT_CACHE_TTL_S", "3600")),
+        disk_dir=os.getenv("RESULT_CACHE_DIR") or None,
+        disk_max_entries=int(os.getenv("RESULT_CACHE_DISK_MAX", "65536")),
+        sweep_interval_s=float(os.getenv("RESULT_CACHE_SWEEP_S", "300")),
+    )
+    metrics.GaugeCollector(cache.gauges)
+    return cache
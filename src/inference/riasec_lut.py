@@ -0,0 +1,224 @@
+import os
+import argparse
+
+import numpy as np
+
+from src.inference.affinity_index import RIASEC_LETTERS, SUBPROFILES
+from src.inference.model_registry import file_sha256
+
+# ==========================
+# Tabla de consulta precalculada del clasificador RIASEC
+# ==========================
+# El modelo RIASEC recibe solo 6 puntajes con dominio finito. La tabla evalúa
+# riasec_model una vez sobre toda la grilla alcanzable y guarda, por celda, el
+# código de la etiqueta predicha y del subperfil (uint8). En producción cada
+# request es una lectura de array; las entradas fuera de la grilla siguen
+# usando el bosque.
+#
+# La grilla de cada eje son los valores (lo_num + k) / den, k = 0..n-1:
+# den=1 para puntajes enteros, den=3 para promedios del test de 18 ítems,
+# den=8 para el de 48. Como el promedio del pipeline también es suma / den,
+# un punto de la grilla coincide bit a bit con la entrada real.
+# Si el dominio es demasiado grande se puede usar una grilla cuantizada
+# (approx=True): la entrada se redondea a la celda más cercana.
+#
+# Cobertura de los formularios de la API con la tabla por defecto (1-5, den=3,
+# 13^6 = 4.8 M celdas, exacta):
+#   18 ítems     cubierto entero: todo promedio de 3 ítems Likert cae en la grilla
+#   48 ítems     solo los promedios que son múltiplos de 1/3 (33^6 celdas no entran)
+#   6 puntajes   solo si los 6 están en 1-5 (41^6 celdas de 0-40 no entran)
+# Lo que no está en la tabla usa el bosque, así que el resultado es siempre el
+# mismo; la tabla solo acelera el formulario de 18 ítems. Cubrir los otros
+# exige --approx, que redondea la entrada y puede cambiar la etiqueta cerca
+# de los cortes del bosque.
+
+LUT_FILE = "riasec_lut.npz"
+DEFAULT_MAX_CELLS = 20_000_000
+
+# Valores posibles por letra (tras agrupar) de cada formulario RIASEC de la API:
+# (lo_num, hi_num, den) -> valores lo_num/den .. hi_num/den
+API_FORMS = {
+    "6 puntajes (0-40)": (0, 40, 1),
+    "18 ítems": (3, 15, 3),
+    "48 ítems": (8, 40, 8),
+}
+
+
+def subprofile_table():
+    """Tabla 6x6 (primera, segunda letra) -> subperfil, igual que get_subprofile."""
+    table = []
+    for first in RIASEC_LETTERS:
+        row = []
+        for second in RIASEC_LETTERS:
+            sub = SUBPROFILES.get(first, {}).get(second)
+            if not sub:
+                sub = SUBPROFILES.get(second, {}).get(first)
+            row.append(sub if sub else first)
+        table.append(row)
+    return table
+
+
+def top_two(matrix):
+    """Índices de las dos letras dominantes por fila (empates: la primera letra)."""
+    order = np.argsort(-np.asarray(matrix), axis=1, kind="stable")
+    return order[:, 0], order[:, 1]
+
+
+class RiasecLUT:
+    """Etiqueta RIASEC y subperfil precalculados sobre una grilla de 6 ejes."""
+
+    def __init__(self, lo_num, den, n, approx, classes, sub_labels,
+                 label_codes, sub_codes, model_signature, model_sha256):
+        self.lo_num = int(lo_num)
+        self.den = float(den)
+        self.n = int(n)
+        self.approx = bool(approx)
+        self.classes = [str(c) for c in classes]
+        self.sub_labels = [str(s) for s in sub_labels]
+        self.label_codes = label_codes
+        self.sub_codes = sub_codes
+        self.model_signature = tuple(int(v) for v in model_signature)
+        self.model_sha256 = str(model_sha256)
+        self._strides = self.n ** np.arange(5, -1, -1)
+        self._checked = {}
+
+    @property
+    def nbytes(self):
+        return self.label_codes.nbytes + self.sub_codes.nbytes
+
+    def matches_model(self, model_path):
+        """True si la tabla se construyó con el modelo que hay hoy en disco."""
+        if not os.path.exists(model_path):
+            return False
+        st = os.stat(model_path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self.model_signature:
+            return True
+        if signature not in self._checked:
+            self._checked[signature] = file_sha256(model_path) == self.model_sha256
+        return self._checked[signature]
+
+    def cells(self, matrix):
+        """Celda de cada fila, o -1 si la fila está fuera de la grilla."""
+        x = np.atleast_2d(np.asarray(matrix, dtype=np.float64))
+        finite = np.isfinite(x).all(axis=1)
+        x = np.where(finite[:, None], x, 0.0)
+        k = np.rint(x * self.den) - self.lo_num
+        if self.approx:
+            k = np.clip(k, 0, self.n - 1)
+            inside = finite
+        else:
+            on_grid = (self.lo_num + k) / self.den == x
+            inside = finite & (on_grid & (k >= 0) & (k < self.n)).all(axis=1)
+            k = np.where(inside[:, None], k, 0)
+        cells = k.astype(np.int64) @ self._strides
+        return np.where(inside, cells, -1)
+
+    def lookup_many(self, matrix):
+        """Lista de (etiqueta, subperfil) o None para cada fila fuera de la grilla."""
+        out = []
+        for cell in self.cells(matrix).tolist():
+            if cell < 0:
+                out.append(None)
+            else:
+                out.append((self.classes[self.label_codes[cell]], self.sub_labels[self.sub_codes[cell]]))
+        return out
+
+    def lookup(self, riasec_vector):
+        return self.lookup_many([riasec_vector])[0]
+
+
+def form_coverage(lo_num, den, n, approx=False):
+    """Fracción de las entradas posibles de cada formulario de la API que la tabla resuelve."""
+    coverage = {}
+    for form, (f_lo, f_hi, f_den) in API_FORMS.items():
+        if approx:
+            coverage[form] = 1.0
+            continue
+        values = np.arange(f_lo, f_hi + 1) / f_den
+        k = np.rint(values * den) - lo_num
+        on_grid = ((lo_num + k) / den == values) & (k >= 0) & (k < n)
+        coverage[form] = float(on_grid.mean() ** 6)
+    return coverage
+
+
+def load_riasec_lut(path):
+    data = np.load(path, allow_pickle=False)
+    return RiasecLUT(
+        data["lo_num"], data["den"], data["n"], data["approx"], data["classes"],
+        data["sub_labels"], data["label_codes"], data["sub_codes"],
+        data["model_signature"], data["model_sha256"],
+    )
+
+
+def build_riasec_lut(model_path, out_path, lo=1, hi=5, den=1, approx=False,
+                     max_cells=DEFAULT_MAX_CELLS, chunk_size=200_000):
+    """Evalúa riasec_model sobre toda la grilla y guarda la tabla en out_path."""
+    import joblib
+    import pandas as pd
+
+    lo_num = int(round(lo * den))
+    n = int(round(hi * den)) - lo_num + 1
+    total = n ** 6
+    if total > max_cells:
+        raise ValueError(
+            f"La grilla tiene {total:,} celdas (máximo {max_cells:,}). "
+            "Usa un den menor (grilla cuantizada, --approx) o un rango más chico."
+        )
+
+    model = joblib.load(model_path)
+    classes = [str(c) for c in model.classes_]
+    class_code = {c: i for i, c in enumerate(classes)}
+    table = subprofile_table()
+    sub_labels = sorted({s for row in table for s in row})
+    sub_code = np.array([[sub_labels.index(s) for s in row] for row in table], dtype=np.uint8)
+
+    axis = (lo_num + np.arange(n)) / den
+    label_codes = np.empty(total, dtype=np.uint8)
+    sub_codes = np.empty(total, dtype=np.uint8)
+    print(f"[LUT] Evaluando {total:,} celdas ({n} valores por eje)...")
+    for start in range(0, total, chunk_size):
+        cells = np.arange(start, min(start + chunk_size, total))
+        digits = (cells[:, None] // (n ** np.arange(5, -1, -1))) % n
+        grid = axis[digits]
+        preds = model.predict(pd.DataFrame(grid, columns=RIASEC_LETTERS))
+        label_codes[cells] = [class_code[str(p)] for p in preds]
+        first, second = top_two(grid)
+        sub_codes[cells] = sub_code[first, second]
+
+    st = os.stat(model_path)
+    np.savez(
+        out_path,
+        lo_num=lo_num, den=den, n=n, approx=approx,
+        classes=np.array(classes), sub_labels=np.array(sub_labels),
+        label_codes=label_codes, sub_codes=sub_codes,
+        model_signature=np.array([st.st_mtime_ns, st.st_size], dtype=np.int64),
+        model_sha256=file_sha256(model_path),
+    )
+    print(f"[LUT] Tabla guardada en {out_path} ({(label_codes.nbytes + sub_codes.nbytes) / 1024 / 1024:.1f} MB)")
+    for form, fraction in form_coverage(lo_num, den, n, approx).items():
+        note = " (aproximada)" if approx else ""
+        print(f"[LUT] Cobertura {form}: {fraction:.4%}{note}; el resto usa el bosque")
+
+
+def main():
+    models_dir = os.getenv("MODELS_DIR", os.path.join(os.getcwd(), "models"))
+    parser = argparse.ArgumentParser(
+        description="Precalcula la tabla RIASEC del clasificador. Por defecto cubre el formulario de 18 ítems; "
+                    "los de 6 puntajes y 48 ítems usan el bosque salvo las entradas que caen en la grilla."
+    )
+    parser.add_argument("--model", default=os.path.join(models_dir, "riasec_model.pkl"))
+    parser.add_argument("--out", default=os.path.join(models_dir, LUT_FILE))
+    parser.add_argument("--lo", type=float, default=1, help="valor mínimo de cada puntaje")
+    parser.add_argument("--hi", type=float, default=5, help="valor máximo de cada puntaje")
+    parser.add_argument("--den", type=float, default=3,
+                        help="denominador de la grilla (1 enteros, 3 test de 18 ítems, 8 test de 48)")
+    parser.add_argument("--approx", action="store_true",
+                        help="grilla cuantizada: redondear entradas a la celda más cercana")
+    parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS)
+    args = parser.parse_args()
+    build_riasec_lut(args.model, args.out, args.lo, args.hi, args.den, args.approx, args.max_cells)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from typing import Annotated
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
+
+from src.inference.inference_core import OCEAN_ITEMS
+
+# ==========================
+# Esquemas de entrada de la API
+# ==========================
+# Formularios RIASEC aceptados (bloques consecutivos por letra, en orden R I A S E C):
+#   6  -> un puntaje por letra (suma de 8 ítems, 0-40)
+#   18 -> 3 ítems Likert (1-5) por letra
+#   48 -> formulario R1..R8, I1..I8, ..., C1..C8 (ítems Likert 1-5)
+# OCEAN: los 20 ítems de train_ocean_model.item_cols (EXT1..OPN4), Likert 1-5.
+# Cada lista se convierte una sola vez a un array float64 y se valida en
+# bloque; un request inválido se rechaza (422) antes de tocar los modelos.
+
+LIKERT_MIN, LIKERT_MAX = 1.0, 5.0
+SCORE_MIN, SCORE_MAX = 0.0, 40.0
+
+RIASEC_FORMS = {
+    6: ("puntajes por letra", SCORE_MIN, SCORE_MAX),
+    18: ("ítems (3 por letra)", LIKERT_MIN, LIKERT_MAX),
+    48: ("ítems R1..C8", LIKERT_MIN, LIKERT_MAX),
+}
+
+Number = Annotated[float, Field(strict=True)]
+
+
+def _check_range(values, lo, hi, what):
+    x = np.asarray(values, dtype=np.float64)
+    bad = np.flatnonzero(~np.isfinite(x) | (x < lo) | (x > hi))
+    if bad.size:
+        i = int(bad[0])
+        raise ValueError(f"{what}: el valor {values[i]} en la posición {i} está fuera del rango [{lo:g}, {hi:g}]")
+    return x
+
+
+class UserInput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    riasec: list[Number] = Field(
+        description="6 puntajes (0-40), 18 ítems o 48 ítems R1..C8 (Likert 1-5)",
+        examples=[[30, 20, 10, 15, 12, 9]],
+    )
+    ocean: list[Number] = Field(
+        min_length=len(OCEAN_ITEMS),
+        max_length=len(OCEAN_ITEMS),
+        description="20 ítems OCEAN en el orden " + ", ".join(OCEAN_ITEMS) + " (Likert 1-5)",
+        examples=[[3] * len(OCEAN_ITEMS)],
+    )
+
+    _riasec_array: np.ndarray = PrivateAttr(default=None)
+    _ocean_array: np.ndarray = PrivateAttr(default=None)
+
+    @field_validator("riasec")
+    @classmethod
+    def _riasec_form(cls, values):
+        form = RIASEC_FORMS.get(len(values))
+        if form is None:
+            raise ValueError(
+                f"Se recibieron {len(values)} valores RIASEC; se aceptan "
+                + ", ".join(f"{n} ({name})" for n, (name, _, _) in RIASEC_FORMS.items())
+            )
+        name, lo, hi = form
+        _check_range(values, lo, hi, f"RIASEC ({name})")
+        return values
+
+    @field_validator("ocean")
+    @classmethod
+    def _ocean_range(cls, values):
+        _check_range(values, LIKERT_MIN, LIKERT_MAX, "OCEAN")
+        return values
+
+    def model_post_init(self, __context):
+        self._riasec_array = np.asarray(self.riasec, dtype=np.float64)
+        self._ocean_array = np.asarray(self.ocean, dtype=np.float64)
+
+    def arrays(self):
+        """(riasec, ocean) ya validados como arrays float64."""
+        return self._riasec_array, self._ocean_array
+
+
+class BatchInput(BaseModel):
+    # Cada ítem se valida por separado en /predict/batch: uno inválido se
+    # reporta en su posición sin rechazar el lote completo
+    items: list[dict] = Field(description="Lista de objetos {riasec, ocean} (uno por estudiante)")
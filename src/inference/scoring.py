@@ -0,0 +1,135 @@
+import numpy as np
+
+from src.inference.affinity_index import load_affinity_index, resolve_label
+
+# ==========================
+# Motor de puntuación híbrida RIASEC + OCEAN
+# ==========================
+# Las carreras que traen perfil RIASEC (6) y OCEAN (5) en el JSON de afinidad
+# quedan en matrices NumPy contiguas. Si todas las candidatas de una consulta
+# tienen perfil, un usuario (o un lote) se puntúa con un producto matricial
+# y el top-k sale de argpartition, sin ordenar todo el catálogo:
+#
+#   score = weight_riasec * cos(riasec_usuario, riasec_carrera)
+#                         * (1 + weight_ocean * <ocean_usuario, ocean_carrera>)
+#
+# Si alguna candidata no trae perfil se usa el puntaje original, idéntico al
+# de antes: weight_riasec * (1 + weight_ocean * promedio(ocean_usuario)),
+# igual para todas, que deja las carreras en el orden del catálogo.
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int32)
+_EMPTY_ROWS.setflags(write=False)
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def top_k(scores, k):
+    """
+    Índices de los k mayores puntajes, de mayor a menor, en O(n).
+    Los empates se resuelven por orden del catálogo (igual que un sort estable).
+    """
+    n = scores.shape[0]
+    if k >= n:
+        return np.lexsort((np.arange(n), -scores))
+    kth = np.argpartition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= scores[kth])
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
+
+class ScoringEngine:
+    """Perfiles del catálogo en matrices contiguas y filas candidatas por etiqueta."""
+
+    def __init__(self, index):
+        self.index = index
+
+        # Catálogo de carreras únicas
+        rows = {}
+        for entries in list(index.by_letter.values()) + list(index.by_sub.values()):
+            for entry in entries:
+                rows.setdefault(entry, len(rows))
+
+        self.catalog = list(rows)
+        riasec = np.zeros((len(self.catalog), 6), dtype=np.float32)
+        ocean = np.zeros((len(self.catalog), 5), dtype=np.float32)
+        profiled = np.zeros(len(self.catalog), dtype=bool)
+        for entry, row in rows.items():
+            if entry.riasec is not None and entry.ocean is not None:
+                riasec[row] = entry.riasec
+                ocean[row] = entry.ocean
+                profiled[row] = True
+
+        self.riasec_matrix = np.ascontiguousarray(_unit_rows(riasec))
+        self.ocean_matrix = np.ascontiguousarray(_unit_rows(ocean))
+        self.profiled = profiled
+
+        # Filas candidatas por letra y por subperfil (mismas reglas que el índice)
+        self.letter_rows = {k: self._rows_of(v, rows) for k, v in index.by_letter.items()}
+        self.sub_rows = {k: self._rows_of(v, rows) for k, v in index.by_sub.items()}
+
+    @staticmethod
+    def _rows_of(entries, rows):
+        ids = np.fromiter((rows[e] for e in entries), dtype=np.int32, count=len(entries))
+        ids.setflags(write=False)
+        return ids
+
+    @property
+    def nbytes(self):
+        return self.riasec_matrix.nbytes + self.ocean_matrix.nbytes + self.profiled.nbytes + self.index.nbytes
+
+    def candidates(self, riasec_label, sub_label):
+        return resolve_label(self.sub_rows, self.letter_rows, riasec_label, sub_label, _EMPTY_ROWS)
+
+    def score(self, riasec_users, ocean_users, rows, weight_riasec=1.2, weight_ocean=0.2):
+        """
+        Puntajes (n_usuarios x n_candidatas) con un producto matricial por perfil.
+        riasec_users: puntajes RIASEC agrupados; ocean_users: rasgos OCEAN (escala 1-5).
+        """
+        users_r = _unit_rows(np.atleast_2d(np.asarray(riasec_users, dtype=np.float32)))
+        users_o = (np.atleast_2d(np.asarray(ocean_users, dtype=np.float32)) - 3.0) / 2.0
+        riasec_fit = users_r @ self.riasec_matrix[rows].T
+        ocean_fit = users_o @ self.ocean_matrix[rows].T
+        return weight_riasec * riasec_fit * (1.0 + weight_ocean * ocean_fit)
+
+    def has_profiles(self, rows):
+        """True si todas las candidatas traen perfil RIASEC y OCEAN propio."""
+        return bool(self.profiled[rows].all())
+
+    def _baseline(self, ocean_users, rows, top_n, weight_riasec, weight_ocean):
+        """Puntaje original: el mismo para todas las candidatas, en orden del catálogo."""
+        results = []
+        for ocean_vector in ocean_users:
+            ocean_boost = sum(float(v) for v in ocean_vector) / len(ocean_vector)
+            score = round(weight_riasec * (1 + weight_ocean * ocean_boost), 3)
+            results.append([
+                {"carrera": entry.carrera, "universidades": list(entry.universidades), "score": score}
+                for entry in (self.catalog[row] for row in rows[:top_n])
+            ])
+        return results
+
+    def recommend(self, riasec_users, ocean_users, rows, top_n=3, weight_riasec=1.2, weight_ocean=0.2):
+        """Top-n de carreras candidatas para cada usuario del lote."""
+        if len(rows) == 0:
+            return [[] for _ in range(len(riasec_users))]
+        if not self.has_profiles(rows):
+            return self._baseline(ocean_users, rows, top_n, weight_riasec, weight_ocean)
+        scores = self.score(riasec_users, ocean_users, rows, weight_riasec, weight_ocean)
+        results = []
+        for user_scores in scores:
+            ranked = []
+            for pos in top_k(user_scores, top_n):
+                entry = self.catalog[rows[pos]]
+                ranked.append({
+                    "carrera": entry.carrera,
+                    "universidades": list(entry.universidades),
+                    "score": round(float(user_scores[pos]), 3)
+                })
+            results.append(ranked)
+        return results
+
+
+def load_scoring_engine(json_path):
+    return ScoringEngine(load_affinity_index(json_path))
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import subprocess
+
+# ==========================
+# Perfil de arranque en frío
+# ==========================
+# 1. Importa la API en un proceso nuevo con `python -X importtime` y resume
+#    los paquetes que más tardan en importarse.
+# 2. En este proceso mide cada fase del arranque: import de la API,
+#    aprovisionamiento, carga de cada artefacto y la primera inferencia.
+# 3. Falla (exit 1) si el total supera --budget-s o si el import de la API
+#    arrastra módulos prohibidos en el camino de inferencia (--forbid).
+#
+# Uso:
+#   python -m src.inference.startup_profile --budget-s 8
+#   python -m src.inference.startup_profile --json > startup.json
+
+DEFAULT_FORBIDDEN = "pandas,fuzzywuzzy,gdown,psutil,matplotlib,seaborn"
+APP_MODULE = "src.inference.api"
+
+
+def import_breakdown(module=APP_MODULE, top=15):
+    """Import de `module` en un proceso limpio: tiempo total, paquetes más lentos y módulos cargados."""
+    code = (
+        "import sys, time, json; t = time.perf_counter(); "
+        f"import {module}; "
+        "print(json.dumps({'wall': time.perf_counter() - t, 'modules': sorted(sys.modules)}))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{proc.stderr[-2000:]}")
+
+    # Líneas: "import time: self [us] | cumulative | <sangría>paquete"
+    packages = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        root = name.strip().split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "wall_s": round(result["wall"], 3),
+        "packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        "modules": result["modules"],
+    }
+
+
+def startup_phases():
+    """Tiempo de cada fase del arranque medido en este proceso (en segundos)."""
+    phases = {}
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        value = fn()
+        phases[name] = round(time.perf_counter() - started, 3)
+        return value
+
+    api = timed("import_api", lambda: __import__(APP_MODULE, fromlist=["app"]))
+    timed("provision", api.ensure_models)
+
+    from src.inference import recommendation_pipeline as pipeline
+    timed("load_riasec_model", lambda: pipeline.get_model("riasec_model"))
+    timed("load_ocean_model", lambda: pipeline.get_model("ocean_model"))
+    timed("load_scoring_engine", pipeline.scoring_engine)
+    timed("load_riasec_lut", pipeline.riasec_lut)
+    timed("first_inference", lambda: pipeline.recommend_career([3.0] * 6, [3.0] * 20, top_n=3))
+    timed("second_inference", lambda: pipeline.recommend_career([4.0] * 6, [2.0] * 20, top_n=3))
+    return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de arranque en frío de la API con presupuesto.")
+    parser.add_argument("--budget-s", type=float, default=float(os.getenv("STARTUP_BUDGET_S", "10")),
+                        help="máximo para import + aprovisionamiento + carga + primera inferencia")
+    parser.add_argument("--import-budget-s", type=float, default=None, help="máximo solo para el import de la API")
+    parser.add_argument("--forbid", default=DEFAULT_FORBIDDEN,
+                        help="módulos que no deben cargarse al importar la API (separados por coma)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    breakdown = import_breakdown(top=args.top)
+    # Con --json, los logs del pipeline van a stderr para no mezclarse con el reporte
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        phases = startup_phases()
+    cold_start = sum(v for k, v in phases.items() if k != "second_inference")
+    forbidden = [m for m in args.forbid.split(",") if m and m in breakdown["modules"]]
+
+    failures = []
+    if cold_start > args.budget_s:
+        failures.append(f"arranque {cold_start:.2f} s > presupuesto {args.budget_s:.2f} s")
+    if args.import_budget_s is not None and breakdown["wall_s"] > args.import_budget_s:
+        failures.append(f"import {breakdown['wall_s']:.2f} s > presupuesto {args.import_budget_s:.2f} s")
+    if forbidden:
+        failures.append(f"módulos prohibidos importados: {', '.join(forbidden)}")
+
+    report = {
+        "import_wall_s": breakdown["wall_s"],
+        "import_packages_ms": breakdown["packages_ms"],
+        "phases_s": phases,
+        "cold_start_s": round(cold_start, 3),
+        "budget_s": args.budget_s,
+        "forbidden_imported": forbidden,
+        "ok": not failures,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\nImport de {APP_MODULE} (proceso limpio): {breakdown['wall_s']:.3f} s")
+        for name, ms in breakdown["packages_ms"].items():
+            print(f"  {name:<28} {ms:>9.1f} ms")
+        print("\nFases del arranque:")
+        for name, seconds in phases.items():
+            print(f"  {name:<28} {seconds * 1000:>9.1f} ms")
+        print(f"\nArranque en frío: {cold_start:.3f} s (presupuesto {args.budget_s:.2f} s)")
+        for failure in failures:
+            print(f"[FALLA] {failure}")
+        if not failures:
+            print("OK")
+
+    sys.exit(0 if not failures else 1)
+
+
+if __name__ == "__main__":
+    main()
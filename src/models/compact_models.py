@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import itertools
+
+import numpy as np
+
+# ==========================
+# Compactación de modelos: candidatos más chicos y su costo en precisión
+# ==========================
+# A partir de riasec_model.pkl y ocean_model.pkl arma candidatos CompactForest
+# combinando:
+#   --trees        fracción de árboles que se conservan (los primeros; en
+#                  OCEAN, por cada una de las 5 salidas)
+#   --depths       profundidad máxima (0 = la del modelo entrenado)
+#   --max-leaves   hojas máximas por árbol (0 = sin tope; poda best-first)
+#   --dtypes       umbrales y valores de hoja en float32 o float16
+# Para cada candidato (y para el modelo de sklearn como referencia) reporta:
+#   - accuracy en data/data_test_reduced.csv (RIASEC) o R² promedio en el
+#     holdout OCEAN, rearmado igual que en train_ocean_model.py
+#   - tamaño en disco (.forest.npz y .forest.map) y memoria residente de los arrays
+#   - latencia de predict: p50 de una fila y de un lote de 256 filas
+# Los candidatos no reemplazan nada salvo que se pida con --install.
+#
+# Uso:
+#   python -m src.models.compact_models
+#   python -m src.models.compact_models --trees 1,0.3 --depths 0,10 --dtypes float16 --json compact.json
+#   python -m src.models.compact_models --install riasec_model=t45-d10-f32   # deja ese candidato para servir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RIASEC_COLS = ["R", "I", "A", "S", "E", "C"]
+OCEAN_TARGETS = ["Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism"]
+
+
+# ==========================
+# Datos de evaluación
+# ==========================
+
+def riasec_test_set(csv_path):
+    """X (puntajes por letra, como train_riasec.calcular_scores) e y (letra dominante)."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    X = pd.DataFrame({c: df[[k for k in df.columns if k.startswith(c)]].sum(axis=1) for c in RIASEC_COLS})
+    return X, X.idxmax(axis=1).astype(str).to_numpy()
+
+
+def ocean_holdout(items_path, scores_path):
+    """Mismo X_test/y_test que train_ocean_model.py (muestreo y split con random_state=42)."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from src.inference.inference_core import OCEAN_ITEMS
+
+    df_items = pd.read_csv(items_path, sep="\t")
+    df_ocean = pd.read_csv(scores_path)
+    df_full = pd.concat([df_items[OCEAN_ITEMS], df_ocean[OCEAN_TARGETS]], axis=1).dropna()
+    df_full = df_full.sample(n=min(50000, len(df_full)), random_state=42)
+    _, X_test, _, y_test = train_test_split(
+        df_full[OCEAN_ITEMS], df_full[OCEAN_TARGETS], test_size=0.2, random_state=42
+    )
+    return X_test, y_test.to_numpy()
+
+
+def score(model, kind, X, y):
+    """Accuracy (clasificador) o R² promedio (regresor)."""
+    from sklearn.metrics import accuracy_score, r2_score
+
+    pred = model.predict(X)
+    if kind == "classifier":
+        return float(accuracy_score(y, np.asarray(pred).astype(str)))
+    return float(r2_score(y, np.asarray(pred).reshape(len(y), -1), multioutput="uniform_average"))
+
+
+# ==========================
+# Mediciones
+# ==========================
+
+def latency(model, X, repeat=200, batch=256):
+    """(p50 ms de una fila, p50 ms de un lote de `batch` filas)."""
+    X = np.asarray(X, dtype=np.float32)
+    single = X[:1]
+    lot = X[np.arange(batch) % len(X)]
+    model.predict(single)  # calienta cachés
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        model.predict(single)
+        timings.append(time.perf_counter() - t0)
+    batch_timings = []
+    for _ in range(max(5, repeat // 20)):
+        t0 = time.perf_counter()
+        model.predict(lot)
+        batch_timings.append(time.perf_counter() - t0)
+    return float(np.median(timings) * 1000), float(np.median(batch_timings) * 1000)
+
+
+def sklearn_nbytes(model):
+    """Bytes de los árboles de un modelo de sklearn (nodos + valores)."""
+    estimators = model.estimators_
+    if hasattr(estimators[0], "estimators_"):
+        estimators = [est for forest in estimators for est in forest.estimators_]
+    total = 0
+    for est in estimators:
+        state = est.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+def n_estimators(model):
+    """Árboles por salida del modelo entrenado."""
+    first = model.estimators_[0]
+    return len(first.estimators_) if hasattr(first, "estimators_") else len(model.estimators_)
+
+
+def model_depth(model):
+    estimators = model.estimators_
+    if hasattr(estimators[0], "estimators_"):
+        estimators = [est for forest in estimators for est in forest.estimators_]
+    return max(est.get_depth() for est in estimators)
+
+
+def candidate_grid(n_trees_total, depth_total, trees, depths, leaves, dtypes):
+    """(etiqueta, kwargs de export_forest) por combinación de la grilla, sin repetidos."""
+    # Un tope de profundidad igual o mayor a la del modelo no cambia nada
+    depths = sorted({d if d and d < depth_total else 0 for d in depths}, key=lambda d: -(d or depth_total + 1))
+    grid = []
+    for fraction, depth, max_leaves, dtype in itertools.product(trees, depths, leaves, dtypes):
+        n_trees = max(1, int(round(n_trees_total * fraction)))
+        label = f"t{n_trees}" + (f"-d{depth}" if depth else "") + (f"-l{max_leaves}" if max_leaves else "") \
+            + ("-f16" if dtype == "float16" else "-f32")
+        grid.append((label, {
+            "n_trees": n_trees,
+            "max_depth": depth or None,
+            "max_leaves": max_leaves or None,
+            "value_dtype": np.dtype(dtype),
+            "threshold_dtype": np.dtype(dtype),
+        }))
+    return grid
+
+
+def evaluate_model(name, model, data, grid, work_dir, out_dir=None):
+    """Filas del reporte: referencia sklearn + un candidato por entrada de `grid`."""
+    from src.inference.compact_forest import MAPPED_SUFFIX, export_forest, forest_path
+
+    kind = "classifier" if hasattr(model, "predict_proba") else "regressor"
+    X, y = data if data is not None else (None, None)
+    X_bench = X.to_numpy() if X is not None else np.random.default_rng(0).integers(
+        1, 6, size=(256, int(getattr(model, "n_features_in_", 0) or model.estimators_[0].n_features_in_))
+    )
+
+    rows = []
+    pkl = os.path.join(work_dir, name + ".pkl")
+    import joblib
+    joblib.dump(model, pkl, compress=3)
+    single_ms, batch_ms = latency(model, X if X is not None else X_bench, repeat=50)
+    rows.append({
+        "model": name,
+        "candidate": "sklearn",
+        "metric": score(model, kind, X, y) if X is not None else None,
+        "trees": n_estimators(model),
+        "max_depth": None,
+        "nodes": None,
+        "pickle_mb": os.path.getsize(pkl) / 1024 / 1024,
+        "npz_mb": None,
+        "map_mb": None,
+        "resident_mb": sklearn_nbytes(model) / 1024 / 1024,
+        "predict_1_ms": single_ms,
+        "predict_256_ms": batch_ms,
+    })
+
+    for label, options in grid:
+        forest = export_forest(model, **options)
+        forest.meta["compaction"] = {k: (str(v) if isinstance(v, np.dtype) else v) for k, v in options.items()}
+        base = os.path.join(out_dir or work_dir, f"{name}.{label}.pkl")
+        npz, mapped = forest_path(base), forest_path(base, MAPPED_SUFFIX)
+        forest.save(npz)
+        forest.save_mapped(mapped)
+        single_ms, batch_ms = latency(forest, X_bench)
+        rows.append({
+            "model": name,
+            "candidate": label,
+            "metric": score(forest, kind, X_bench, y) if X is not None else None,
+            "trees": options["n_trees"],
+            "max_depth": forest.max_depth,
+            "nodes": int(len(forest._feature)),
+            "pickle_mb": None,
+            "npz_mb": os.path.getsize(npz) / 1024 / 1024,
+            "map_mb": os.path.getsize(mapped) / 1024 / 1024,
+            "resident_mb": forest.nbytes / 1024 / 1024,
+            "predict_1_ms": single_ms,
+            "predict_256_ms": batch_ms,
+        })
+        print(f"[COMPACT] {name} {label}: {rows[-1]['nodes']:,} nodos", file=sys.stderr)
+    return rows
+
+
+def print_table(rows):
+    fmt = lambda v, spec: "-" if v is None else format(v, spec)  # noqa: E731
+    print(f"{'modelo':<14} {'candidato':<18} {'métrica':>8} {'árboles':>8} {'prof.':>6} {'nodos':>10} "
+          f"{'pkl MB':>7} {'npz MB':>7} {'map MB':>7} {'RAM MB':>7} {'1 fila ms':>10} {'256 ms':>8}")
+    for r in rows:
+        print(f"{r['model']:<14} {r['candidate']:<18} {fmt(r['metric'], '.4f'):>8} {r['trees']:>8} "
+              f"{fmt(r['max_depth'], 'd'):>6} {fmt(r['nodes'], ',d'):>10} {fmt(r['pickle_mb'], '.2f'):>7} "
+              f"{fmt(r['npz_mb'], '.2f'):>7} {fmt(r['map_mb'], '.2f'):>7} {r['resident_mb']:>7.2f} "
+              f"{r['predict_1_ms']:>10.3f} {r['predict_256_ms']:>8.2f}")
+
+
+def install(models_dir, name, label, grid, model):
+    """Exporta el candidato `label` como el bosque que sirven los backends compact y mapped."""
+    from src.inference.compact_forest import MAPPED_SUFFIX, export_forest, forest_path
+
+    options = dict(grid).get(label)
+    if options is None:
+        raise SystemExit(f"[ERROR] {label} no está en la grilla de candidatos de {name}")
+    forest = export_forest(model, **options)
+    forest.meta["compaction"] = {k: (str(v) if isinstance(v, np.dtype) else v) for k, v in options.items()}
+    pkl = os.path.join(models_dir, name + ".pkl")
+    forest.save(forest_path(pkl))
+    forest.save_mapped(forest_path(pkl, MAPPED_SUFFIX))
+    print(f"[INSTALL] {name} ← {label}: {forest_path(pkl)} y {forest_path(pkl, MAPPED_SUFFIX)}")
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",") if v]
+
+
+def _ints(text):
+    return [int(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candidatos compactos de los bosques con su precisión, tamaño y latencia.")
+    parser.add_argument("--models-dir", default=os.getenv("MODELS_DIR", os.path.join(ROOT, "models")))
+    parser.add_argument("--models", default="riasec_model,ocean_model")
+    parser.add_argument("--riasec-test", default=os.path.join(ROOT, "data", "data_test_reduced.csv"))
+    parser.add_argument("--ocean-items", default=os.path.join(ROOT, "data", "data-big-five.csv"))
+    parser.add_argument("--ocean-scores", default=os.path.join(ROOT, "data", "bigfive_dataset_clean.csv"))
+    parser.add_argument("--trees", type=_floats, default=[1.0, 0.5, 0.25], help="fracciones de árboles")
+    parser.add_argument("--depths", type=_ints, default=[0, 12, 10, 8], help="profundidades máximas (0 = sin tope)")
+    parser.add_argument("--max-leaves", type=_ints, default=[0], help="hojas máximas por árbol (0 = sin tope)")
+    parser.add_argument("--dtypes", type=lambda t: t.split(","), default=["float32", "float16"])
+    parser.add_argument("--out-dir", help="guarda cada candidato como <modelo>.<candidato>.forest.{npz,map}")
+    parser.add_argument("--install", action="append", default=[], metavar="MODELO=CANDIDATO",
+                        help="exporta ese candidato como <modelo>.forest.npz/.forest.map en --models-dir")
+    parser.add_argument("--json", metavar="RUTA", help="guarda el reporte en RUTA")
+    args = parser.parse_args()
+
+    for dtype in args.dtypes:
+        if dtype not in ("float32", "float16"):
+            parser.error(f"dtype no soportado: {dtype}")
+
+    import joblib
+
+    loaders = {
+        "riasec_model": (lambda: riasec_test_set(args.riasec_test), [args.riasec_test]),
+        "ocean_model": (lambda: ocean_holdout(args.ocean_items, args.ocean_scores), [args.ocean_items, args.ocean_scores]),
+    }
+    installs = dict(i.split("=", 1) for i in args.install)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="compact-models-") as work_dir:
+        for name in [m for m in args.models.split(",") if m]:
+            model = joblib.load(os.path.join(args.models_dir, name + ".pkl"))
+            grid = candidate_grid(n_estimators(model), model_depth(model), args.trees, args.depths, args.max_leaves, args.dtypes)
+
+            load, paths = loaders.get(name, (None, []))
+            data = None
+            if load is not None and all(os.path.exists(p) for p in paths):
+                data = load()
+            else:
+                print(f"[WARN] Sin datos de evaluación para {name}; se reporta solo tamaño y latencia", file=sys.stderr)
+
+            rows.extend(evaluate_model(name, model, data, grid, work_dir, args.out_dir))
+            if name in installs:
+                install(args.models_dir, name, installs[name], grid, model)
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nReporte en {args.json}")
+    if installs:
+        print("Si cambió algún artefacto: python -m src.inference.provisioning --write-manifest models/manifest.json")
+
+
+if __name__ == "__main__":
+    main()
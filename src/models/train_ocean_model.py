@@ -1,4 +1,7 @@
 # src/models/train_ocean_model.py
+import argparse
+import time
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
@@ -7,6 +10,19 @@ from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 import os
 
+# Tipos de modelo:
+#   joint      un solo RandomForestRegressor multisalida: cada hoja guarda los
+#              5 rasgos, así que predecir recorre 30 árboles en vez de 5×30
+#   per-trait  MultiOutputRegressor: un bosque independiente por rasgo (el anterior)
+# --compare entrena los dos y muestra el R² por rasgo, nodos y tiempo de predict;
+# se guarda el elegido con --model. El servicio carga cualquiera de los dos.
+# joint comparte los cortes entre rasgos: conviene solo si en --compare no
+# pierde R² frente a per-trait con los datos reales.
+parser = argparse.ArgumentParser(description="Entrena el modelo OCEAN sobre 20 ítems.")
+parser.add_argument("--model", choices=["joint", "per-trait"], default="per-trait")
+parser.add_argument("--compare", action="store_true", help="entrena ambos tipos y compara")
+args = parser.parse_args()
+
 # ==========================
 # 1. Cargar dataset
 # ==========================
@@ -67,24 +83,49 @@ print(f"Train: {X_train.shape}, Test: {X_test.shape}")
 # ==========================
 # 5. Entrenar modelo
 # ==========================
-model = MultiOutputRegressor(RandomForestRegressor(
-    n_estimators=30,
-    max_depth=15,
-    random_state=42,
-    n_jobs=-1
-))
+def build_model(kind):
+    forest = RandomForestRegressor(
+        n_estimators=30,
+        max_depth=15,
+        random_state=42,
+        n_jobs=-1
+    )
+    return forest if kind == "joint" else MultiOutputRegressor(forest)
+
 
-print("Entrenando modelo OCEAN con 20 ítems...")
-model.fit(X_train, y_train)
+def forest_trees(model):
+    if isinstance(model, MultiOutputRegressor):
+        return [est for forest in model.estimators_ for est in forest.estimators_]
+    return list(model.estimators_)
+
+
+kinds = ["joint", "per-trait"] if args.compare else [args.model]
+models = {}
+for kind in kinds:
+    print(f"Entrenando modelo OCEAN ({kind}) con 20 ítems...")
+    models[kind] = build_model(kind).fit(X_train, y_train)
 
 # ==========================
 # 6. Evaluación
 # ==========================
-y_pred = model.predict(X_test)
-
-print("\nMSE:", mean_squared_error(y_test, y_pred))
-print("R2 Score (por dimensión):", r2_score(y_test, y_pred, multioutput="raw_values"))
-print("R2 Promedio:", r2_score(y_test, y_pred, multioutput="uniform_average"))
+for kind, candidate in models.items():
+    y_pred = candidate.predict(X_test)
+    trees = forest_trees(candidate)
+    # Holdouts chicos: no pedir filas que no existen (iloc vacío hace fallar a sklearn)
+    n = min(200, len(X_test))
+    started = time.perf_counter()
+    for i in range(n):
+        candidate.predict(X_test.iloc[i:i + 1])
+    single_ms = (time.perf_counter() - started) / max(n, 1) * 1000
+
+    print(f"\n=== {kind} ===")
+    print("MSE:", mean_squared_error(y_test, y_pred))
+    print("R2 Score (por dimensión):", {t: round(float(v), 4) for t, v in zip(y.columns, r2_score(y_test, y_pred, multioutput="raw_values"))})
+    print("R2 Promedio:", r2_score(y_test, y_pred, multioutput="uniform_average"))
+    print(f"Árboles recorridos por predicción: {len(trees)} | nodos: {sum(t.tree_.node_count for t in trees):,} "
+          f"| predict de 1 fila: {single_ms:.2f} ms")
+
+model = models[args.model]
 
 # ==========================
 # 7. Guardar modelo
@@ -92,4 +133,6 @@ print("R2 Promedio:", r2_score(y_test, y_pred, multioutput="uniform_average"))
 os.makedirs("../../models", exist_ok=True)
 joblib.dump(model, "../../models/ocean_model.pkl")
 
-print("\nModelo OCEAN guardado en ../../models/ocean_model.pkl")
+print(f"\nModelo OCEAN ({args.model}) guardado en ../../models/ocean_model.pkl")
+print("Si se sirve con INFERENCE_BACKEND=compact/mapped/onnx, volver a exportar: "
+      "python -m src.inference.compact_forest --format both / python export_onnx.py")
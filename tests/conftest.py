@@ -0,0 +1,74 @@
+import os
+import sys
+import importlib
+import contextlib
+
+import pytest
+
+# Los tests importan `src.inference...` igual que `python -m` desde la raíz del repo
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def fixture_models_dir(tmp_path_factory):
+    """Artefactos sintéticos de benchmarks/fixtures.py (se construyen una vez por sesión)."""
+    from benchmarks.fixtures import build_fixtures
+
+    models_dir = str(tmp_path_factory.mktemp("models"))
+    with contextlib.redirect_stdout(sys.stderr):
+        build_fixtures(models_dir)
+    return models_dir
+
+
+@pytest.fixture(scope="session")
+def pipeline(fixture_models_dir):
+    """recommendation_pipeline importado con MODELS_DIR apuntando a los fixtures."""
+    os.environ["MODELS_DIR"] = fixture_models_dir
+    module = sys.modules.get("src.inference.recommendation_pipeline")
+    if module is None or module.MODELS_DIR != fixture_models_dir:
+        module = importlib.reload(module) if module else importlib.import_module("src.inference.recommendation_pipeline")
+    return module
+
+
+# ==========================
+# Bosques chicos de sklearn para las pruebas de paridad de backends
+# ==========================
+
+RIASEC_COLS = ["R", "I", "A", "S", "E", "C"]
+
+
+@pytest.fixture(scope="session")
+def riasec_forest():
+    """RandomForestClassifier sobre puntajes RIASEC enteros (0..40), con nombres de columnas."""
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.integers(0, 41, size=(600, 6)), columns=RIASEC_COLS)
+    y = X.to_numpy().argmax(axis=1)
+    noisy = rng.random(len(y)) < 0.1
+    y[noisy] = rng.integers(0, 6, noisy.sum())
+    return RandomForestClassifier(n_estimators=12, max_depth=9, random_state=0).fit(X, np.array(RIASEC_COLS)[y])
+
+
+@pytest.fixture(scope="session", params=["multi_output_forest", "multioutput_regressor"])
+def ocean_forest(request):
+    """Regresor OCEAN de 5 salidas sobre ítems 1..5: un bosque multisalida o un MultiOutputRegressor."""
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.multioutput import MultiOutputRegressor
+    from src.inference.inference_core import OCEAN_ITEMS
+
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.integers(1, 6, size=(600, 20)), columns=OCEAN_ITEMS)
+    blocks = X.to_numpy().reshape(len(X), 5, 4).mean(axis=2)
+    y = blocks + rng.normal(0, 0.3, blocks.shape)
+    if request.param == "multi_output_forest":
+        model = RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0)
+    else:
+        model = MultiOutputRegressor(RandomForestRegressor(n_estimators=6, max_depth=8, random_state=0))
+    return model.fit(X, y)
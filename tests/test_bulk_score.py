@@ -0,0 +1,143 @@
+import os
+import csv
+import json
+import argparse
+
+import numpy as np
+import pytest
+
+from src.inference import bulk_score
+from src.inference.bulk_score import RIASEC_FORMS, resolve_columns
+from src.inference.inference_core import OCEAN_ITEMS
+
+N_ROWS = 23
+CHUNK = 5
+
+
+# ==========================
+# Detección de columnas
+# ==========================
+
+@pytest.mark.parametrize("form", ["scores", "items48", "items18"])
+def test_resolve_columns_detects_each_riasec_form(form):
+    header = ["nombre"] + OCEAN_ITEMS[::-1] + RIASEC_FORMS[form]
+    columns = resolve_columns(header)
+    assert columns["form"] == form
+    assert [header[i] for i in columns["riasec"]] == RIASEC_FORMS[form]
+    # OCEAN en el orden de entrenamiento aunque el archivo lo traiga al revés
+    assert [header[i] for i in columns["ocean"]] == OCEAN_ITEMS
+    assert columns["id"] is None
+
+
+def test_resolve_columns_prefers_scores_and_finds_the_id():
+    header = RIASEC_FORMS["items48"] + RIASEC_FORMS["scores"] + OCEAN_ITEMS + ["id", "legajo"]
+    columns = resolve_columns(header)
+    assert columns["form"] == "scores"
+    assert header[columns["id"]] == "id"
+    assert header[resolve_columns(header, id_column="legajo")["id"]] == "legajo"
+
+
+def test_resolve_columns_errors():
+    with pytest.raises(ValueError, match="RIASEC"):
+        resolve_columns(RIASEC_FORMS["scores"][:5] + OCEAN_ITEMS)
+    with pytest.raises(ValueError, match="OCEAN: EXT1"):
+        resolve_columns(RIASEC_FORMS["scores"] + OCEAN_ITEMS[1:])
+    with pytest.raises(ValueError, match="legajo"):
+        resolve_columns(RIASEC_FORMS["scores"] + OCEAN_ITEMS, id_column="legajo")
+
+
+# ==========================
+# Corridas completas y reanudación
+# ==========================
+
+@pytest.fixture
+def cohort(tmp_path, pipeline):
+    """CSV de 18 ítems con id; la fila 7 tiene un ítem OCEAN fuera de rango."""
+    rng = np.random.default_rng(3)
+    path = tmp_path / "cohorte.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id"] + RIASEC_FORMS["items18"] + OCEAN_ITEMS)
+        for i in range(N_ROWS):
+            ocean = rng.integers(1, 6, 20).tolist()
+            if i == 7:
+                ocean[0] = 9
+            writer.writerow([f"s{i:03d}"] + rng.integers(1, 6, 18).tolist() + ocean)
+    return path
+
+
+def _args(input_path, output_path, workers=1, overwrite=False):
+    return argparse.Namespace(
+        input=str(input_path), output=str(output_path), chunk_size=CHUNK, workers=workers,
+        id_column=None, top_n=3, weight_riasec=1.2, weight_ocean=0.2, overwrite=overwrite,
+    )
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_full_run_scores_every_row_in_order(cohort, tmp_path, pipeline):
+    out = tmp_path / "out.csv"
+    bulk_score.run(_args(cohort, out))
+    rows = _read_csv(out)
+    assert [r["id"] for r in rows] == [f"s{i:03d}" for i in range(N_ROWS)]
+    assert rows[7]["status"] == "error" and "ocean" in rows[7]["error"]
+    assert all(r["status"] == "ok" for i, r in enumerate(rows) if i != 7)
+    assert not os.path.exists(str(out) + ".progress.json")
+
+
+def test_multi_process_run_writes_chunks_in_order(cohort, tmp_path, pipeline):
+    single, multi = tmp_path / "single.jsonl", tmp_path / "multi.jsonl"
+    bulk_score.run(_args(cohort, single))
+    bulk_score.run(_args(cohort, multi, workers=2))
+    assert multi.read_bytes() == single.read_bytes()
+    ids = [json.loads(line)["id"] for line in multi.read_text(encoding="utf-8").splitlines()]
+    assert ids == [f"s{i:03d}" for i in range(N_ROWS)]
+
+
+def test_resume_continues_from_the_saved_offset(cohort, tmp_path, pipeline, monkeypatch):
+    reference = tmp_path / "reference.csv"
+    bulk_score.run(_args(cohort, reference))
+
+    out = tmp_path / "out.csv"
+    progress_path = str(out) + ".progress.json"
+    real_score_chunk = bulk_score.score_chunk
+    scored = []
+
+    def crash_on_third_chunk(chunk_index, *rest):
+        if chunk_index == 2:
+            raise KeyboardInterrupt
+        scored.append(chunk_index)
+        return real_score_chunk(chunk_index, *rest)
+
+    monkeypatch.setattr(bulk_score, "score_chunk", crash_on_third_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        bulk_score.run(_args(cohort, out))
+    with open(progress_path, encoding="utf-8") as f:
+        progress = json.load(f)
+    assert progress["chunks_done"] == 2 and progress["rows_done"] == 2 * CHUNK
+    assert progress["bytes"] == os.path.getsize(out)
+
+    # Un bloque escrito a medias antes de la caída se descarta al reanudar
+    with open(out, "ab") as f:
+        f.write(b"s010,ok,R,a medio escri")
+
+    scored.clear()
+    monkeypatch.setattr(bulk_score, "score_chunk", lambda i, *rest: (scored.append(i), real_score_chunk(i, *rest))[1])
+    bulk_score.run(_args(cohort, out))
+    assert scored == [2, 3, 4]
+    assert out.read_bytes() == reference.read_bytes()
+    assert not os.path.exists(progress_path)
+
+
+def test_progress_from_other_input_is_rejected(cohort, tmp_path, pipeline):
+    out = tmp_path / "out.csv"
+    with open(str(out) + ".progress.json", "w", encoding="utf-8") as f:
+        json.dump({"signature": {"input": "otro.csv"}, "chunk_size": CHUNK, "top_n": 3,
+                   "chunks_done": 1, "rows_done": 5, "bytes": 0}, f)
+    with pytest.raises(SystemExit, match="overwrite"):
+        bulk_score.run(_args(cohort, out))
+    bulk_score.run(_args(cohort, out, overwrite=True))
+    assert len(_read_csv(out)) == N_ROWS
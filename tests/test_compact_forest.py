@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from src.inference.compact_forest import CompactForest, check_parity, export_forest
+from src.inference.inference_core import OCEAN_ITEMS
+
+RIASEC_COLS = ["R", "I", "A", "S", "E", "C"]
+
+# Umbrales float32 "floor" y valores float32: mismo recorrido que sklearn,
+# solo cambia el redondeo de las hojas
+TOL_F32 = 1e-5
+
+
+def _grid_rows(n_features, lo, hi, n=400, seed=7):
+    """Respuestas enteras, como en producción."""
+    return np.random.default_rng(seed).integers(lo, hi + 1, size=(n, n_features)).astype(np.float32)
+
+
+def _float_rows(n_features, lo, hi, n=400, seed=8):
+    return np.random.default_rng(seed).uniform(lo, hi, size=(n, n_features)).astype(np.float32)
+
+
+def _with_thresholds(model, X):
+    """Agrega filas con cada feature exactamente en un umbral del primer árbol."""
+    first = model.estimators_[0]
+    tree = (first.estimators_[0] if hasattr(first, "estimators_") else first).tree_
+    internal = np.flatnonzero(tree.children_left != -1)
+    rows = np.repeat(X[:1], len(internal), axis=0)
+    rows[np.arange(len(internal)), tree.feature[internal]] = tree.threshold[internal].astype(np.float32)
+    return np.vstack([X, rows])
+
+
+def _reg_predict(model, X):
+    return np.asarray(model.predict(pd.DataFrame(X, columns=OCEAN_ITEMS)), dtype=np.float64).reshape(len(X), -1)
+
+
+def test_classifier_matches_sklearn(riasec_forest):
+    forest = export_forest(riasec_forest)
+    for X in (_grid_rows(6, 0, 40), _with_thresholds(riasec_forest, _float_rows(6, -1, 41))):
+        df = pd.DataFrame(X, columns=RIASEC_COLS)
+        np.testing.assert_allclose(forest.predict_proba(X), riasec_forest.predict_proba(df), rtol=0, atol=TOL_F32)
+        assert (forest.predict(X) == riasec_forest.predict(df)).all()
+
+
+def test_regressor_matches_sklearn(ocean_forest):
+    forest = export_forest(ocean_forest)
+    for X in (_grid_rows(20, 1, 5), _with_thresholds(ocean_forest, _float_rows(20, 0.5, 5.5))):
+        np.testing.assert_allclose(forest.predict(X), _reg_predict(ocean_forest, X), rtol=0, atol=TOL_F32)
+
+
+def test_feature_names_and_classes_are_kept(riasec_forest, ocean_forest):
+    forest = export_forest(riasec_forest)
+    assert list(forest.feature_names_in_) == RIASEC_COLS
+    assert list(forest.classes_) == [str(c) for c in riasec_forest.classes_]
+    assert list(export_forest(ocean_forest).feature_names_in_) == OCEAN_ITEMS
+
+
+def test_npz_round_trip_is_bit_identical(riasec_forest, ocean_forest, tmp_path):
+    for name, model, X in (("riasec", riasec_forest, _grid_rows(6, 0, 40)),
+                           ("ocean", ocean_forest, _grid_rows(20, 1, 5))):
+        forest = export_forest(model)
+        path = tmp_path / f"{name}.forest.npz"
+        forest.save(path)
+        np.testing.assert_array_equal(CompactForest.load(path)._raw_predict(X), forest._raw_predict(X))
+
+
+def test_batch_result_does_not_depend_on_batch_size(ocean_forest):
+    forest = export_forest(ocean_forest)
+    X = _grid_rows(20, 1, 5, n=50)
+    whole = forest.predict(X)
+    np.testing.assert_array_equal(np.vstack([forest.predict(X[i:i + 1]) for i in range(len(X))]), whole)
+
+
+def test_check_parity_reports_ok(riasec_forest, ocean_forest):
+    ok, report = check_parity(riasec_forest, export_forest(riasec_forest),
+                              pd.DataFrame(_grid_rows(6, 0, 40), columns=RIASEC_COLS))
+    assert ok and report["label_agreement"] == 1.0
+    ok, report = check_parity(ocean_forest, export_forest(ocean_forest),
+                              pd.DataFrame(_grid_rows(20, 1, 5), columns=OCEAN_ITEMS))
+    assert ok and report["max_abs_diff"] <= TOL_F32
@@ -0,0 +1,132 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from src.inference.compact_forest import export_forest
+from src.inference.inference_core import OCEAN_ITEMS
+from src.models.compact_models import candidate_grid, model_depth, n_estimators
+
+RIASEC_COLS = ["R", "I", "A", "S", "E", "C"]
+
+# Tolerancias explícitas (diferencia absoluta máxima frente a sklearn)
+TOL_F32 = 1e-5         # poda sin cambio de dtype: mismo recorrido, solo redondeo de hojas
+TOL_F16_PROBA = 1e-3   # probabilidades en [0, 1] con valores float16 (paso 2^-11 cerca de 1)
+TOL_F16_VALUE = 4e-3   # regresión OCEAN en [1, 5] con valores float16 (paso 2^-8 entre 4 y 8)
+
+
+def _grid_rows(n_features, lo, hi, n=400, seed=7):
+    """Respuestas enteras: con umbrales float16 el recorrido solo coincide con sklearn en la grilla."""
+    return np.random.default_rng(seed).integers(lo, hi + 1, size=(n, n_features)).astype(np.float32)
+
+
+def _sk(model, X, columns):
+    return pd.DataFrame(X, columns=columns)
+
+
+def _reg_predict(model, X):
+    return np.asarray(model.predict(_sk(model, X, OCEAN_ITEMS)), dtype=np.float64).reshape(len(X), -1)
+
+
+# ==========================
+# Variantes float16
+# ==========================
+
+def test_float16_classifier_within_tolerance(riasec_forest):
+    forest = export_forest(riasec_forest, value_dtype=np.float16, threshold_dtype=np.float16)
+    assert forest.arrays["value"].dtype == np.float16 and forest.arrays["threshold"].dtype == np.float16
+    X = _grid_rows(6, 0, 40)
+    expected = riasec_forest.predict_proba(_sk(riasec_forest, X, RIASEC_COLS))
+    np.testing.assert_allclose(forest.predict_proba(X), expected, rtol=0, atol=TOL_F16_PROBA)
+    # La etiqueta solo puede cambiar si las dos mejores clases están a menos de la tolerancia
+    top2 = np.sort(expected, axis=1)[:, -2:]
+    clear = top2[:, 1] - top2[:, 0] > 2 * TOL_F16_PROBA
+    labels = riasec_forest.predict(_sk(riasec_forest, X, RIASEC_COLS))
+    assert (forest.predict(X)[clear] == labels[clear]).all()
+
+
+def test_float16_regressor_within_tolerance(ocean_forest):
+    forest = export_forest(ocean_forest, value_dtype=np.float16, threshold_dtype=np.float16)
+    X = _grid_rows(20, 1, 5)
+    np.testing.assert_allclose(forest.predict(X), _reg_predict(ocean_forest, X), rtol=0, atol=TOL_F16_VALUE)
+
+
+# ==========================
+# Variantes podadas
+# ==========================
+
+def _first_trees(model, k):
+    """Copia de sklearn con solo los primeros k árboles (por salida)."""
+    model = copy.deepcopy(model)
+    if hasattr(model.estimators_[0], "estimators_"):
+        for forest in model.estimators_:
+            forest.estimators_ = forest.estimators_[:k]
+            forest.n_estimators = k
+    else:
+        model.estimators_ = model.estimators_[:k]
+        model.n_estimators = k
+    return model
+
+
+def test_fewer_trees_match_truncated_sklearn(riasec_forest, ocean_forest):
+    X6, X20 = _grid_rows(6, 0, 40), _grid_rows(20, 1, 5)
+    small = _first_trees(riasec_forest, 5)
+    np.testing.assert_allclose(export_forest(riasec_forest, n_trees=5).predict_proba(X6),
+                               small.predict_proba(_sk(small, X6, RIASEC_COLS)), rtol=0, atol=TOL_F32)
+    small = _first_trees(ocean_forest, 3)
+    np.testing.assert_allclose(export_forest(ocean_forest, n_trees=3).predict(X20),
+                               _reg_predict(small, X20), rtol=0, atol=TOL_F32)
+
+
+def _depth_capped_proba(model, X, max_depth):
+    """Referencia con sklearn: valor del nodo del camino de decisión a profundidad max_depth."""
+    # Los árboles internos se entrenaron sin nombres de columnas: reciben el array
+    total = np.zeros((len(X), len(model.classes_)))
+    for est in model.estimators_:
+        paths = est.decision_path(X)
+        value = est.tree_.value[:, 0, :]
+        value = value / value.sum(axis=1, keepdims=True)
+        for i in range(len(X)):
+            # Los ids crecen con la profundidad a lo largo de un camino
+            path = paths.indices[paths.indptr[i]:paths.indptr[i + 1]]
+            total[i] += value[np.sort(path)[min(max_depth, len(path) - 1)]]
+    return total / len(model.estimators_)
+
+
+def test_depth_capped_classifier_matches_decision_path(riasec_forest):
+    X = _grid_rows(6, 0, 40, n=150)
+    forest = export_forest(riasec_forest, max_depth=4)
+    assert forest.max_depth == 4
+    np.testing.assert_allclose(forest.predict_proba(X), _depth_capped_proba(riasec_forest, X, 4),
+                               rtol=0, atol=TOL_F32)
+
+
+def test_max_leaves_caps_leaves_per_tree(riasec_forest):
+    X6 = _grid_rows(6, 0, 40, n=2000)
+    forest = export_forest(riasec_forest, max_leaves=8)
+    leaves = forest.apply(X6)
+    assert max(len(np.unique(leaves[:, t])) for t in range(forest.n_trees)) <= 8
+
+    # Con un tope mayor que las hojas reales no se poda nada
+    unbounded = max(est.tree_.n_leaves for est in riasec_forest.estimators_)
+    X = _grid_rows(6, 0, 40)
+    np.testing.assert_array_equal(export_forest(riasec_forest, max_leaves=unbounded).predict_proba(X),
+                                  export_forest(riasec_forest).predict_proba(X))
+
+
+# ==========================
+# Grilla de candidatos
+# ==========================
+
+def test_candidate_grid_labels_and_dedup(riasec_forest):
+    total, depth = n_estimators(riasec_forest), model_depth(riasec_forest)
+    grid = dict(candidate_grid(total, depth, trees=[1.0, 0.5], depths=[0, depth, depth + 3, 4],
+                               leaves=[0], dtypes=["float32", "float16"]))
+    # Topes de profundidad >= la del modelo equivalen a no podar
+    assert sorted(grid) == sorted([f"t{total}-f32", f"t{total}-f16", f"t{total}-d4-f32", f"t{total}-d4-f16",
+                                   "t6-f32", "t6-f16", "t6-d4-f32", "t6-d4-f16"])
+    options = grid["t6-d4-f16"]
+    assert options["n_trees"] == 6 and options["max_depth"] == 4
+    assert options["value_dtype"] == np.float16 and options["threshold_dtype"] == np.float16
+    forest = export_forest(riasec_forest, **options)
+    assert forest.n_trees == 6 and forest.max_depth == 4
@@ -0,0 +1,64 @@
+import json
+import threading
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import compress_models
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    rng = np.random.default_rng(0)
+    model = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0)
+    model.fit(rng.uniform(1, 5, (200, 4)), rng.uniform(1, 5, 200))
+    path = tmp_path / "ocean_model.pkl"
+    joblib.dump(model, path)
+    return path
+
+
+def test_loads_are_measured_one_at_a_time_after_encoding(model_path, monkeypatch):
+    active, events, lock = [0], [], threading.Lock()
+    real_encode = compress_models.encode
+
+    def encode(*args):
+        with lock:
+            events.append("encode")
+        return real_encode(*args)
+
+    def measure_load(path, repeat):
+        with lock:
+            active[0] += 1
+            events.append(("load", active[0]))
+        try:
+            return 0.01, 50 * 1024 * 1024
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(compress_models, "encode", encode)
+    monkeypatch.setattr(compress_models, "measure_load", measure_load)
+    entry = compress_models.compress_model(str(model_path), jobs=4, repeat=1, dry_run=True)
+
+    n = len(compress_models.available_codecs())
+    assert events[:n] == ["encode"] * n
+    assert events[n:] == [("load", 1)] * n
+    assert len(entry["candidates"]) == n
+
+
+def test_probe_reports_the_child_peak_rss(model_path):
+    load_s, peak = compress_models.measure_load(str(model_path), repeat=1)
+    assert load_s > 0
+    # Pico propio del hijo: al menos el intérprete con numpy/sklearn importados
+    assert peak > 20 * 1024 * 1024
+
+
+def test_dry_run_keeps_the_file(model_path, monkeypatch):
+    monkeypatch.setattr(compress_models, "available_codecs", lambda: [("none", 0, 0), ("zlib", 3, ("zlib", 3))])
+    before = model_path.read_bytes()
+    entry = compress_models.compress_model(str(model_path), jobs=2, repeat=1, dry_run=True)
+    assert model_path.read_bytes() == before
+    assert entry["peak_rss_mb"] > 0
+    json.dumps(entry)
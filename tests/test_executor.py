@@ -0,0 +1,68 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from src.inference import executor as executor_mod
+from src.inference.executor import InferenceExecutor, Overloaded
+
+# Lock que un hilo del proceso padre mantiene tomado mientras se crea el pool
+HELD = threading.Lock()
+
+
+def lock_is_free():
+    acquired = HELD.acquire(timeout=2)
+    if acquired:
+        HELD.release()
+    return acquired, os.getpid()
+
+
+def square(x):
+    return x * x
+
+
+def test_process_pool_does_not_inherit_held_locks():
+    release = threading.Event()
+
+    def holder():
+        with HELD:
+            release.wait(30)
+
+    t = threading.Thread(target=holder, daemon=True)
+    t.start()
+    ex = InferenceExecutor(kind="process", workers=1, max_pending=2)
+    try:
+        free, pid = asyncio.run(ex.run("test", lock_is_free))
+        assert ex._get_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert free
+        assert pid != os.getpid()
+    finally:
+        release.set()
+        t.join()
+        ex.shutdown()
+
+
+def test_pool_context_is_not_fork():
+    assert executor_mod._pool_context().get_start_method() != "fork"
+
+
+def test_overloaded_when_max_pending_is_full():
+    ex = InferenceExecutor(kind="thread", workers=1, max_pending=1)
+    gate = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(ex.run("test", gate.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded) as exc:
+            await ex.run("test", square, 3)
+        assert exc.value.retry_after >= 1
+        gate.set()
+        await first
+        return await ex.run("test", square, 3)
+
+    try:
+        assert asyncio.run(scenario()) == 9
+        assert ex.in_flight() == 0
+    finally:
+        ex.shutdown()
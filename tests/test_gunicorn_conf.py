@@ -0,0 +1,59 @@
+import gc
+import os
+import logging
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeServer:
+    log = logging.getLogger("gunicorn-test")
+
+
+@pytest.fixture
+def conf(monkeypatch, pipeline):
+    monkeypatch.setenv("PRELOAD_MODELS", "1")
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", os.path.join(ROOT, "gunicorn.conf.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    gc.unfreeze()
+    gc.enable()
+
+
+@pytest.fixture
+def preload_calls(monkeypatch):
+    import src.inference.api as api
+    import src.inference.provisioning as provisioning
+
+    calls = []
+    monkeypatch.setattr(api, "ensure_models", lambda: calls.append(("ensure_models", gc.isenabled())))
+    monkeypatch.setattr(api, "log_memory_usage", lambda: None)
+    monkeypatch.setattr(provisioning, "warm_up", lambda: calls.append(("warm_up", gc.isenabled())))
+    return calls
+
+
+def test_importing_the_config_leaves_gc_enabled(conf):
+    assert conf.preload_app
+    assert gc.isenabled()
+
+
+def test_when_ready_disables_gc_only_around_preload(conf, preload_calls):
+    conf.when_ready(FakeServer())
+    assert preload_calls == [("ensure_models", False), ("warm_up", False)]
+    assert gc.isenabled()
+    assert gc.get_freeze_count() > 0
+
+
+def test_when_ready_reenables_gc_if_preload_fails(conf, monkeypatch):
+    import src.inference.api as api
+
+    def broken():
+        raise RuntimeError("sin modelos")
+
+    monkeypatch.setattr(api, "ensure_models", broken)
+    with pytest.raises(RuntimeError):
+        conf.when_ready(FakeServer())
+    assert gc.isenabled()
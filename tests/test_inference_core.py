@@ -0,0 +1,42 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from src.inference import inference_core as core
+
+
+def _fitted_with_names():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(1, 5, (60, 20)), columns=core.OCEAN_ITEMS)
+    return RandomForestRegressor(n_estimators=3, random_state=0).fit(X, X.iloc[:, :5].to_numpy()), X
+
+
+def test_predict_silences_only_the_feature_name_warning():
+    model, X = _fitted_with_names()
+    rows = core.model_input(model, X.to_numpy()[:4], core.OCEAN_ITEMS)
+    filters_before = list(warnings.filters)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        got = core.predict(model, rows)
+    assert [str(w.message) for w in caught] == []
+    np.testing.assert_allclose(got, model.predict(X.iloc[:4]), rtol=1e-6)
+    # Sin filtros globales que sobrevivan a la llamada
+    assert warnings.filters == filters_before
+
+
+def test_pipeline_import_does_not_install_global_filters(pipeline):
+    assert not any("feature names" in str(f[1].pattern if f[1] else "") for f in warnings.filters)
+
+
+def test_non_sklearn_models_are_called_directly():
+    class Echo:
+        def predict(self, X):
+            warnings.warn("X does not have valid feature names", UserWarning)
+            return X
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        core.predict(Echo(), np.zeros((1, 2)))
+    assert len(caught) == 1
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.inference.compact_forest import CompactForest, export_forest
+from src.inference.mapped_artifact import ALIGN, read_header, read_mapped, write_mapped
+
+
+def _grid_rows(n_features, lo, hi, n=400, seed=7):
+    return np.random.default_rng(seed).integers(lo, hi + 1, size=(n, n_features)).astype(np.float32)
+
+
+def test_round_trip_keeps_dtypes_shapes_and_alignment(tmp_path):
+    arrays = {
+        "a": np.arange(7, dtype=np.int16),
+        "b": np.linspace(0, 1, 12, dtype=np.float32).reshape(3, 4),
+        "c": np.asfortranarray(np.arange(6, dtype=np.float64).reshape(2, 3)),
+    }
+    path = str(tmp_path / "x.map")
+    write_mapped(path, arrays, {"kind": "test", "n": 3})
+
+    loaded, meta = read_mapped(path)
+    assert meta == {"kind": "test", "n": 3}
+    data_start = read_header(path)["data_start"]
+    assert data_start % ALIGN == 0
+    for name, array in arrays.items():
+        got = loaded[name]
+        assert isinstance(got, np.memmap)
+        assert got.dtype == array.dtype and got.shape == array.shape
+        np.testing.assert_array_equal(got, array)
+        assert not got.flags.writeable
+        assert (data_start + read_header(path)["arrays"][name]["offset"]) % ALIGN == 0
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_rejects_object_arrays_foreign_and_truncated_files(tmp_path):
+    with pytest.raises(ValueError):
+        write_mapped(str(tmp_path / "o.map"), {"o": np.array(["x"], dtype=object)}, {})
+
+    other = tmp_path / "other.map"
+    other.write_bytes(b"PK\x03\x04" + b"\0" * 64)
+    with pytest.raises(ValueError, match="mapeable"):
+        read_mapped(str(other))
+
+    path = str(tmp_path / "t.map")
+    write_mapped(path, {"a": np.arange(1000, dtype=np.float64)}, {})
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 100)
+    with pytest.raises(ValueError, match="truncado"):
+        read_mapped(path)
+
+
+def test_mapped_forest_is_bit_identical_to_compact(riasec_forest, ocean_forest, tmp_path):
+    for name, model, X in (("riasec", riasec_forest, _grid_rows(6, 0, 40)),
+                           ("ocean", ocean_forest, _grid_rows(20, 1, 5))):
+        forest = export_forest(model)
+        path = str(tmp_path / f"{name}.forest.map")
+        forest.save_mapped(path)
+        mapped = CompactForest.load_mapped(path)
+        assert not mapped.arrays["threshold"].flags.writeable
+        np.testing.assert_array_equal(mapped._raw_predict(X), forest._raw_predict(X))
+        np.testing.assert_array_equal(mapped.predict(X), forest.predict(X))
+        assert list(mapped.feature_names_in_) == list(forest.feature_names_in_)
+        assert mapped.nbytes == forest.nbytes
@@ -0,0 +1,110 @@
+import pytest
+
+from src.inference import memory_governor as mg
+from src.inference.executor import Overloaded
+from src.inference.model_registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class FakeSampler:
+    """Devuelve la memoria que fije el test (en lugar de leer smaps_rollup)."""
+
+    def __init__(self, value_mb):
+        self.value = value_mb * MB
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+@pytest.fixture
+def registry(tmp_path):
+    names = ("riasec_model.pkl", "ocean_model.pkl", "riasec_lut.npz", "career_matcher")
+    for name in names:
+        (tmp_path / name).write_bytes(b"x" * 10)
+    reg = ModelRegistry(str(tmp_path))
+    for name in names:
+        reg.get(name, loader=lambda path: bytearray(10))
+    return reg
+
+
+@pytest.fixture
+def collects(monkeypatch):
+    calls = []
+    monkeypatch.setattr(mg.gc, "collect", lambda: calls.append(1))
+    monkeypatch.setattr(mg, "_malloc_trim", lambda: True)
+    return calls
+
+
+def _governor(registry, sampler):
+    return mg.MemoryGovernor(registry, soft_mb=100, hard_mb=200, gc_cooldown_s=60, sampler=sampler)
+
+
+def test_ok_below_soft(registry, collects):
+    governor = _governor(registry, FakeSampler(50))
+    assert governor.tick() == mg.STATE_OK
+    assert collects == []
+    governor.check()
+
+
+def test_soft_collects_with_cooldown_and_keeps_models(registry, collects):
+    governor = _governor(registry, FakeSampler(150))
+    assert governor.tick() == mg.STATE_SOFT
+    assert governor.tick() == mg.STATE_SOFT
+    assert len(collects) == 1
+    assert len(registry.keys()) == 4
+    governor.check()
+
+
+def test_hard_evicts_own_artifacts_but_not_shared(registry, collects):
+    # Los dos modelos vienen del master; la LUT y el matcher los cargó el worker
+    for key in ("riasec_lut.npz", "career_matcher"):
+        registry.evict(key)
+    registry.mark_shared()
+    registry.get("riasec_lut.npz", loader=lambda path: bytearray(10))
+    registry.get("career_matcher", loader=lambda path: bytearray(10))
+
+    sampler = FakeSampler(250)
+    governor = _governor(registry, sampler)
+    assert governor.tick() == mg.STATE_HARD
+    assert registry.keys() == ["riasec_model.pkl", "ocean_model.pkl"]
+    assert governor.used == 250 * MB
+    with pytest.raises(Overloaded):
+        governor.check()
+
+    # Sin nada propio que soltar no vuelve a desalojar; al bajar, deja de rechazar
+    assert governor.tick() == mg.STATE_HARD
+    assert registry.keys() == ["riasec_model.pkl", "ocean_model.pkl"]
+    sampler.value = 150 * MB
+    assert governor.tick() == mg.STATE_SOFT
+    sampler.value = 10 * MB
+    assert governor.tick() == mg.STATE_OK
+    governor.check()
+
+
+def test_hard_recovers_to_soft_after_evicting_secondary(registry, collects):
+    sampler = FakeSampler(250)
+    governor = _governor(registry, sampler)
+    original_evict = registry.evict
+
+    def evict(key=None, include_shared=False):
+        original_evict(key, include_shared)
+        sampler.value = 150 * MB
+
+    registry.evict = evict
+    assert governor.tick() == mg.STATE_SOFT
+    assert registry.keys() == ["riasec_model.pkl", "ocean_model.pkl"]
+
+
+def test_default_sampler_reads_uss_not_rss(monkeypatch):
+    monkeypatch.setattr(mg.metrics, "memory_breakdown",
+                        lambda: {"rss": 900 * MB, "pss": 300 * MB, "uss": 120 * MB, "shared": 780 * MB})
+    governor = mg.MemoryGovernor(ModelRegistry("."), soft_mb=100, hard_mb=200)
+    monkeypatch.setattr(mg.gc, "collect", lambda: None)
+    assert governor.tick() == mg.STATE_SOFT
+    assert governor.used == 120 * MB
+    assert mg.memory_sampler("pss")() == 300 * MB
+    with pytest.raises(ValueError):
+        mg.memory_sampler("rss")
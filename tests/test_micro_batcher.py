@@ -0,0 +1,130 @@
+import time
+import threading
+
+import pytest
+
+from src.inference import micro_batcher as mb
+from src.inference.micro_batcher import MicroBatcher
+
+OCEAN = [3] * 20
+
+
+class RecordingBatchFn:
+    """batch_fn falso: guarda cada llamada y devuelve un resultado propio por ítem."""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+        self._lock = threading.Lock()
+
+    def __call__(self, riasec_batch, ocean_batch, top_n, weight_riasec, weight_ocean):
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self._lock:
+            self.calls.append((list(riasec_batch), top_n, weight_riasec, weight_ocean))
+        return [{"error": "ítem inválido"} if r == "bad" else {"echo": r, "top_n": top_n} for r in riasec_batch]
+
+    def sizes(self):
+        return [len(c[0]) for c in self.calls]
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timeout esperando al micro-batcher"
+        time.sleep(0.005)
+
+
+def test_requests_in_the_window_share_one_predict():
+    fn = RecordingBatchFn()
+    batcher = MicroBatcher(fn, window_ms=200, max_batch=32)
+    futures = [batcher.submit_future([i] * 6, OCEAN) for i in range(5)]
+    results = [f.result(5) for f in futures]
+    assert fn.sizes() == [5]
+    # Cada llamador recibe su propio resultado, en su lugar
+    assert [r["echo"] for r in results] == [[i] * 6 for i in range(5)]
+
+
+def test_max_batch_is_respected():
+    fn = RecordingBatchFn()
+    batcher = MicroBatcher(fn, window_ms=300, max_batch=4)
+    futures = [batcher.submit_future([i] * 6, OCEAN) for i in range(10)]
+    assert [f.result(5)["echo"][0] for f in futures] == list(range(10))
+    assert fn.sizes() == [4, 4, 2]
+
+
+def test_bad_item_fails_only_its_own_future():
+    fn = RecordingBatchFn()
+    batcher = MicroBatcher(fn, window_ms=100, max_batch=8)
+    good1 = batcher.submit_future([1] * 6, OCEAN)
+    bad = batcher.submit_future("bad", OCEAN)
+    good2 = batcher.submit_future([2] * 6, OCEAN)
+    with pytest.raises(ValueError, match="ítem inválido"):
+        bad.result(5)
+    assert good1.result(5)["echo"] == [1] * 6
+    assert good2.result(5)["echo"] == [2] * 6
+    assert fn.sizes() == [3]
+
+
+def test_batch_fn_exception_fails_its_group_and_the_worker_survives():
+    calls = []
+
+    def flaky(riasec_batch, ocean_batch, **params):
+        calls.append(len(riasec_batch))
+        if len(calls) == 1:
+            raise RuntimeError("modelo caído")
+        return [{"ok": True} for _ in riasec_batch]
+
+    batcher = MicroBatcher(flaky, window_ms=50, max_batch=8)
+    first = [batcher.submit_future([1] * 6, OCEAN) for _ in range(2)]
+    for f in first:
+        with pytest.raises(RuntimeError):
+            f.result(5)
+    assert batcher.submit([1] * 6, OCEAN) == {"ok": True}
+
+
+def test_different_parameters_run_as_sub_batches():
+    fn = RecordingBatchFn()
+    batcher = MicroBatcher(fn, window_ms=200, max_batch=8)
+    a = [batcher.submit_future([1] * 6, OCEAN, top_n=3) for _ in range(2)]
+    b = batcher.submit_future([2] * 6, OCEAN, top_n=5)
+    assert b.result(5)["top_n"] == 5
+    assert [f.result(5)["top_n"] for f in a] == [3, 3]
+    assert sorted((len(c[0]), c[1]) for c in fn.calls) == [(1, 5), (2, 3)]
+
+
+def test_stats_report_queue_depth_batch_size_and_wait():
+    gate = threading.Event()
+    fn = RecordingBatchFn(gate)
+    batcher = MicroBatcher(fn, window_ms=20, max_batch=2)
+    size_before = mb.BATCH_SIZE.labels().count
+    wait_before = mb.BATCH_WAIT.labels().count
+
+    futures = [batcher.submit_future([i] * 6, OCEAN) for i in range(2)]
+    # El primer lote quedó bloqueado en batch_fn: lo que llega ahora espera en cola
+    _wait_for(lambda: batcher.stats()["queue_depth"] == 0)
+    futures += [batcher.submit_future([i] * 6, OCEAN) for i in range(2, 5)]
+    assert batcher.stats()["queue_depth"] == 3
+
+    gate.set()
+    for f in futures:
+        f.result(5)
+    _wait_for(lambda: batcher.stats()["items"] == 5)
+    stats = batcher.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["batches"] == 3
+    assert stats["max_batch_size"] == 2
+    assert stats["avg_batch_size"] == pytest.approx(5 / 3, abs=0.01)
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] > 0
+    assert stats["window_ms"] == 20 and stats["max_batch"] == 2
+    assert mb.BATCH_SIZE.labels().count - size_before == 3
+    assert mb.BATCH_WAIT.labels().count - wait_before == 5
+
+
+def test_batches_match_single_predictions(pipeline):
+    batcher = MicroBatcher(pipeline.recommend_career_batch, window_ms=50, max_batch=16)
+    cases = [([4, 2, 5, 1, 3, 2] * 3, [3, 4, 2, 5, 1] * 4), ([1, 5, 2, 2, 4, 3], [2] * 20),
+             ([3] * 48, [5, 1] * 10)]
+    futures = [batcher.submit_future(r, o) for r, o in cases]
+    for (r, o), f in zip(cases, futures):
+        assert f.result(10) == pipeline.recommend_career(r, o)
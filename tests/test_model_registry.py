@@ -0,0 +1,184 @@
+import os
+import time
+import threading
+
+import numpy as np
+import pytest
+
+from src.inference.model_registry import ModelRegistry, file_sha256
+
+
+def _write(path, payload):
+    with open(path, "wb") as f:
+        f.write(payload)
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+class CountingLoader:
+    """Loader que lee el archivo como bytes y cuenta las llamadas."""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        with open(path, "rb") as f:
+            return np.frombuffer(f.read(), dtype=np.uint8).copy()
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    _write(tmp_path / "a.bin", b"a" * 100)
+    _write(tmp_path / "b.bin", b"b" * 100)
+    _write(tmp_path / "c.bin", b"c" * 100)
+    return tmp_path
+
+
+def test_concurrent_gets_load_once(base_dir):
+    registry = ModelRegistry(str(base_dir))
+    loader = CountingLoader(delay=0.05)
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        results.append(registry.get("a.bin", loader=loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.calls == 1
+    assert all(r is results[0] for r in results)
+    assert registry.stats["loads"] == 1
+    assert registry.stats["hits"] >= 7
+
+
+def test_different_keys_load_in_parallel(base_dir):
+    registry = ModelRegistry(str(base_dir))
+    loader = CountingLoader(delay=0.2)
+    threads = [threading.Thread(target=registry.get, args=(name,), kwargs={"loader": loader})
+               for name in ("a.bin", "b.bin", "c.bin")]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Un lock por clave: tres cargas de 0.2 s no se serializan
+    assert time.perf_counter() - started < 0.5
+    assert loader.calls == 3
+
+
+def test_reload_when_size_or_mtime_changes(base_dir):
+    registry = ModelRegistry(str(base_dir))
+    loader = CountingLoader()
+    first = registry.get("a.bin", loader=loader)
+    assert registry.get("a.bin", loader=loader) is first
+
+    _write(base_dir / "a.bin", b"A" * 150)
+    second = registry.get("a.bin", loader=loader)
+    assert second is not first
+    assert len(second) == 150
+
+    _bump_mtime(base_dir / "a.bin")
+    third = registry.get("a.bin", loader=loader)
+    assert third is not second
+    assert loader.calls == 3
+    assert registry.stats["reloads"] == 2
+
+
+def test_check_hash_skips_reload_when_content_is_unchanged(base_dir):
+    registry = ModelRegistry(str(base_dir), check_hash=True)
+    loader = CountingLoader()
+    first = registry.get("a.bin", loader=loader)
+
+    _bump_mtime(base_dir / "a.bin")
+    assert registry.get("a.bin", loader=loader) is first
+    assert loader.calls == 1
+
+
+def test_check_hash_reloads_on_sha_mismatch(base_dir):
+    registry = ModelRegistry(str(base_dir), check_hash=True)
+    loader = CountingLoader()
+    first = registry.get("a.bin", loader=loader)
+    sha_before = file_sha256(str(base_dir / "a.bin"))
+
+    # Mismo tamaño, otro contenido
+    _write(base_dir / "a.bin", b"z" * 100)
+    _bump_mtime(base_dir / "a.bin")
+    assert file_sha256(str(base_dir / "a.bin")) != sha_before
+
+    second = registry.get("a.bin", loader=loader)
+    assert second is not first
+    assert bytes(second) == b"z" * 100
+    assert loader.calls == 2
+
+
+def test_budget_evicts_least_recently_used(base_dir):
+    registry = ModelRegistry(str(base_dir), max_bytes=250)
+    loader = CountingLoader()
+    registry.get("a.bin", loader=loader)
+    registry.get("b.bin", loader=loader)
+    registry.get("a.bin", loader=loader)  # a pasa a ser la más reciente
+    registry.get("c.bin", loader=loader)
+
+    assert registry.keys() == ["a.bin", "c.bin"]
+    assert registry.stats["evictions"] == 1
+    assert registry.resident_bytes() == 200
+
+
+def test_budget_never_evicts_the_entry_just_loaded(base_dir):
+    registry = ModelRegistry(str(base_dir), max_bytes=50)
+    loader = CountingLoader()
+    registry.get("a.bin", loader=loader)
+    registry.get("b.bin", loader=loader)
+    assert registry.keys() == ["b.bin"]
+
+
+def test_explicit_evict_forces_reload(base_dir):
+    registry = ModelRegistry(str(base_dir))
+    loader = CountingLoader()
+    first = registry.get("a.bin", loader=loader)
+    registry.evict("a.bin")
+    assert registry.get("a.bin", loader=loader) is not first
+    assert loader.calls == 2
+
+
+def test_shared_entries_survive_budget_and_evict(base_dir):
+    registry = ModelRegistry(str(base_dir), max_bytes=150)
+    loader = CountingLoader()
+    registry.get("a.bin", loader=loader)
+    assert registry.mark_shared() == ["a.bin"]
+
+    # Sobre el presupuesto, pero "a" viene del master: no se suelta
+    registry.get("b.bin", loader=loader)
+    assert registry.keys() == ["a.bin", "b.bin"]
+    assert registry.keys(shared=True) == ["a.bin"]
+    assert registry.keys(shared=False) == ["b.bin"]
+
+    registry.evict()
+    registry.evict("a.bin")
+    assert registry.keys() == ["a.bin"]
+    registry.evict("a.bin", include_shared=True)
+    assert registry.keys() == []
+
+
+def test_reloaded_shared_entry_is_owned_by_the_process(base_dir):
+    registry = ModelRegistry(str(base_dir))
+    loader = CountingLoader()
+    registry.get("a.bin", loader=loader)
+    registry.mark_shared()
+
+    _write(base_dir / "a.bin", b"A" * 150)
+    registry.get("a.bin", loader=loader)
+    assert registry.keys(shared=False) == ["a.bin"]
@@ -0,0 +1,59 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.inference.inference_core import OCEAN_ITEMS
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("skl2onnx")
+
+RIASEC_COLS = ["R", "I", "A", "S", "E", "C"]
+
+# La misma tolerancia que usa export_onnx.py por defecto. Las entradas son
+# enteras: ONNX redondea los umbrales a float32 al más cercano (no hacia
+# abajo), así que un valor continuo entre ambos podría tomar otra rama.
+TOL_ONNX = 1e-4
+
+
+def _grid_rows(n_features, lo, hi, n=400, seed=7):
+    return np.random.default_rng(seed).integers(lo, hi + 1, size=(n, n_features)).astype(np.float32)
+
+
+def _export(model, tmp_path, name):
+    from export_onnx import export_model
+    from src.inference.onnx_backend import load_onnx_model
+
+    pkl = tmp_path / f"{name}.pkl"
+    joblib.dump(model, pkl)
+    assert export_model(str(pkl), tol=TOL_ONNX)
+    return load_onnx_model(str(tmp_path / f"{name}.onnx"))
+
+
+def test_classifier_matches_sklearn(riasec_forest, tmp_path):
+    model = _export(riasec_forest, tmp_path, "riasec_model")
+    X = _grid_rows(6, 0, 40)
+    df = pd.DataFrame(X, columns=RIASEC_COLS)
+    np.testing.assert_allclose(model.predict_proba(X), riasec_forest.predict_proba(df), rtol=0, atol=TOL_ONNX)
+    assert (model.predict(X) == riasec_forest.predict(df)).all()
+    assert list(model.feature_names_in_) == RIASEC_COLS
+    assert list(model.classes_) == [str(c) for c in riasec_forest.classes_]
+
+
+def test_regressor_matches_sklearn(ocean_forest, tmp_path):
+    model = _export(ocean_forest, tmp_path, "ocean_model")
+    X = _grid_rows(20, 1, 5)
+    expected = np.asarray(ocean_forest.predict(pd.DataFrame(X, columns=OCEAN_ITEMS))).reshape(len(X), -1)
+    got = model.predict(X)
+    assert got.shape == (len(X), 5)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=TOL_ONNX)
+    with pytest.raises(AttributeError):
+        model.predict_proba(X)
+
+
+def test_input_buffer_grows_and_single_rows_match_batch(ocean_forest, tmp_path):
+    model = _export(ocean_forest, tmp_path, "ocean_model")
+    X = _grid_rows(20, 1, 5, n=100)
+    whole = model.predict(X)
+    single = np.vstack([model.predict(X[i]) for i in range(5)])
+    np.testing.assert_array_equal(single, whole[:5])
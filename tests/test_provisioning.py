@@ -0,0 +1,127 @@
+import os
+import hashlib
+
+import pytest
+
+from src.inference import provisioning
+from src.inference.provisioning import ProvisioningError, provision, provision_one
+
+PAYLOAD = b"modelo" * 1000
+
+
+def _entry(name="riasec_model.pkl", payload=PAYLOAD, sha=None):
+    return {
+        "name": name,
+        "url": None,
+        "sha256": sha or hashlib.sha256(payload).hexdigest(),
+        "size": len(payload),
+    }
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    """Espejo local con los artefactos (MODELS_MIRROR) y una carpeta de destino vacía."""
+    source = tmp_path / "mirror"
+    source.mkdir()
+    (source / "riasec_model.pkl").write_bytes(PAYLOAD)
+    monkeypatch.setenv("MODELS_MIRROR", str(source))
+    dest = tmp_path / "models"
+    dest.mkdir()
+    return source, dest
+
+
+def _leftovers(folder):
+    return [f for f in os.listdir(folder) if f.endswith(".part")]
+
+
+def test_download_goes_through_part_file_and_os_replace(mirror, monkeypatch):
+    source, dest = mirror
+    final = dest / "riasec_model.pkl"
+    seen = {}
+    real_fetch, real_replace = provisioning._fetch, provisioning.os.replace
+
+    def fetch(src, tmp_path):
+        # Mientras se descarga, el nombre final no existe
+        seen["tmp"] = tmp_path
+        seen["final_during_fetch"] = final.exists()
+        real_fetch(src, tmp_path)
+
+    def replace(src, dst):
+        seen["replace"] = (src, dst)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(provisioning, "_fetch", fetch)
+    monkeypatch.setattr(provisioning.os, "replace", replace)
+
+    name, status, _ = provision_one(_entry(), str(dest))
+    assert (name, status) == ("riasec_model.pkl", "downloaded")
+    assert os.path.dirname(seen["tmp"]) == str(dest)
+    assert seen["tmp"].endswith(".part")
+    assert seen["final_during_fetch"] is False
+    assert seen["replace"] == (seen["tmp"], str(final))
+    assert final.read_bytes() == PAYLOAD
+    assert _leftovers(dest) == []
+
+
+def test_bad_sha_is_rejected_and_never_installed(mirror):
+    _, dest = mirror
+    entry = _entry(sha="0" * 64)
+    with pytest.raises(ProvisioningError, match="sha256"):
+        provision_one(entry, str(dest))
+    assert not (dest / "riasec_model.pkl").exists()
+    assert _leftovers(dest) == []
+
+    statuses = provision(str(dest), manifest=[entry])
+    assert statuses == {"riasec_model.pkl": "error"}
+    with pytest.raises(ProvisioningError):
+        provision(str(dest), manifest=[entry], strict=True)
+
+
+def test_bad_download_keeps_the_previous_file(mirror):
+    source, dest = mirror
+    old = b"version anterior"
+    (dest / "riasec_model.pkl").write_bytes(old)
+    # El manifiesto pide otro contenido y el espejo sirve algo que tampoco coincide
+    with pytest.raises(ProvisioningError):
+        provision_one(_entry(payload=b"x" * len(PAYLOAD)), str(dest))
+    assert (dest / "riasec_model.pkl").read_bytes() == old
+    assert _leftovers(dest) == []
+
+
+def test_interrupted_download_leaves_nothing(mirror, monkeypatch):
+    _, dest = mirror
+
+    def fetch(src, tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(PAYLOAD[:100])
+        raise OSError("conexión cortada")
+
+    monkeypatch.setattr(provisioning, "_fetch", fetch)
+    with pytest.raises(OSError):
+        provision_one(_entry(), str(dest))
+    assert os.listdir(dest) == []
+
+
+def test_existing_matching_file_is_reused(mirror, monkeypatch):
+    _, dest = mirror
+    (dest / "riasec_model.pkl").write_bytes(PAYLOAD)
+    monkeypatch.setattr(provisioning, "_fetch", lambda *a: pytest.fail("no debía descargar"))
+    assert provision_one(_entry(), str(dest))[1] == "ok"
+
+
+def test_mismatching_local_file_is_downloaded_again(mirror):
+    _, dest = mirror
+    (dest / "riasec_model.pkl").write_bytes(b"corrupto")
+    assert provision_one(_entry(), str(dest))[1] == "downloaded"
+    assert (dest / "riasec_model.pkl").read_bytes() == PAYLOAD
+
+
+def test_manifest_uses_the_registry_digest(mirror, tmp_path):
+    source, _ = mirror
+    for name in ("ocean_model.pkl", "riasec_affinity.json"):
+        (source / name).write_bytes(name.encode())
+    out = tmp_path / "manifest.json"
+    provisioning.write_manifest(str(source), str(out))
+    entries = {e["name"]: e for e in provisioning.load_manifest(str(source), str(out))}
+    assert entries["riasec_model.pkl"]["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert entries["ocean_model.pkl"]["size"] == len(b"ocean_model.pkl")
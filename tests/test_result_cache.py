@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import shutil
+
+import numpy as np
+import pytest
+
+from src.inference import result_cache as rc
+from src.inference.model_registry import ModelRegistry
+from src.inference.result_cache import ResultCache, canonical_key
+
+OCEAN = [3, 4, 2, 5, 1] * 4
+RESULT = {"riasec": "RI", "recomendaciones": [{"carrera": "X", "score": 1.5}]}
+
+
+class FakeClock:
+    """Sustituye al módulo time de result_cache: monotonic y time avanzan a mano."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rc, "time", fake)
+    return fake
+
+
+def _tmp_files(folder):
+    return [f for _, _, files in os.walk(folder) for f in files if f.endswith(".tmp")]
+
+
+# ==========================
+# Clave canónica
+# ==========================
+
+def test_key_normalizes_numeric_types():
+    base = canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 3, 1.2, 0.2, "fp")
+    assert canonical_key([1.0, 2.0, 3.0, 4.0, 5.0, 6.0], [float(x) for x in OCEAN], 3, 1.2, 0.2, "fp") == base
+    assert canonical_key(np.arange(1, 7, dtype=np.int64), np.asarray(OCEAN), np.int64(3), 1.2, 0.2, "fp") == base
+    assert canonical_key(np.arange(1, 7, dtype=np.float32), OCEAN, 3.0, 1.2, 0.2, "fp") == base
+
+
+def test_key_depends_on_weights_top_n_and_fingerprint():
+    base = canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 3, 1.2, 0.2, "fp")
+    variants = [
+        canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 5, 1.2, 0.2, "fp"),
+        canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 3, 1.0, 0.2, "fp"),
+        canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 3, 1.2, 0.3, "fp"),
+        canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 3, 1.2, 0.2, "fp2"),
+        canonical_key([1, 2, 3, 4, 5, 7], OCEAN, 3, 1.2, 0.2, "fp"),
+        canonical_key([1, 2, 3, 4, 5, 6], OCEAN[::-1], 3, 1.2, 0.2, "fp"),
+    ]
+    assert len({base, *variants}) == len(variants) + 1
+
+
+def test_pipeline_key_groups_riasec_before_hashing(pipeline):
+    scores = [1, 2, 3, 4, 5, 6]
+    items18 = [s for s in scores for _ in range(3)]
+    items48 = [float(s) for s in scores for _ in range(8)]
+    keys = {pipeline._cache_key(r, OCEAN, 3, 1.2, 0.2, "fp") for r in (scores, items18, items48)}
+    assert len(keys) == 1
+    assert pipeline._cache_key(["a"] * 18, OCEAN, 3, 1.2, 0.2, "fp") is None
+
+
+# ==========================
+# Nivel en memoria
+# ==========================
+
+def test_get_and_put_return_isolated_copies(clock):
+    cache = ResultCache(max_entries=8, ttl_s=60)
+    value = json.loads(json.dumps(RESULT))
+    cache.put("k", value)
+    value["recomendaciones"][0]["score"] = -1
+
+    first = cache.get("k")
+    assert first == RESULT
+    first["recomendaciones"].clear()
+    assert cache.get("k") == RESULT
+
+
+def test_ttl_expiry(clock):
+    cache = ResultCache(max_entries=8, ttl_s=10)
+    cache.put("k", RESULT)
+    clock.now += 9.9
+    assert cache.get("k") == RESULT
+    clock.now += 0.2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction(clock):
+    cache = ResultCache(max_entries=2, ttl_s=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+# ==========================
+# Nivel en disco
+# ==========================
+
+def test_disk_tier_is_shared_and_written_atomically(tmp_path, clock):
+    writer = ResultCache(max_entries=8, ttl_s=60, disk_dir=str(tmp_path))
+    key = canonical_key([1, 2, 3, 4, 5, 6], OCEAN, 3, 1.2, 0.2, "fp")
+    writer.put(key, RESULT)
+
+    path = tmp_path / key[:2] / (key + ".json")
+    assert json.loads(path.read_text(encoding="utf-8"))["result"] == RESULT
+    assert _tmp_files(tmp_path) == []
+
+    # Otro worker (memoria vacía) lo encuentra en disco y lo sube a memoria
+    reader = ResultCache(max_entries=8, ttl_s=60, disk_dir=str(tmp_path))
+    assert reader.get(key) == RESULT
+    path.unlink()
+    assert reader.get(key) == RESULT
+
+
+def test_disk_write_failure_leaves_no_partial_file(tmp_path, clock, monkeypatch):
+    cache = ResultCache(max_entries=8, ttl_s=60, disk_dir=str(tmp_path))
+    key = "ab" + "0" * 62
+
+    def failing_replace(src, dst):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(rc.os, "replace", failing_replace)
+    cache.put(key, RESULT)
+    assert not (tmp_path / "ab" / (key + ".json")).exists()
+    assert _tmp_files(tmp_path) == []
+    # El nivel en memoria sigue respondiendo
+    assert cache.get(key) == RESULT
+
+
+def test_disk_tier_ignores_corrupt_and_expired_files(tmp_path, clock):
+    cache = ResultCache(max_entries=8, ttl_s=10, disk_dir=str(tmp_path))
+    key = "cd" + "1" * 62
+    cache.put(key, RESULT)
+    cache.clear()
+    clock.now += 11
+    assert cache.get(key) is None
+    assert not (tmp_path / "cd" / (key + ".json")).exists()
+
+    (tmp_path / "cd" / (key + ".json")).write_text('{"expires": 99999', encoding="utf-8")
+    assert cache.get(key) is None
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_sweep_removes_expired_and_orphaned_files(tmp_path):
+    cache = ResultCache(max_entries=8, ttl_s=60, disk_dir=str(tmp_path), sweep_interval_s=0)
+    keys = [f"{i:02x}" + "0" * 62 for i in range(4)]
+    for key in keys:
+        cache.put(key, RESULT)
+    _age(cache._disk_path(keys[0]), 120)
+    _age(cache._disk_path(keys[1]), 120)
+    orphan = tmp_path / keys[2][:2] / "x.tmp"
+    orphan.write_text("{", encoding="utf-8")
+    _age(orphan, 120)
+
+    assert cache.sweep() == 3
+    remaining = sorted(p.name for p in tmp_path.rglob("*") if p.is_file())
+    assert remaining == sorted(k + ".json" for k in keys[2:])
+
+
+def test_sweep_caps_the_disk_tier_keeping_the_newest(tmp_path):
+    cache = ResultCache(max_entries=8, ttl_s=3600, disk_dir=str(tmp_path), disk_max_entries=3,
+                        sweep_interval_s=0)
+    keys = [f"{i:02x}" + "1" * 62 for i in range(6)]
+    for age, key in zip(range(60, 0, -10), keys):
+        cache.put(key, RESULT)
+        _age(cache._disk_path(key), age)
+
+    assert cache.sweep() == 3
+    assert sorted(p.stem for p in tmp_path.rglob("*.json")) == keys[3:]
+
+
+def test_writes_trigger_at_most_one_sweep_per_interval(tmp_path, monkeypatch):
+    sweeps = []
+    cache = ResultCache(max_entries=8, ttl_s=60, disk_dir=str(tmp_path), sweep_interval_s=3600)
+    monkeypatch.setattr(cache, "sweep", lambda: sweeps.append(1))
+    for i in range(5):
+        cache.put(f"{i:02x}" + "2" * 62, RESULT)
+    deadline = time.monotonic() + 5
+    while not sweeps and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert sweeps == [1]
+
+
+# ==========================
+# Huella de artefactos
+# ==========================
+
+@pytest.fixture
+def isolated_pipeline(pipeline, fixture_models_dir, tmp_path, monkeypatch):
+    """Pipeline con un registro y una caché propios sobre una copia de los modelos."""
+    models_dir = tmp_path / "models"
+    shutil.copytree(fixture_models_dir, models_dir)
+    monkeypatch.setattr(pipeline, "MODELS_DIR", str(models_dir))
+    monkeypatch.setattr(pipeline, "registry", ModelRegistry(str(models_dir)))
+    monkeypatch.setattr(pipeline, "result_cache", ResultCache(max_entries=64, ttl_s=60))
+    return pipeline, models_dir
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_fingerprint_is_stable_without_changes(isolated_pipeline):
+    pipeline, _ = isolated_pipeline
+    assert pipeline.artifact_fingerprint() == pipeline.artifact_fingerprint()
+
+
+@pytest.mark.parametrize("fname", ["riasec_model.pkl", "ocean_model.pkl", "riasec_affinity.json"])
+def test_model_reload_changes_fingerprint(isolated_pipeline, fname):
+    pipeline, models_dir = isolated_pipeline
+    before = pipeline.artifact_fingerprint()
+    reloads = pipeline.registry.stats["reloads"]
+
+    _bump_mtime(models_dir / fname)
+    after = pipeline.artifact_fingerprint()
+    assert after != before
+    assert pipeline.registry.stats["reloads"] > reloads
+
+
+def test_stale_results_are_not_served_after_reload(isolated_pipeline):
+    pipeline, models_dir = isolated_pipeline
+    riasec = [4, 2, 5, 1, 3, 2] * 3
+    fresh = pipeline.cached_recommend_career(riasec, OCEAN)
+
+    # Resultado "viejo" bajo la clave actual: se sirve mientras no cambie nada
+    key = pipeline._cache_key(riasec, OCEAN, 3, 1.2, 0.2, pipeline.artifact_fingerprint())
+    pipeline.result_cache.put(key, {"stale": True})
+    assert pipeline.cached_recommend_career(riasec, OCEAN) == {"stale": True}
+
+    _bump_mtime(models_dir / "ocean_model.pkl")
+    assert pipeline.cached_recommend_career(riasec, OCEAN) == fresh
+    assert pipeline.cached_recommend_career_batch([riasec], [OCEAN]) == [fresh]
+
+
+def test_fingerprint_tracks_the_riasec_table(isolated_pipeline, monkeypatch):
+    from src.inference.riasec_lut import LUT_FILE, build_riasec_lut
+
+    pipeline, models_dir = isolated_pipeline
+    with_table = pipeline.artifact_fingerprint()
+    assert f"{LUT_FILE}:-" not in with_table and with_table.endswith(":exact")
+
+    monkeypatch.setenv("RIASEC_LUT", "0")
+    disabled = pipeline.artifact_fingerprint()
+    assert disabled.endswith(f"{LUT_FILE}:-") and disabled != with_table
+    monkeypatch.delenv("RIASEC_LUT")
+
+    os.remove(models_dir / LUT_FILE)
+    assert pipeline.artifact_fingerprint() == disabled
+
+    build_riasec_lut(str(models_dir / "riasec_model.pkl"), str(models_dir / LUT_FILE), lo=1, hi=5, den=1, approx=True)
+    approx = pipeline.artifact_fingerprint()
+    assert approx.endswith(":approx")
+    assert approx not in (with_table, disabled)
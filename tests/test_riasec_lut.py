@@ -0,0 +1,74 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.inference.affinity_index import RIASEC_LETTERS
+from src.inference.inference_core import group_riasec
+from src.inference.riasec_lut import LUT_FILE, form_coverage, load_riasec_lut
+
+
+@pytest.fixture(scope="module")
+def lut_and_model(fixture_models_dir):
+    lut = load_riasec_lut(os.path.join(fixture_models_dir, LUT_FILE))
+    model = joblib.load(os.path.join(fixture_models_dir, "riasec_model.pkl"))
+    return lut, model
+
+
+def _forest(model, pipeline, grouped):
+    labels = model.predict(pd.DataFrame(grouped, columns=RIASEC_LETTERS))
+    return [(str(label), pipeline.get_subprofile(g)) for label, g in zip(labels, grouped)]
+
+
+def test_fixture_table_is_the_production_domain(lut_and_model):
+    lut, _ = lut_and_model
+    assert (lut.lo_num, lut.den, lut.n, lut.approx) == (3, 3.0, 13, False)
+
+
+def test_18_item_form_always_hits_and_matches_forest(lut_and_model, pipeline):
+    lut, model = lut_and_model
+    rng = np.random.default_rng(0)
+    grouped = [group_riasec(row) for row in rng.integers(1, 6, size=(3000, 18)).astype(float)]
+    hits = lut.lookup_many(grouped)
+    assert all(hit is not None for hit in hits)
+    assert hits == _forest(model, pipeline, grouped)
+
+
+def test_48_item_form_hits_only_on_grid_and_matches_forest(lut_and_model, pipeline):
+    lut, model = lut_and_model
+    rng = np.random.default_rng(1)
+    answers = rng.integers(1, 6, size=(3000, 48)).astype(float)
+    # Bloques de 8 ítems iguales: el promedio es entero y cae en la grilla
+    answers[:300] = np.repeat(rng.integers(1, 6, size=(300, 6)), 8, axis=1)
+    grouped = [group_riasec(row) for row in answers]
+    hits = lut.lookup_many(grouped)
+    on_grid = [i for i, hit in enumerate(hits) if hit is not None]
+    assert set(range(300)) <= set(on_grid)
+    assert len(on_grid) < len(grouped)
+    assert [hits[i] for i in on_grid] == _forest(model, pipeline, [grouped[i] for i in on_grid])
+
+
+def test_6_score_form_outside_1_5_uses_the_forest(lut_and_model):
+    lut, _ = lut_and_model
+    assert lut.lookup([30, 20, 10, 15, 12, 9]) is None
+    assert lut.lookup([0, 1, 2, 3, 4, 5]) is None
+    assert lut.lookup([1, 2, 3, 4, 5, 5]) is not None
+
+
+def test_form_coverage_of_the_default_table():
+    coverage = form_coverage(lo_num=3, den=3, n=13)
+    assert coverage["18 ítems"] == 1.0
+    assert coverage["48 ítems"] == pytest.approx((5 / 33) ** 6)
+    assert coverage["6 puntajes (0-40)"] == pytest.approx((5 / 41) ** 6)
+    assert set(form_coverage(3, 3, 13, approx=True).values()) == {1.0}
+
+
+def test_pipeline_results_do_not_depend_on_the_table(pipeline, monkeypatch):
+    rng = np.random.default_rng(2)
+    cases = [(rng.integers(1, 6, size=18).tolist(), rng.integers(1, 6, size=20).tolist()) for _ in range(40)]
+    with_lut = [pipeline.recommend_career(r, o) for r, o in cases]
+    monkeypatch.setenv("RIASEC_LUT", "0")
+    assert pipeline.riasec_lut() is None
+    assert [pipeline.recommend_career(r, o) for r, o in cases] == with_lut
@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.inference.affinity_index import ALIAS_MAP, SUBPROFILES, AffinityIndex
+from src.inference.scoring import ScoringEngine, top_k
+
+
+def baseline_recommend(riasec_affinity, riasec_label, sub_label, ocean_vector, top_n, weight_riasec, weight_ocean):
+    """Pasos 3, 4 y 6 de recommend_career tal como estaban antes del motor matricial."""
+    mapped_label = ALIAS_MAP.get(sub_label, sub_label)
+    carreras_data = []
+    if "-" in mapped_label:
+        base, sub = mapped_label.split("-", 1)
+        carreras_data = riasec_affinity.get(base, {}).get(mapped_label, [])
+    else:
+        sub_aff = riasec_affinity.get(riasec_label, {})
+        for subblock in sub_aff.values():
+            carreras_data.extend(subblock)
+
+    adjusted = []
+    ocean_boost = sum(ocean_vector) / len(ocean_vector)
+    for entry in carreras_data:
+        score = weight_riasec * (1 + weight_ocean * ocean_boost)
+        adjusted.append({
+            "carrera": entry.get("carrera"),
+            "universidades": entry.get("universidades", []),
+            "score": round(score, 3)
+        })
+    return sorted(adjusted, key=lambda x: x["score"], reverse=True)[:top_n]
+
+
+def _catalog(with_profiles=False, seed=0):
+    rng = random.Random(seed)
+    catalog = {}
+    for letter, seconds in SUBPROFILES.items():
+        block = {}
+        for sub in seconds.values():
+            label = ALIAS_MAP.get(sub, sub)
+            careers = []
+            for i in range(rng.randint(0, 9)):
+                entry = {"carrera": f"{label} {i}", "universidades": [f"U{j}" for j in range(i % 3)]}
+                if with_profiles:
+                    entry["riasec"] = [rng.random() for _ in range(6)]
+                    entry["ocean"] = [rng.uniform(-1, 1) for _ in range(5)]
+                careers.append(entry)
+            block[label] = careers
+        catalog[letter] = block
+    return catalog
+
+
+def _queries(n, seed=1):
+    rng = np.random.default_rng(seed)
+    labels = [(letter, sub) for letter, seconds in SUBPROFILES.items() for sub in seconds.values()]
+    labels += [(letter, letter) for letter in SUBPROFILES]
+    for _ in range(n):
+        riasec_label, sub_label = labels[rng.integers(len(labels))]
+        yield (
+            riasec_label,
+            sub_label,
+            rng.uniform(1, 5, 6),
+            rng.uniform(1, 5, 5),
+            int(rng.integers(1, 12)),
+            float(rng.choice([1.2, 0.7, 2.0])),
+            float(rng.choice([0.2, 0.0, 0.55])),
+        )
+
+
+def test_without_profiles_matches_baseline_exactly():
+    catalog = _catalog(with_profiles=False)
+    engine = ScoringEngine(AffinityIndex.from_dict(catalog))
+    for riasec_label, sub_label, grouped, ocean, top_n, w_r, w_o in _queries(500):
+        rows = engine.candidates(riasec_label, sub_label)
+        got = engine.recommend([grouped], [ocean], rows, top_n, w_r, w_o)[0]
+        expected = baseline_recommend(catalog, riasec_label, sub_label, ocean, top_n, w_r, w_o)
+        assert got == expected
+
+
+def test_batch_without_profiles_matches_single():
+    catalog = _catalog(with_profiles=False)
+    engine = ScoringEngine(AffinityIndex.from_dict(catalog))
+    rows = engine.candidates("I", "I-Health")
+    users = [(np.full(6, 3.0), np.array([1.0, 2.5, 4.0, 3.3, 5.0])), (np.ones(6), np.full(5, 2.0))]
+    batch = engine.recommend([u[0] for u in users], [u[1] for u in users], rows, 4)
+    single = [engine.recommend([r], [o], rows, 4)[0] for r, o in users]
+    assert batch == single
+
+
+def test_partial_profiles_fall_back_to_baseline():
+    catalog = _catalog(with_profiles=True)
+    block = catalog["S"]["S-Salud"]
+    if not block:
+        block.append({"carrera": "Enfermería", "universidades": []})
+    block.append({"carrera": "Sin perfil", "universidades": ["UNI"]})
+    engine = ScoringEngine(AffinityIndex.from_dict(catalog))
+
+    rows = engine.candidates("S", "S-Salud")
+    assert not engine.has_profiles(rows)
+    ocean = np.array([3.2, 4.1, 2.0, 3.9, 2.2])
+    got = engine.recommend([np.full(6, 3.0)], [ocean], rows, 5)[0]
+    assert got == baseline_recommend(catalog, "S", "S-Salud", ocean, 5, 1.2, 0.2)
+
+
+def test_profiles_rank_by_profile_fit():
+    catalog = {"R": {"R-Tech": [
+        {"carrera": "Lejana", "riasec": [0, 0, 0, 0, 0, 1], "ocean": [1, 0, 0, 0, 0]},
+        {"carrera": "Cercana", "riasec": [1, 0, 0, 0, 0, 0], "ocean": [1, 0, 0, 0, 0]},
+    ]}}
+    engine = ScoringEngine(AffinityIndex.from_dict(catalog))
+    rows = engine.candidates("R", "R-Tech")
+    assert engine.has_profiles(rows)
+    ranked = engine.recommend([[5, 1, 1, 1, 1, 1]], [[5, 3, 3, 3, 3]], rows, 2)[0]
+    assert [r["carrera"] for r in ranked] == ["Cercana", "Lejana"]
+    expected = 1.2 * (5 / np.sqrt(30)) * (1 + 0.2 * 1.0)
+    assert ranked[0]["score"] == pytest.approx(round(expected, 3))
+
+
+def test_top_k_breaks_ties_by_catalog_order():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1])
+    assert top_k(scores, 3).tolist() == [1, 3, 0]
+    assert top_k(scores, 10).tolist() == [1, 3, 0, 2, 4]